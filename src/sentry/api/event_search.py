@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import functools
 import re
+import threading
 from collections import namedtuple
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from functools import reduce
 from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
 
+from cachetools import LRUCache
 from django.utils.functional import cached_property
 from parsimonious.exceptions import IncompleteParseError
 from parsimonious.expressions import Optional
@@ -45,6 +48,14 @@ from sentry.utils.validators import is_event_id, is_span_id
 # before the asterisk is actually escaping the asterisk.
 WILDCARD_CHARS = re.compile(r"(?<!\\)(\\\\)*\*")
 
+# A `key:value` filter the grammar can only parse as a text filter. Values
+# starting with a digit, sign, operator, quote, bracket or paren may be numbers,
+# dates, durations, lists etc. and are left to the grammar.
+SIMPLE_FILTER_RE = re.compile(r"(!)?([a-zA-Z0-9_.-]+):([a-zA-Z_*/@][^()\t\n \"\\\[\]]*)")
+
+# Number of distinct query strings whose parse tree and parsed filters are kept
+PARSE_CACHE_SIZE = 1000
+
 event_search_grammar = Grammar(
     r"""
 search = spaces term*
@@ -514,6 +525,9 @@ class SearchVisitor(NodeVisitor):
             config = SearchConfig()
         self.config = config
         self.params = params if params is not None else {}
+        # Set when a filter value is relative to the current time, so the
+        # result of the visit is only valid right now
+        self.time_dependent = False
         if builder is None:
             # Avoid circular import
             from sentry.search.events.builder import UnresolvedQuery
@@ -672,6 +686,7 @@ class SearchVisitor(NodeVisitor):
         (search_key, _, value) = children
 
         if self.is_date_key(search_key.name):
+            self.time_dependent = True
             try:
                 from_val, to_val = parse_datetime_range(value.text)
             except InvalidQuery as exc:
@@ -881,6 +896,7 @@ class SearchVisitor(NodeVisitor):
         operator = handle_negation(negation, operator)
         is_date_aggregate = any(key in search_key.name for key in self.config.date_keys)
         if is_date_aggregate:
+            self.time_dependent = True
             try:
                 from_val, to_val = parse_datetime_range(search_value.text)
             except InvalidQuery as exc:
@@ -1167,25 +1183,105 @@ default_config = SearchConfig(
 )
 
 
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_tree(query: str) -> Node:
+    return event_search_grammar.parse(query)
+
+
+def _parse_simple_query(query: str, visitor: SearchVisitor) -> list[SearchFilter] | None:
+    """
+    Parses queries made up only of `key:value` text filters without running the
+    grammar. Returns None for any other query.
+    """
+    filters = []
+    for token in query.split(" "):
+        if not token:
+            continue
+        match = SIMPLE_FILTER_RE.fullmatch(token)
+        if match is None:
+            return None
+        negation, key, value = match.groups()
+        if key in ("has", "is") or value.lower() in ("true", "false"):
+            return None
+        # Same steps as visiting a `text_filter` node
+        search_key = visitor.visit_search_key(None, [key])
+        operator = "!=" if negation else "="
+        filters.append(visitor._handle_text_filter(search_key, operator, SearchValue(value)))
+    return filters
+
+
+_parse_cache: LRUCache = LRUCache(maxsize=PARSE_CACHE_SIZE)
+_parse_cache_lock = threading.Lock()
+
+
+def clear_parse_cache() -> None:
+    _parse_tree.cache_clear()
+    with _parse_cache_lock:
+        _parse_cache.clear()
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _parse_cache_key(query: str, config: SearchConfig):
+    key = (
+        query,
+        type(config),
+        _freeze(asdict(config)),
+        config.allow_boolean,
+        config.free_text_key,
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 def parse_search_query(
     query, config=None, params=None, builder=None, config_overrides=None
 ) -> list[SearchFilter]:
     if config is None:
         config = default_config
+    if config_overrides:
+        config = SearchConfig.create_from(config, **config_overrides)
 
-    try:
-        tree = event_search_grammar.parse(query)
-    except IncompleteParseError as e:
-        idx = e.column()
-        prefix = query[max(0, idx - 5) : idx]
-        suffix = query[idx : (idx + 5)]
-        raise InvalidSearchQuery(
-            "{} {}".format(
-                f"Parse error at '{prefix}{suffix}' (column {e.column():d}).",
-                "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
+    # Without a builder or params the result only depends on the query and the
+    # config. Filters are immutable, so cached ones are shared between callers.
+    cache_key = None
+    if builder is None and not params:
+        cache_key = _parse_cache_key(query, config)
+        if cache_key is not None:
+            with _parse_cache_lock:
+                cached = _parse_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+
+    visitor = SearchVisitor(config, params=params, builder=builder)
+    result = _parse_simple_query(query, visitor)
+    if result is None:
+        try:
+            tree = _parse_tree(query)
+        except IncompleteParseError as e:
+            idx = e.column()
+            prefix = query[max(0, idx - 5) : idx]
+            suffix = query[idx : (idx + 5)]
+            raise InvalidSearchQuery(
+                "{} {}".format(
+                    f"Parse error at '{prefix}{suffix}' (column {e.column():d}).",
+                    "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
+                )
             )
-        )
+        result = visitor.visit(tree)
 
-    if config_overrides:
-        config = SearchConfig.create_from(config, **config_overrides)
-    return SearchVisitor(config, params=params, builder=builder).visit(tree)
+    if cache_key is not None and not visitor.time_dependent:
+        with _parse_cache_lock:
+            _parse_cache[cache_key] = tuple(result)
+    return result
@@ -1,5 +1,8 @@
+import base64
 import bisect
 import functools
+import heapq
+import itertools
 import math
 from datetime import datetime, timezone
 from typing import Any
@@ -7,9 +10,11 @@ from urllib.parse import quote
 
 from django.core.exceptions import EmptyResultSet, ObjectDoesNotExist
 from django.db import connections
+from django.db.models import Q
 from django.db.models.functions import Lower
 
-from sentry.utils.cursors import Cursor, CursorResult, build_cursor
+from sentry.utils import json
+from sentry.utils.cursors import Cursor, CursorResult, StringCursor, build_cursor
 from sentry.utils.pagination_factory import PaginatorLike
 
 quote_name = connections["default"].ops.quote_name
@@ -36,10 +41,53 @@ def count_hits(queryset, max_hits):
     return cursor.fetchone()[0]
 
 
+def estimate_hits(queryset, max_hits=None):
+    """
+    Number of rows of the queryset as estimated by the query planner. The query
+    itself is not run, so this is cheap for any table size but only as accurate
+    as the table statistics.
+    """
+    hits_query = queryset.values("id").query
+    hits_query.clear_ordering(force_empty=True)
+    try:
+        h_sql, h_params = hits_query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    cursor = connections[queryset.using_replica().db].cursor()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {h_sql}", h_params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    hits = int(plan[0]["Plan"]["Plan Rows"])
+    return min(hits, max_hits) if max_hits else hits
+
+
 class BadPaginationError(Exception):
     pass
 
 
+def encode_keyset_cursor_value(values):
+    encoded = [
+        {"datetime": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(encoded).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor_value(value, length):
+    try:
+        padded = str(value) + "=" * (-len(str(value)) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(decoded, list) or len(decoded) != length:
+            raise ValueError
+        return [
+            datetime.fromisoformat(item["datetime"]) if isinstance(item, dict) else item
+            for item in decoded
+        ]
+    except (KeyError, TypeError, ValueError):
+        raise BadPaginationError("Invalid cursor value")
+
+
 class BasePaginator:
     def __init__(
         self, queryset, order_by=None, max_limit=MAX_LIMIT, on_results=None, post_query_filter=None
@@ -222,6 +270,139 @@ class DateTimePaginator(BasePaginator):
         )
 
 
+class KeysetPaginator(BasePaginator):
+    """
+    Paginates by the full sort key of the rows rather than by a single value and
+    an offset into it. Each page is found by filtering on the sort key of the
+    last row of the previous page, so deep pages cost as much as the first one.
+
+    `order_by` is a list of fields, each optionally prefixed by "-". The id is
+    appended as a tiebreaker unless already included, so that the sort key is
+    unique. The sort fields must not be nullable.
+
+    Cursor values are opaque strings and must be parsed with `StringCursor`.
+    With `estimate_hits`, hit counts are the estimate of the query planner
+    instead of an exact count.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        order_by,
+        max_limit=MAX_LIMIT,
+        on_results=None,
+        post_query_filter=None,
+        estimate_hits=False,
+    ):
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        super().__init__(
+            queryset,
+            order_by=order_by[0],
+            max_limit=max_limit,
+            on_results=on_results,
+            post_query_filter=post_query_filter,
+        )
+        self.order_by = [
+            (field[1:], True) if field.startswith("-") else (field, False) for field in order_by
+        ]
+        if "id" not in (field for field, _ in self.order_by):
+            self.order_by.append(("id", self.desc))
+        self.estimate_hits = estimate_hits
+
+    def build_queryset(self, value, is_prev):
+        ordering = []
+        for field, desc in self.order_by:
+            asc = (desc and is_prev) or not (desc or is_prev)
+            ordering.append((field, asc))
+
+        queryset = self.queryset.order_by(
+            *(field if asc else f"-{field}" for field, asc in ordering)
+        )
+        if value is None:
+            return queryset
+
+        # Rows after the cursor are those sorting after it on the first field
+        # that differs, i.e. (a > x) OR (a = x AND b > y) OR ...
+        condition = Q()
+        for index, (field, asc) in enumerate(ordering):
+            clause = Q(**{f"{field}__{'gt' if asc else 'lt'}": value[index]})
+            for prev_index, (prev_field, _) in enumerate(ordering[:index]):
+                clause &= Q(**{prev_field: value[prev_index]})
+            condition |= clause
+
+        # The disjunction above is not a range the planner can use an index for,
+        # so the range of the leading field is added on its own as well.
+        field, asc = ordering[0]
+        condition &= Q(**{f"{field}__{'gte' if asc else 'lte'}": value[0]})
+        return queryset.filter(condition)
+
+    def get_item_key(self, item, for_prev=False):
+        return encode_keyset_cursor_value([getattr(item, field) for field, _ in self.order_by])
+
+    def value_from_cursor(self, cursor):
+        return decode_keyset_cursor_value(cursor.value, len(self.order_by))
+
+    def get_result(self, limit=100, cursor=None, count_hits=False, known_hits=None, max_hits=None):
+        if cursor is None:
+            cursor = StringCursor("", 0, 0)
+
+        limit = min(limit, self.max_limit)
+
+        cursor_value = self.value_from_cursor(cursor) if cursor.value else None
+        queryset = self.build_queryset(cursor_value, cursor.is_prev)
+
+        if max_hits is None:
+            max_hits = MAX_HITS_LIMIT
+        if count_hits:
+            hits = self.count_hits(max_hits)
+        elif known_hits is not None:
+            hits = known_hits
+        else:
+            hits = None
+
+        results = list(queryset[: limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        if cursor.is_prev:
+            results.reverse()
+            has_prev, has_next = has_more, cursor_value is not None
+        else:
+            has_prev, has_next = cursor_value is not None, has_more
+
+        # An empty page past either end has no row to continue from. Paging
+        # away from it without a value starts over from the opposite end,
+        # which is where the adjacent page is.
+        next_cursor = StringCursor(
+            self.get_item_key(results[-1]) if results else "", 0, False, has_next
+        )
+        prev_cursor = StringCursor(
+            self.get_item_key(results[0]) if results else "", 0, True, has_prev
+        )
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        cursor = CursorResult(
+            results=results,
+            next=next_cursor,
+            prev=prev_cursor,
+            hits=hits,
+            max_hits=max_hits if count_hits else None,
+        )
+
+        if self.post_query_filter:
+            cursor.results = self.post_query_filter(cursor.results)
+
+        return cursor
+
+    def count_hits(self, max_hits):
+        if self.estimate_hits:
+            return estimate_hits(self.queryset, max_hits)
+        return super().count_hits(max_hits)
+
+
 # TODO(dcramer): previous cursors are too complex at the moment for many things
 # and are only useful for polling situations. The OffsetPaginator ignores them
 # entirely and uses standard paging
@@ -687,6 +868,95 @@ class CombinedQuerysetPaginator:
         return CursorResult(results=results, next=next_cursor, prev=prev_cursor)
 
 
+class KeysetCombinedQuerysetPaginator(CombinedQuerysetPaginator):
+    """
+    A CombinedQuerysetPaginator paginating by the sort key of the rows instead
+    of by page number. Rows are ordered by the first order_by key of their
+    intermediary, then by model name and id, so only the first key of each
+    intermediary is taken into account.
+
+    Each page fetches at most `limit + 1` rows from every queryset and merges
+    them, rather than loading all querysets in full. Cursor values are opaque
+    strings and must be parsed with `StringCursor`.
+    """
+
+    def _sort_field(self, intermediary):
+        key = intermediary.order_by[0]
+        return f"{key}_lower" if self.case_insensitive else key
+
+    def _merge_key(self, item):
+        key = self.key_from_item(item)
+        if self.case_insensitive:
+            key = f"{key}_lower"
+        return (getattr(item, key), type(item).__name__, item.pk)
+
+    def _build_source_queryset(self, intermediary, value, asc):
+        field = self._sort_field(intermediary)
+        queryset = intermediary.queryset
+        if self.case_insensitive:
+            queryset = queryset.annotate(**{field: Lower(intermediary.order_by[0])})
+
+        direction = "" if asc else "-"
+        queryset = queryset.order_by(f"{direction}{field}", f"{direction}pk")
+        if value is None:
+            return queryset
+
+        sort_value, model_name, pk = value
+        lookup = "gt" if asc else "lt"
+        name = intermediary.instance_type.__name__
+        if name == model_name:
+            condition = Q(**{f"{field}__{lookup}": sort_value}) | Q(
+                **{field: sort_value, f"pk__{lookup}": pk}
+            )
+        elif (name > model_name) == asc:
+            # On equal sort values rows of this model come after the cursor row
+            condition = Q(**{f"{field}__{lookup}e": sort_value})
+        else:
+            condition = Q(**{f"{field}__{lookup}": sort_value})
+        return queryset.filter(condition)
+
+    def get_result(self, cursor=None, limit=100):
+        if cursor is None:
+            cursor = StringCursor("", 0, 0)
+
+        limit = min(limit, MAX_LIMIT)
+        cursor_value = decode_keyset_cursor_value(cursor.value, 3) if cursor.value else None
+        asc = self._is_asc(cursor.is_prev)
+
+        sources = [
+            list(self._build_source_queryset(intermediary, cursor_value, asc)[: limit + 1])
+            for intermediary in self.intermediaries
+        ]
+        merged = heapq.merge(*sources, key=self._merge_key, reverse=not asc)
+        results = list(itertools.islice(merged, limit + 1))
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        if cursor.is_prev:
+            results.reverse()
+            has_prev, has_next = has_more, cursor_value is not None
+        else:
+            has_prev, has_next = cursor_value is not None, has_more
+
+        next_cursor = StringCursor(
+            encode_keyset_cursor_value(self._merge_key(results[-1])) if results else "",
+            0,
+            False,
+            has_next,
+        )
+        prev_cursor = StringCursor(
+            encode_keyset_cursor_value(self._merge_key(results[0])) if results else "",
+            0,
+            True,
+            has_prev,
+        )
+
+        if self.on_results:
+            results = self.on_results(results)
+
+        return CursorResult(results=results, next=next_cursor, prev=prev_cursor)
+
+
 class ChainPaginator:
     """
     Chain multiple datasources together and paginate them as one source.
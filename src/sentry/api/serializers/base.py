@@ -1,7 +1,19 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Callable, Mapping, MutableMapping, Optional, Sequence, Type, TypeVar, Union
+import threading
+from typing import (
+    Any,
+    Callable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import sentry_sdk
 from django.contrib.auth.models import AnonymousUser
@@ -14,6 +26,9 @@ K = TypeVar("K")
 
 registry: MutableMapping[Any, Any] = {}
 
+# Stack of the nested serializations deferred by each `serialize` call in progress
+_deferred = threading.local()
+
 
 def register(type: Any) -> Callable[[Type[K]], Type[K]]:
     """A wrapper that adds the wrapped Serializer to the Serializer registry (see above) for the key `type`."""
@@ -53,29 +68,177 @@ def serialize(
         return serialize([objects], user=user, serializer=serializer, **kwargs)[0]
 
     if serializer is None:
-        # find the first object that is in the registry
-        for o in objects:
-            try:
-                serializer = registry[type(o)]
-                break
-            except KeyError:
-                pass
-        else:
+        serializer = _find_serializer(objects)
+        if serializer is None:
             return objects
     with sentry_sdk.start_span(op="serialize", description=type(serializer).__name__) as span:
         span.set_data("Object Count", len(objects))
 
         with sentry_sdk.start_span(op="serialize.get_attrs", description=type(serializer).__name__):
-            attrs = serializer.get_attrs(
-                # avoid passing NoneType's to the serializer as they're allowed and
-                # filtered out of serialize()
-                item_list=[o for o in objects if o is not None],
-                user=user,
-                **kwargs,
-            )
+            # Nested serializations can't be deferred from `get_attrs`, as its
+            # results are read before the batch is resolved.
+            _push_deferred_batches(None)
+            try:
+                attrs = serializer.get_attrs(
+                    # avoid passing NoneType's to the serializer as they're allowed and
+                    # filtered out of serialize()
+                    item_list=[o for o in objects if o is not None],
+                    user=user,
+                    **kwargs,
+                )
+            finally:
+                _pop_deferred_batches()
 
         with sentry_sdk.start_span(op="serialize.iterate", description=type(serializer).__name__):
-            return [serializer(o, attrs=attrs.get(o, {}), user=user, **kwargs) for o in objects]
+            batches: List[_DeferredBatch] = []
+            _push_deferred_batches(batches)
+            try:
+                results = [
+                    serializer(o, attrs=attrs.get(o, {}), user=user, **kwargs) for o in objects
+                ]
+            finally:
+                _pop_deferred_batches()
+
+        if batches:
+            with sentry_sdk.start_span(
+                op="serialize.deferred", description=type(serializer).__name__
+            ):
+                for batch in batches:
+                    batch.resolve()
+                results = [_fill_deferred(result) for result in results]
+        return results
+
+
+def defer_serialize(
+    objects: Union[Any, Sequence[Any]],
+    user: Optional[Any] = None,
+    serializer: Optional[Any] = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Serialize related objects from within `Serializer.serialize`.
+
+    Takes the same arguments as `serialize`, but rather than serializing the
+    objects of every item separately, they are collected across all the items of
+    the list being serialized and serialized together once the list is done. The
+    nested serializer's `get_attrs` then runs once for the whole list instead of
+    once per item. This applies again at every nesting level.
+
+    Calls with serializers of the same class and options, the same user and the
+    same kwargs are batched together. The returned value is a placeholder that
+    gets replaced with the serialized objects in the output, it must be returned
+    as part of the serialized item rather than inspected. Outside of `serialize`,
+    this is the same as `serialize`.
+    """
+    stack = getattr(_deferred, "stack", None)
+    batches = stack[-1] if stack else None
+    if batches is None or not objects:
+        return serialize(objects, user=user, serializer=serializer, **kwargs)
+
+    many = isinstance(objects, (list, tuple, set, frozenset))
+    object_list = list(objects) if many else [objects]
+    if serializer is None:
+        serializer = _find_serializer(object_list)
+        if serializer is None:
+            return objects
+
+    deferred = _DeferredSerialization(object_list, many)
+    for batch in batches:
+        if batch.accepts(serializer, user, kwargs):
+            batch.deferred.append(deferred)
+            break
+    else:
+        batches.append(_DeferredBatch(serializer, user, kwargs, [deferred]))
+    return deferred
+
+
+def _find_serializer(objects: Sequence[Any]) -> Optional[Any]:
+    # find the first object that is in the registry
+    for o in objects:
+        try:
+            return registry[type(o)]
+        except KeyError:
+            pass
+    return None
+
+
+class _DeferredSerialization:
+    __slots__ = ("objects", "many", "result")
+
+    def __init__(self, objects: List[Any], many: bool) -> None:
+        self.objects = objects
+        self.many = many
+        self.result: Any = None
+
+
+class _DeferredBatch:
+    def __init__(
+        self,
+        serializer: Any,
+        user: Optional[Any],
+        kwargs: Mapping[str, Any],
+        deferred: List[_DeferredSerialization],
+    ) -> None:
+        self.serializer = serializer
+        self.user = user
+        self.kwargs = kwargs
+        self.deferred = deferred
+
+    def accepts(self, serializer: Any, user: Optional[Any], kwargs: Mapping[str, Any]) -> bool:
+        # Serializers are often instantiated for every call, instances of the same
+        # class with the same options serialize alike and can share a batch.
+        return (
+            (
+                serializer is self.serializer
+                or (
+                    type(serializer) is type(self.serializer)
+                    and vars(serializer) == vars(self.serializer)
+                )
+            )
+            and user is self.user
+            and kwargs == self.kwargs
+        )
+
+    def resolve(self) -> None:
+        objects = [o for deferred in self.deferred for o in deferred.objects]
+        try:
+            results = serialize(objects, user=self.user, serializer=self.serializer, **self.kwargs)
+        except Exception:
+            # Same outcome as a nested serializer failing within `Serializer._serialize`
+            logger.exception("Failed to serialize", extra={"serializer": self.serializer})
+            results = [None] * len(objects)
+        offset = 0
+        for deferred in self.deferred:
+            count = len(deferred.objects)
+            if deferred.many:
+                deferred.result = results[offset : offset + count]
+            else:
+                deferred.result = results[offset]
+            offset += count
+
+
+def _push_deferred_batches(batches: Optional[List[_DeferredBatch]]) -> None:
+    if not hasattr(_deferred, "stack"):
+        _deferred.stack = []
+    _deferred.stack.append(batches)
+
+
+def _pop_deferred_batches() -> None:
+    _deferred.stack.pop()
+
+
+def _fill_deferred(value: Any) -> Any:
+    if isinstance(value, _DeferredSerialization):
+        return value.result
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = _fill_deferred(item)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            value[i] = _fill_deferred(item)
+    elif isinstance(value, tuple):
+        return tuple(_fill_deferred(item) for item in value)
+    return value
 
 
 class Serializer:
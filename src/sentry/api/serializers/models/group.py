@@ -26,7 +26,7 @@ from django.conf import settings
 from django.db.models import Min, prefetch_related_objects
 
 from sentry import features, tagstore
-from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers import Serializer, defer_serialize, register, serialize
 from sentry.api.serializers.models.actor import ActorSerializer
 from sentry.api.serializers.models.plugin import is_plugin_deprecated
 from sentry.api.serializers.models.user import UserSerializerResponse
@@ -362,7 +362,7 @@ class GroupSerializerBase(Serializer, ABC):
             "type": obj.get_event_type(),
             "metadata": obj.get_event_metadata(),
             "numComments": obj.num_comments,
-            "assignedTo": serialize(attrs["assigned_to"], user, ActorSerializer()),
+            "assignedTo": defer_serialize(attrs["assigned_to"], user, ActorSerializer()),
             "isBookmarked": attrs["is_bookmarked"],
             "isSubscribed": is_subscribed,
             "subscriptionDetails": subscription_details,
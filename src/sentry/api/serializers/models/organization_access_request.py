@@ -1,21 +1,25 @@
-from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers import Serializer, defer_serialize, register
 from sentry.models.organizationaccessrequest import OrganizationAccessRequest
 from sentry.services.hybrid_cloud.user.service import user_service
 
 
 @register(OrganizationAccessRequest)
 class OrganizationAccessRequestSerializer(Serializer):
-    def serialize(self, obj, attrs, user):
-        serialized_user = None
-        if obj.requester_id:
-            serialized_users = user_service.serialize_many(filter=dict(user_ids=[obj.requester_id]))
-            if serialized_users:
-                serialized_user = serialized_users[0]
+    def get_attrs(self, item_list, user):
+        requester_ids = {item.requester_id for item in item_list if item.requester_id}
+        serialized_users = {}
+        if requester_ids:
+            serialized_users = {
+                int(u["id"]): u
+                for u in user_service.serialize_many(filter=dict(user_ids=list(requester_ids)))
+            }
+        return {item: {"requester": serialized_users.get(item.requester_id)} for item in item_list}
 
+    def serialize(self, obj, attrs, user):
         d = {
             "id": str(obj.id),
-            "member": serialize(obj.member),
-            "team": serialize(obj.team),
-            "requester": serialized_user,
+            "member": defer_serialize(obj.member),
+            "team": defer_serialize(obj.team),
+            "requester": attrs["requester"],
         }
         return d
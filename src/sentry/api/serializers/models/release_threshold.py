@@ -1,4 +1,4 @@
-from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers import Serializer, defer_serialize, register
 from sentry.models.release_threshold.constants import (
     THRESHOLD_TYPE_INT_TO_STR,
     TRIGGER_TYPE_INT_TO_STR,
@@ -15,7 +15,7 @@ class ReleaseThresholdSerializer(Serializer):
             "trigger_type": TRIGGER_TYPE_INT_TO_STR[obj.trigger_type],
             "value": obj.value,
             "window_in_seconds": obj.window_in_seconds,
-            "project": serialize(obj.project),
-            "environment": serialize(obj.environment) if obj.environment else None,
+            "project": defer_serialize(obj.project),
+            "environment": defer_serialize(obj.environment) if obj.environment else None,
             "date_added": obj.date_added,
         }
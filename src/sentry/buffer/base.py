@@ -1,4 +1,7 @@
-from django.db.models import F
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.db.models import F, Model
+from django.db.models.signals import post_save
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
@@ -19,7 +22,7 @@ class Buffer(Service):
     keep up with the updates.
     """
 
-    __all__ = ("get", "incr", "process", "process_pending", "validate")
+    __all__ = ("get", "incr", "process", "process_batch", "process_pending", "validate")
 
     def get(self, model, columns, filters):
         """
@@ -93,3 +96,174 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, rows):
+        """
+        Apply many buffered increments for one model at once.
+
+        ``rows`` is a list of ``(columns, filters, extra, signal_only)`` tuples as
+        they would be passed to `process`. Rows are grouped by the database row
+        their filters point at and folded together: counters are summed and
+        extra values are applied in order, so the last write wins like it does
+        for consecutive `process` calls. Folded rows are written with a single
+        ``UPDATE ... FROM (VALUES ...)`` statement per set of filter, counter and
+        extra columns.
+
+        Rows whose target doesn't exist yet are handed to `process`, so they are
+        still created through ``create_or_update`` and signalled as created.
+        Targets with a row that can't be expressed as plain values (signal_only,
+        expressions, model instances, lookups across relations) go through
+        `process` one row at a time as well.
+        """
+        connection = connections[router.db_for_write(model)]
+
+        targets = {}
+        for row in rows:
+            targets.setdefault(self._get_batch_target(model, row[1]), []).append(row)
+
+        batched = {}
+        for target, target_rows in targets.items():
+            if target is None or not all(
+                self._is_batchable(model, connection, columns, extra, signal_only)
+                for columns, _, extra, signal_only in target_rows
+            ):
+                for row in target_rows:
+                    self.process(model, *row)
+                continue
+
+            totals = {}
+            values = {}
+            for columns, _, extra, _ in target_rows:
+                for name, amount in columns.items():
+                    totals[name] = totals.get(name, 0) + amount
+                values.update(extra or {})
+
+            filter_columns = tuple(column for column, _ in target)
+            key = (filter_columns, tuple(sorted(totals)), tuple(sorted(values)))
+            batched.setdefault(key, []).append((target, totals, values, target_rows))
+
+        for (filter_columns, column_names, extra_names), batch in batched.items():
+            updated = self._update_rows(
+                model, connection, filter_columns, column_names, extra_names, batch
+            )
+
+            for target, _, _, target_rows in batch:
+                if target not in updated:
+                    for row in target_rows:
+                        self.process(model, *row)
+                    continue
+
+                for columns, filters, extra, _ in target_rows:
+                    buffer_incr_complete.send_robust(
+                        model=model,
+                        columns=columns,
+                        filters=filters,
+                        extra=extra,
+                        created=False,
+                        sender=model,
+                    )
+
+    def _get_batch_target(self, model, filters):
+        """
+        Returns the filters as a sorted tuple of ``(db_column, value)`` pairs, or
+        ``None`` if they can't be matched against a plain VALUES list.
+        """
+        meta = model._meta
+        target = []
+        for name, value in filters.items():
+            try:
+                field = meta.pk if name == "pk" else meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not getattr(field, "concrete", False) or not isinstance(value, (int, str)):
+                return None
+            # Compare against what the database hands back from `RETURNING`.
+            target.append((field.column, field.to_python(value)))
+        return tuple(sorted(target))
+
+    def _is_batchable(self, model, connection, columns, extra, signal_only):
+        if signal_only or not columns:
+            return False
+        meta = model._meta
+        for name, value in (extra or {}).items():
+            if name in columns or isinstance(value, Model) or hasattr(value, "resolve_expression"):
+                return False
+            try:
+                field = meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+            if not getattr(field, "concrete", False) or field.db_type(connection) is None:
+                return False
+        return True
+
+    def _update_rows(self, model, connection, filter_columns, column_names, extra_names, batch):
+        """
+        Writes folded rows with one UPDATE and returns the targets it matched.
+        """
+        from sentry.models.group import Group
+
+        meta = model._meta
+        qn = connection.ops.quote_name
+        table = qn(meta.db_table)
+        counter_fields = [meta.get_field(name) for name in column_names]
+        extra_fields = [meta.get_field(name) for name in extra_names]
+
+        # The VALUES list gets positional names, filter and extra columns may
+        # share a name.
+        filter_aliases = [f"f{i}" for i in range(len(filter_columns))]
+        counter_aliases = [f"c{i}" for i in range(len(counter_fields))]
+        extra_aliases = [f"e{i}" for i in range(len(extra_fields))]
+
+        assignments = [
+            f"{qn(field.column)} = COALESCE({table}.{qn(field.column)}, 0) + v.{alias}"
+            for field, alias in zip(counter_fields, counter_aliases)
+        ]
+        # Untyped parameters in VALUES resolve to text, cast them back.
+        assignments += [
+            f"{qn(field.column)} = CAST(v.{alias} AS {field.db_type(connection)})"
+            for field, alias in zip(extra_fields, extra_aliases)
+        ]
+        # Same as the `ScoreClause` that `process` adds for groups.
+        if model is Group and "times_seen" in column_names and "last_seen" in extra_names:
+            times_seen = counter_aliases[column_names.index("times_seen")]
+            last_seen = extra_aliases[extra_names.index("last_seen")]
+            assignments.append(
+                f"{qn('score')} = log({table}.{qn('times_seen')} + v.{times_seen}) * 600 "
+                f"+ FLOOR(EXTRACT(EPOCH FROM CAST(v.{last_seen} AS timestamp with time zone)))"
+            )
+
+        params = []
+        for target, totals, values, _ in batch:
+            params.extend(value for _, value in target)
+            params.extend(totals[name] for name in column_names)
+            params.extend(
+                field.get_db_prep_save(values[name], connection)
+                for name, field in zip(extra_names, extra_fields)
+            )
+
+        aliases = [*filter_aliases, *counter_aliases, *extra_aliases]
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * len(aliases)) + ")"] * len(batch))
+        conditions = " AND ".join(
+            f"{table}.{qn(column)} = v.{alias}"
+            for column, alias in zip(filter_columns, filter_aliases)
+        )
+        returning = ", ".join(
+            f"{table}.{qn(column)}" for column in (meta.pk.column, *filter_columns)
+        )
+
+        sql = (
+            f"UPDATE {table} SET {', '.join(assignments)} "
+            f"FROM (VALUES {placeholders}) AS v({', '.join(aliases)}) "
+            f"WHERE {conditions} RETURNING {returning}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            returned = cursor.fetchall()
+
+        # `Group.update` fires `post_save`, which keeps the cached group in sync
+        # and is relied on by issue alerts. Send it for the fresh rows.
+        if model is Group and returned:
+            for group in Group.objects.filter(id__in=[row[0] for row in returned]):
+                post_save.send(sender=Group, instance=group, created=False)
+
+        return {tuple(zip(filter_columns, row[1:])) for row in returned}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import pickle
 import threading
@@ -69,18 +70,85 @@ class PendingBuffer:
         return rv
 
 
+class CoalescedIncr:
+    """
+    An in-process accumulation of `incr` calls for a single buffer key.
+    """
+
+    __slots__ = ("model", "filters", "columns", "extra", "signal_only", "count")
+
+    def __init__(self, model, filters):
+        self.model = model
+        self.filters = filters
+        self.columns = {}
+        self.extra = {}
+        self.signal_only = None
+        self.count = 0
+
+    def merge(self, columns, extra=None, signal_only=None):
+        for column, amount in columns.items():
+            self.columns[column] = self.columns.get(column, 0) + amount
+        if extra:
+            # last write wins, same as the `hset` done against Redis
+            self.extra.update(extra)
+        if signal_only is True:
+            # like the "s" hash field, once set this sticks until flushed
+            self.signal_only = True
+        self.count += 1
+
+    def merge_entry(self, other):
+        self.merge(other.columns, other.extra, other.signal_only)
+        # `merge` accounted for a single `incr` only
+        self.count += other.count - 1
+
+
 class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        incr_coalesce_size=0,
+        incr_coalesce_interval=1.0,
+        pending_chunk_size=0,
+        **options,
+    ):
+        """
+        `incr_coalesce_size` enables merging of `incr` calls within the current
+        process: increments for the same (model, filters) are accumulated
+        locally and written to Redis as a single pipeline once either
+        `incr_coalesce_size` distinct keys are pending or
+        `incr_coalesce_interval` seconds have passed since the oldest pending
+        increment. The interval is enforced by a timer as well, so increments
+        don't linger in memory once traffic stops. A size of 0 (the default)
+        disables coalescing.
+
+        `pending_chunk_size` switches `process_pending` to draining each
+        pending set incrementally, `pending_chunk_size` keys at a time, instead
+        of loading and removing the whole set at once.
+        """
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_BUFFER_OPTIONS", options
         )
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.incr_coalesce_size = incr_coalesce_size
+        self.incr_coalesce_interval = incr_coalesce_interval
+        self.pending_chunk_size = pending_chunk_size
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
+        assert self.incr_coalesce_size >= 0
+        assert self.incr_coalesce_interval >= 0
+        assert self.pending_chunk_size >= 0
+
+        self._coalesced: dict[str, CoalescedIncr] = {}
+        self._coalesced_since: float | None = None
+        self._coalesced_timer: threading.Timer | None = None
+        self._coalesced_lock = threading.Lock()
+        if self.incr_coalesce_size > 0:
+            atexit.register(self.flush_coalesced)
 
     def get_routing_client(self):
         if self.is_redis_cluster:
@@ -192,8 +260,15 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
+        # Increments that are still coalescing in this process have not made it
+        # to Redis yet, but are visible to the caller all the same.
+        with self._coalesced_lock:
+            entry = self._coalesced.get(key)
+            local = dict(entry.columns) if entry is not None else {}
+
         return {
-            col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
+            col: (int(results[i]) if results[i] is not None else 0) + local.get(col, 0)
+            for i, col in enumerate(columns)
         }
 
     def incr(self, model, columns, filters, extra=None, signal_only=None, return_incr_results=True):
@@ -205,10 +280,134 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        When coalescing is enabled the increment is merged into a local
+        accumulator first and only written out by `flush_coalesced`.
         """
 
         key = self._make_key(model, filters)
-        pending_key = self._make_pending_key_from_key(key)
+
+        if self.incr_coalesce_size > 0:
+            self._coalesce_incr(key, model, columns, filters, extra, signal_only)
+        else:
+            self._incr(key, model, columns, filters, extra, signal_only)
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _coalesce_incr(self, key, model, columns, filters, extra, signal_only):
+        now = time()
+        with self._coalesced_lock:
+            entry = self._coalesced.get(key)
+            if entry is None:
+                entry = self._coalesced[key] = CoalescedIncr(model, filters)
+            entry.merge(columns, extra, signal_only)
+            if self._coalesced_since is None:
+                self._coalesced_since = now
+                self._schedule_coalesced_flush()
+
+            should_flush = (
+                len(self._coalesced) >= self.incr_coalesce_size
+                or now - self._coalesced_since >= self.incr_coalesce_interval
+            )
+
+        if should_flush:
+            self.flush_coalesced()
+
+    def _schedule_coalesced_flush(self):
+        # Must be called with `_coalesced_lock` held. Without it nothing would
+        # notice the interval passing when no further `incr` comes in.
+        if self._coalesced_timer is not None or self.incr_coalesce_interval <= 0:
+            return
+        timer = threading.Timer(self.incr_coalesce_interval, self._flush_coalesced_safe)
+        timer.daemon = True
+        timer.start()
+        self._coalesced_timer = timer
+
+    def _flush_coalesced_safe(self):
+        try:
+            self.flush_coalesced()
+        except Exception:
+            logger.exception("buffer.coalesce.flush-failed")
+
+    def flush_coalesced(self):
+        """
+        Write all increments coalesced in this process out to Redis with a
+        single pipeline (one per host when sharded with rb). Entries that
+        could not be written are merged back and retried on the next flush.
+        """
+        with self._coalesced_lock:
+            entries = self._coalesced
+            timer = self._coalesced_timer
+            self._coalesced = {}
+            self._coalesced_since = None
+            self._coalesced_timer = None
+        if timer is not None:
+            timer.cancel()
+        if not entries:
+            return
+
+        try:
+            self._write_coalesced(entries)
+        except Exception:
+            self._restore_coalesced(entries)
+            metrics.incr("buffer.coalesce.failed", skip_internal=True)
+            raise
+
+        merged = sum(entry.count for entry in entries.values())
+        metrics.incr("buffer.coalesce.incrs", amount=merged, skip_internal=True)
+        metrics.incr("buffer.coalesce.flushed", amount=len(entries), skip_internal=True)
+        metrics.timing("buffer.coalesce.ratio", merged / len(entries))
+
+    def _write_coalesced(self, entries):
+        """
+        Queue all `entries` on one pipeline per connection and execute them.
+        Written entries are removed from `entries`, whatever is left over when
+        this raises has not made it to Redis.
+        """
+        pipes = {}
+        keys_by_host = {}
+        for key, entry in entries.items():
+            if self.is_redis_cluster:
+                host = None
+            else:
+                host = self.cluster.get_router().get_host_for_key(key)
+            if host not in pipes:
+                conn = self.cluster if host is None else self.cluster.get_local_client(host)
+                pipes[host] = conn.pipeline()
+            self._queue_incr(
+                pipes[host],
+                key,
+                entry.model,
+                entry.columns,
+                entry.filters,
+                entry.extra or None,
+                entry.signal_only,
+            )
+            keys_by_host.setdefault(host, []).append(key)
+
+        for host, pipe in pipes.items():
+            pipe.execute()
+            for key in keys_by_host[host]:
+                del entries[key]
+
+    def _restore_coalesced(self, entries):
+        with self._coalesced_lock:
+            for key, entry in entries.items():
+                # Anything coalesced in the meantime was written after `entry`,
+                # so it is merged on top to keep extra values last write wins.
+                newer = self._coalesced.get(key)
+                if newer is not None:
+                    entry.merge_entry(newer)
+                self._coalesced[key] = entry
+            if self._coalesced_since is None:
+                self._coalesced_since = time()
+            self._schedule_coalesced_flush()
+
+    def _incr(self, key, model, columns, filters, extra=None, signal_only=None):
         # We can't use conn.map() due to wanting to support multiple pending
         # keys (one per Redis partition)
         if self.is_redis_cluster:
@@ -217,6 +416,11 @@ class RedisBuffer(Buffer):
             conn = self.cluster.get_local_client_for_key(key)
 
         pipe = conn.pipeline()
+        self._queue_incr(pipe, key, model, columns, filters, extra, signal_only)
+        pipe.execute()
+
+    def _queue_incr(self, pipe, key, model, columns, filters, extra=None, signal_only=None):
+        pending_key = self._make_pending_key_from_key(key)
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
         _validate_json_roundtrip(filters, model)
 
@@ -244,15 +448,13 @@ class RedisBuffer(Buffer):
 
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
-
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
 
     def process_pending(self, partition=None):
+        # Periodic work is also a good moment to write out whatever this
+        # process still holds locally.
+        if self.incr_coalesce_size > 0:
+            self._flush_coalesced_safe()
+
         if partition is None and self.pending_partitions > 1:
             # If we're using partitions, this one task fans out into
             # N subtasks instead.
@@ -272,6 +474,13 @@ class RedisBuffer(Buffer):
         if not client.set(lock_key, "1", nx=True, ex=60):
             return
 
+        if self.pending_chunk_size > 0:
+            try:
+                self._process_pending_chunked(pending_key, client, lock_key)
+            finally:
+                client.delete(lock_key)
+            return
+
         pending_buffer = PendingBuffer(self.incr_batch_size)
 
         try:
@@ -311,19 +520,113 @@ class RedisBuffer(Buffer):
         finally:
             client.delete(lock_key)
 
+    def _process_pending_chunked(self, pending_key, client, lock_key):
+        """
+        Drain `pending_key` in chunks of `pending_chunk_size` keys, oldest
+        first, removing only the keys that were dispatched. Keys that are
+        (re-)added after the drain started are left for the next run so a busy
+        buffer can't keep a single drain going forever.
+        """
+        if self.is_redis_cluster:
+            conns = [self.cluster]
+        else:
+            conns = [self.cluster.get_local_client(host_id) for host_id in self.cluster.hosts]
+
+        started = time()
+        pending_buffer = PendingBuffer(self.incr_batch_size)
+        keycount = 0
+        oldest = None
+
+        for conn in conns:
+            while True:
+                chunk = conn.zrangebyscore(
+                    pending_key,
+                    "-inf",
+                    started,
+                    start=0,
+                    num=self.pending_chunk_size,
+                    withscores=True,
+                )
+                if not chunk:
+                    break
+
+                if oldest is None or chunk[0][1] < oldest:
+                    oldest = chunk[0][1]
+
+                keys = [key for key, _ in chunk]
+                for key in keys:
+                    pending_buffer.append(force_str(key))
+                    if pending_buffer.full():
+                        process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+
+                conn.zrem(pending_key, *keys)
+                keycount += len(keys)
+                # keep holding the partition for as long as we make progress
+                client.expire(lock_key, 60)
+
+                if len(chunk) < self.pending_chunk_size:
+                    break
+
+        if not pending_buffer.empty():
+            process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+
+        duration = time() - started
+        metrics.timing("buffer.pending-size", keycount)
+        if oldest is not None:
+            metrics.timing("buffer.pending-age", started - oldest)
+        if duration > 0:
+            metrics.timing("buffer.pending-drain-rate", keycount / duration)
+
     def process(self, key=None, batch_keys=None):
         assert not (key is None and batch_keys is None)
         assert not (key is not None and batch_keys is not None)
 
         if key is not None:
-            batch_keys = [key]
-
-        for key in batch_keys:
             self._process_single_incr(key)
+        else:
+            self._process_batch_incr(batch_keys)
 
     def _process(self, model, columns, filters, extra=None, signal_only=None):
         return super().process(model, columns, filters, extra, signal_only)
 
+    def _process_batch(self, model, rows):
+        return super().process_batch(model, rows)
+
+    def _load_hash(self, values):
+        """
+        Decode a buffer hash as stored by `incr` into
+        ``(model, columns, filters, extra, signal_only)``.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_str(k): v for k, v in values.items()}
+
+        model = import_string(force_str(values.pop("m")))
+
+        if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
+            filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(force_bytes(values.pop("f")))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"[" if not self.is_redis_cluster else "["):
+                    extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(force_bytes(v))
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
     def _process_single_incr(self, key):
         if self.is_redis_cluster:
             client = self.cluster
@@ -352,39 +655,81 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_str(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            model = import_string(force_str(values.pop("m")))
+            self._process(*self._load_hash(values))
+        finally:
+            client.delete(lock_key)
+
+    def _process_batch_incr(self, batch_keys):
+        """
+        Like `_process_single_incr`, but locks and reads all keys of the batch
+        in one round of pipelined commands and hands the decoded rows to
+        `Buffer.process_batch`, grouped by model.
+        """
+        if self.is_redis_cluster:
+            with self.cluster.pipeline(transaction=False) as pipe:
+                for key in batch_keys:
+                    pipe.set(self._make_lock_key(key), "1", nx=True, ex=10)
+                locked = pipe.execute()
+        else:
+            with self.cluster.map() as conn:
+                promises = [
+                    conn.set(self._make_lock_key(key), "1", nx=True, ex=10) for key in batch_keys
+                ]
+            locked = [p.value for p in promises]
+
+        keys = []
+        for key, acquired in zip(batch_keys, locked):
+            if acquired:
+                keys.append(key)
+            else:
+                # prevent a stampede due to the way we use celery etas +
+                # duplicate tasks
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not keys:
+            return
 
-            if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
-                filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        try:
+            if self.is_redis_cluster:
+                with self.cluster.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.hgetall(key)
+                        pipe.zrem(self._make_pending_key_from_key(key), key)
+                        pipe.delete(key)
+                    results = pipe.execute()[::3]
             else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(force_bytes(values.pop("f")))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"[" if not self.is_redis_cluster else "["):
-                        extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(force_bytes(v))
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+                with self.cluster.map() as conn:
+                    promises = []
+                    for key in keys:
+                        promises.append(conn.hgetall(key))
+                        conn.zrem(self._make_pending_key_from_key(key), key)
+                        conn.delete(key)
+                results = [p.value for p in promises]
+
+            rows_by_model = {}
+            for key, values in zip(keys, results):
+                if not values:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+                model, *row = self._load_hash(values)
+                rows_by_model.setdefault(model, []).append(tuple(row))
+
+            for model, rows in rows_by_model.items():
+                self._process_batch(model, rows)
         finally:
-            client.delete(lock_key)
+            if self.is_redis_cluster:
+                with self.cluster.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.delete(self._make_lock_key(key))
+                    pipe.execute()
+            else:
+                with self.cluster.map() as conn:
+                    for key in keys:
+                        conn.delete(self._make_lock_key(key))
@@ -61,6 +61,36 @@ def ingest_replay_recordings_options() -> List[click.Option]:
     return options
 
 
+def ingest_events_options() -> List[click.Option]:
+    """Return a list of ingest-events and ingest-transactions options."""
+    options = multiprocessing_options(default_max_batch_size=100)
+    options.append(
+        click.Option(
+            ["--batched", "batched"],
+            is_flag=True,
+            default=False,
+            help="Process events in batches of --max-batch-size, grouped by project.",
+        )
+    )
+    return options
+
+
+def query_subscription_options(
+    default_max_batch_size: Optional[int] = None,
+) -> List[click.Option]:
+    """Return a list of options for the *-subscription-results consumers."""
+    options = multiprocessing_options(default_max_batch_size=default_max_batch_size)
+    options.append(
+        click.Option(
+            ["--batched", "batched"],
+            is_flag=True,
+            default=False,
+            help="Handle subscription updates in batches of --max-batch-size.",
+        )
+    )
+    return options
+
+
 _METRICS_INDEXER_OPTIONS = [
     click.Option(["--input-block-size"], type=int, default=DEFAULT_BLOCK_SIZE),
     click.Option(["--output-block-size"], type=int, default=DEFAULT_BLOCK_SIZE),
@@ -76,6 +106,12 @@ _METRICS_INDEXER_OPTIONS = [
         default=1,
         type=int,
     ),
+    click.Option(
+        ["--shared-memory-transport", "shared_memory_transport"],
+        is_flag=True,
+        default=False,
+        help="Pass message batches to and from the indexer processes as packed buffers.",
+    ),
 ]
 
 _METRICS_LAST_SEEN_UPDATER_OPTIONS = [
@@ -93,6 +129,12 @@ _METRICS_LAST_SEEN_UPDATER_OPTIONS = [
         help="Maximum time (in milliseconds) to wait before flushing a batch.",
     ),
     click.Option(["--indexer-db"], default="postgres"),
+    click.Option(
+        ["flush_interval_ms", "--flush-interval-ms"],
+        default=10000,
+        type=int,
+        help="Time (in milliseconds) between updates of the last_seen of stale ids.",
+    ),
 ]
 
 _POST_PROCESS_FORWARDER_OPTIONS = [
@@ -143,7 +185,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "events-subscription-results": {
         "topic": settings.KAFKA_EVENTS_SUBSCRIPTIONS_RESULTS,
         "strategy_factory": "sentry.snuba.query_subscriptions.run.QuerySubscriptionStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": query_subscription_options(default_max_batch_size=100),
         "static_args": {
             "topic": settings.KAFKA_EVENTS_SUBSCRIPTIONS_RESULTS,
         },
@@ -151,7 +193,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "transactions-subscription-results": {
         "topic": settings.KAFKA_TRANSACTIONS_SUBSCRIPTIONS_RESULTS,
         "strategy_factory": "sentry.snuba.query_subscriptions.run.QuerySubscriptionStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": query_subscription_options(default_max_batch_size=100),
         "static_args": {
             "topic": settings.KAFKA_TRANSACTIONS_SUBSCRIPTIONS_RESULTS,
         },
@@ -160,7 +202,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
         "topic": settings.KAFKA_GENERIC_METRICS_SUBSCRIPTIONS_RESULTS,
         "default_topic": "generic-metrics-subscription-results",
         "strategy_factory": "sentry.snuba.query_subscriptions.run.QuerySubscriptionStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": query_subscription_options(default_max_batch_size=100),
         "static_args": {
             "topic": settings.KAFKA_GENERIC_METRICS_SUBSCRIPTIONS_RESULTS,
         },
@@ -168,7 +210,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "sessions-subscription-results": {
         "topic": settings.KAFKA_SESSIONS_SUBSCRIPTIONS_RESULTS,
         "strategy_factory": "sentry.snuba.query_subscriptions.run.QuerySubscriptionStrategyFactory",
-        "click_options": multiprocessing_options(),
+        "click_options": query_subscription_options(),
         "static_args": {
             "topic": settings.KAFKA_SESSIONS_SUBSCRIPTIONS_RESULTS,
         },
@@ -176,7 +218,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "metrics-subscription-results": {
         "topic": settings.KAFKA_METRICS_SUBSCRIPTIONS_RESULTS,
         "strategy_factory": "sentry.snuba.query_subscriptions.run.QuerySubscriptionStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": query_subscription_options(default_max_batch_size=100),
         "static_args": {
             "topic": settings.KAFKA_METRICS_SUBSCRIPTIONS_RESULTS,
         },
@@ -184,7 +226,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-events": {
         "topic": settings.KAFKA_INGEST_EVENTS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "events",
         },
@@ -200,7 +242,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-transactions": {
         "topic": settings.KAFKA_INGEST_TRANSACTIONS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "transactions",
         },
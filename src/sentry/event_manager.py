@@ -7,6 +7,7 @@ import random
 import re
 import time
 import uuid
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from io import BytesIO
@@ -71,6 +72,7 @@ from sentry.grouping.api import (
     load_grouping_config,
 )
 from sentry.grouping.result import CalculatedHashes
+from sentry.grouping.strategies.base import memoize_grouping_components
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.issues.grouptype import GroupCategory
 from sentry.issues.issue_occurrence import IssueOccurrence
@@ -497,62 +499,67 @@ class EventManager:
         _derive_plugin_tags_many(jobs, projects)
         _derive_interface_tags_many(jobs)
 
-        do_background_grouping_before = options.get("store.background-grouping-before")
-        if do_background_grouping_before:
-            _run_background_grouping(project, job)
-
-        secondary_hashes = None
-        migrate_off_hierarchical = False
-
-        if _check_to_run_secondary_grouping(project):
-            with metrics.timer("event_manager.secondary_grouping", tags=metric_tags):
-                secondary_hashes = calculate_secondary_hash_if_needed(project, job)
-
-        with metrics.timer("event_manager.load_grouping_config"):
-            # At this point we want to normalize the in_app values in case the
-            # clients did not set this appropriately so far.
-            if is_reprocessed:
-                # The customer might have changed grouping enhancements since
-                # the event was ingested -> make sure we get the fresh one for reprocessing.
-                grouping_config = get_grouping_config_dict_for_project(project)
-                # Write back grouping config because it might have changed since the
-                # event was ingested.
-                # NOTE: We could do this unconditionally (regardless of `is_processed`).
-                job["data"]["grouping_config"] = grouping_config
-            else:
-                grouping_config = get_grouping_config_dict_for_event_data(
-                    job["event"].data.data, project
-                )
+        # Components shared between the background, secondary and primary
+        # grouping configs are only computed once.
+        memoize_components = options.get("store.grouping-memoize-components")
+        with memoize_grouping_components() if memoize_components else nullcontext():
+            do_background_grouping_before = options.get("store.background-grouping-before")
+            if do_background_grouping_before:
+                _run_background_grouping(project, job)
+
+            secondary_hashes = None
+            migrate_off_hierarchical = False
+
+            if _check_to_run_secondary_grouping(project):
+                with metrics.timer("event_manager.secondary_grouping", tags=metric_tags):
+                    secondary_hashes = calculate_secondary_hash_if_needed(project, job)
+
+            with metrics.timer("event_manager.load_grouping_config"):
+                # At this point we want to normalize the in_app values in case the
+                # clients did not set this appropriately so far.
+                if is_reprocessed:
+                    # The customer might have changed grouping enhancements since
+                    # the event was ingested -> make sure we get the fresh one for reprocessing.
+                    grouping_config = get_grouping_config_dict_for_project(project)
+                    # Write back grouping config because it might have changed since the
+                    # event was ingested.
+                    # NOTE: We could do this unconditionally (regardless of `is_processed`).
+                    job["data"]["grouping_config"] = grouping_config
+                else:
+                    grouping_config = get_grouping_config_dict_for_event_data(
+                        job["event"].data.data, project
+                    )
 
-        with sentry_sdk.start_span(
-            op="event_manager",
-            description="event_manager.save.calculate_event_grouping",
-        ), metrics.timer("event_manager.calculate_event_grouping", tags=metric_tags):
-            hashes = _calculate_event_grouping(project, job["event"], grouping_config)
-
-        # Because this logic is not complex enough we want to special case the situation where we
-        # migrate from a hierarchical hash to a non hierarchical hash.  The reason being that
-        # `_save_aggregate` needs special logic to not create orphaned hashes in migration cases
-        # but it wants a different logic to implement splitting of hierarchical hashes.
-        migrate_off_hierarchical = bool(
-            secondary_hashes
-            and secondary_hashes.hierarchical_hashes
-            and not hashes.hierarchical_hashes
-        )
+            with sentry_sdk.start_span(
+                op="event_manager",
+                description="event_manager.save.calculate_event_grouping",
+            ), metrics.timer("event_manager.calculate_event_grouping", tags=metric_tags):
+                hashes = _calculate_event_grouping(project, job["event"], grouping_config)
+
+            # Because this logic is not complex enough we want to special case the situation where we
+            # migrate from a hierarchical hash to a non hierarchical hash.  The reason being that
+            # `_save_aggregate` needs special logic to not create orphaned hashes in migration cases
+            # but it wants a different logic to implement splitting of hierarchical hashes.
+            migrate_off_hierarchical = bool(
+                secondary_hashes
+                and secondary_hashes.hierarchical_hashes
+                and not hashes.hierarchical_hashes
+            )
 
-        hashes = CalculatedHashes(
-            hashes=list(hashes.hashes) + list(secondary_hashes and secondary_hashes.hashes or []),
-            hierarchical_hashes=(
-                list(hashes.hierarchical_hashes)
-                + list(secondary_hashes and secondary_hashes.hierarchical_hashes or [])
-            ),
-            tree_labels=(
-                hashes.tree_labels or (secondary_hashes and secondary_hashes.tree_labels) or []
-            ),
-        )
+            hashes = CalculatedHashes(
+                hashes=list(hashes.hashes)
+                + list(secondary_hashes and secondary_hashes.hashes or []),
+                hierarchical_hashes=(
+                    list(hashes.hierarchical_hashes)
+                    + list(secondary_hashes and secondary_hashes.hierarchical_hashes or [])
+                ),
+                tree_labels=(
+                    hashes.tree_labels or (secondary_hashes and secondary_hashes.tree_labels) or []
+                ),
+            )
 
-        if not do_background_grouping_before:
-            _run_background_grouping(project, job)
+            if not do_background_grouping_before:
+                _run_background_grouping(project, job)
 
         if hashes.tree_labels:
             job["finest_tree_label"] = hashes.finest_tree_label
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Any, Optional
+from typing import Any, List, Optional, Sequence
 
 import sentry_sdk
 
@@ -41,6 +41,16 @@ class EventProcessingStore(Service):
             self.inner.set(key, event, self.timeout)
             return key
 
+    def store_many(self, events: Sequence[Event]) -> List[str]:
+        """
+        Stores multiple events in one batched write and returns their keys, in
+        the order of the events.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.store_many"):
+            keys = [cache_key_for_event(event) for event in events]
+            self.inner.set_many(list(zip(keys, events)), self.timeout)
+            return keys
+
     def get(self, key: str, unprocessed: bool = False) -> Optional[Event]:
         with sentry_sdk.start_span(op="eventstore.processing.get"):
             if unprocessed:
@@ -141,6 +141,18 @@ class GroupingComponent:
         rv.values = list(self.values)
         return rv
 
+    def deep_copy(self):
+        """Creates a copy of the whole component tree."""
+        rv = object.__new__(self.__class__)
+        rv.__dict__.update(self.__dict__)
+        if isinstance(self.tree_label, dict):
+            rv.tree_label = dict(self.tree_label)
+        rv.values = [
+            value.deep_copy() if isinstance(value, GroupingComponent) else value
+            for value in self.values
+        ]
+        return rv
+
     def iter_values(self):
         """Recursively walks the component and flattens it into a list of
         values.
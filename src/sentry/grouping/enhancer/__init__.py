@@ -29,7 +29,9 @@ from .matchers import (
     CallerMatch,
     ExceptionFieldMatch,
     FrameMatch,
+    FunctionMatch,
     Match,
+    ModuleMatch,
     create_match_frame,
 )
 
@@ -163,9 +165,10 @@ class Enhancements:
                 return
 
         with sentry_sdk.start_span(op="stacktrace_processing", description="apply_rules_to_frames"):
+            candidates_cache: dict[tuple[str, bytes], list[int]] = {}
             for rule in self._modifier_rules:
                 for idx, action in rule.get_matching_frame_actions(
-                    match_frames, platform, exception_data, in_memory_cache
+                    match_frames, platform, exception_data, in_memory_cache, candidates_cache
                 ):
                     # Both frames and match_frames are updated
                     action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
@@ -179,11 +182,12 @@ class Enhancements:
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
         stacktrace_state = StacktraceState()
+        candidates_cache: dict[tuple[str, bytes], list[int]] = {}
         # Apply direct frame actions and update the stack state alongside
         for rule in self._updater_rules:
 
             for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, in_memory_cache
+                match_frames, platform, exception_data, in_memory_cache, candidates_cache
             ):
                 action.update_frame_components_contributions(components, frames, idx, rule=rule)
                 action.modify_stacktrace_state(stacktrace_state, rule)
@@ -329,6 +333,7 @@ class Rule:
         self.actions = actions
         self._is_updater = any(action.is_updater for action in actions)
         self._is_modifier = any(action.is_modifier for action in actions)
+        self._prefilter = _get_prefilter(self._other_matchers)
 
     @property
     def matcher_description(self):
@@ -363,9 +368,14 @@ class Rule:
         platform: str,
         exception_data: dict[str, Any],
         in_memory_cache: dict[str, str],
+        candidates_cache: dict[tuple[str, bytes], list[int]] | None = None,
     ) -> list[tuple[int, Action]]:
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        `candidates_cache` is shared between all rules applied to the same
+        frames, so that rules with the same prefilter (see `_get_prefilter`)
+        only scan the frames once.
         """
         if not self.matchers:
             return []
@@ -378,7 +388,18 @@ class Rule:
         rv = []
 
         # 2 - Check if frame matchers match
-        for idx, _ in enumerate(match_frames):
+        if self._prefilter is None:
+            candidates: Sequence[int] = range(len(match_frames))
+        elif candidates_cache is None:
+            candidates = _get_prefilter_candidates(match_frames, *self._prefilter)
+        else:
+            candidates = candidates_cache.get(self._prefilter)
+            if candidates is None:
+                candidates = candidates_cache[self._prefilter] = _get_prefilter_candidates(
+                    match_frames, *self._prefilter
+                )
+
+        for idx in candidates:
             if all(
                 m.matches_frame(match_frames, idx, platform, exception_data, in_memory_cache)
                 for m in self._other_matchers
@@ -402,6 +423,37 @@ class Rule:
         )
 
 
+def _get_prefilter(matchers: Sequence[Match]) -> tuple[str, bytes] | None:
+    """
+    Pick a ``(field, literal prefix)`` that every frame matched by ``matchers``
+    must start with, so that frames can be discarded with a cheap prefix check
+    before running the actual matchers.
+
+    Only fields that rule actions never change are considered, which makes
+    it safe to compute the candidate frames once per stacktrace.
+    """
+    best = None
+    for matcher in matchers:
+        if (
+            isinstance(matcher, (FunctionMatch, ModuleMatch))
+            and not matcher.negated
+            and matcher.literal_prefix
+            and (best is None or len(matcher.literal_prefix) > len(best[1]))
+        ):
+            best = (matcher.field, matcher.literal_prefix)
+    return best
+
+
+def _get_prefilter_candidates(
+    match_frames: Sequence[dict[str, Any]], field: str, prefix: bytes
+) -> list[int]:
+    return [
+        idx
+        for idx, match_frame in enumerate(match_frames)
+        if match_frame[field] is not None and match_frame[field].startswith(prefix)
+    ]
+
+
 class EnhancementsVisitor(NodeVisitor):
     visit_comment = visit_empty = lambda *a: None
     unwrapped_exceptions = (InvalidEnhancerConfig,)
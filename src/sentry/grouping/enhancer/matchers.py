@@ -245,6 +245,11 @@ class InAppMatch(FrameMatch):
 
 
 class FrameFieldMatch(FrameMatch):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Any value this matcher accepts starts with this prefix.
+        self.literal_prefix = get_literal_prefix(self._encoded_pattern)
+
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
         field = match_frame[self.field]
         if field is None:
@@ -255,6 +260,18 @@ class FrameFieldMatch(FrameMatch):
         return cached(cache, glob_match, field, self._encoded_pattern)
 
 
+# Characters that end the literal prefix of a glob pattern.
+GLOB_META_CHARACTERS = frozenset(b"*?[]{}\\!")
+
+
+def get_literal_prefix(pattern: bytes) -> bytes:
+    """Returns the part of ``pattern`` before its first glob metacharacter."""
+    for idx, char in enumerate(pattern):
+        if char in GLOB_META_CHARACTERS:
+            return pattern[:idx]
+    return pattern
+
+
 class FunctionMatch(FrameFieldMatch):
 
     field = "function"
@@ -1,4 +1,6 @@
 import inspect
+import threading
+from contextlib import contextmanager
 from typing import (
     Any,
     Callable,
@@ -9,6 +11,7 @@ from typing import (
     Optional,
     Protocol,
     Sequence,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -21,6 +24,7 @@ from sentry.eventstore.models import Event
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements
 from sentry.interfaces.base import Interface
+from sentry.utils import json, metrics
 
 STRATEGIES: Dict[str, "Strategy[Any]"] = {}
 
@@ -63,6 +67,7 @@ def strategy(
     ids: Sequence[str],
     interface: Type[Interface],
     score: Optional[int] = None,
+    memoize: bool = False,
 ) -> Callable[[StrategyFunc[ConcreteInterface]], "Strategy[ConcreteInterface]"]:
     """
     Registers a strategy
@@ -72,6 +77,9 @@ def strategy(
     :param score: Determines precedence of strategies. For example exception
         strategy scores higher than message strategy, so if both interfaces are
         in the event, only exception will be used for hash
+    :param memoize: The strategy only depends on its interface, the event
+        platform and context values, so its result can be reused for other
+        grouping configs within `memoize_grouping_components`.
     """
 
     name = interface.path
@@ -84,7 +92,7 @@ def strategy(
 
         for id in ids:
             STRATEGIES[id] = rv = Strategy(
-                id=id, name=name, interface=interface.path, score=score, func=f
+                id=id, name=name, interface=interface.path, score=score, func=f, memoize=memoize
             )
 
         assert rv is not None
@@ -97,6 +105,10 @@ class GroupingContext:
     def __init__(self, strategy_config: "StrategyConfiguration"):
         self._stack = [strategy_config.initial_context]
         self.config = strategy_config
+        # Context values read by the memoized strategy that is currently
+        # running, see `GroupingComponentMemo`.
+        self._reads: Optional[ContextDict] = None
+        self._reads_depth = 0
         self.push()
         self["variant"] = None
 
@@ -104,11 +116,32 @@ class GroupingContext:
         self._stack[-1][key] = value
 
     def __getitem__(self, key: str) -> ContextValue:
-        for d in reversed(self._stack):
+        for depth in range(len(self._stack) - 1, -1, -1):
+            d = self._stack[depth]
             if key in d:
+                # Values set by the strategy itself are not inputs to it.
+                if self._reads is not None and depth < self._reads_depth:
+                    self._reads.setdefault(key, d[key])
                 return d[key]
         raise KeyError(key)
 
+    @contextmanager
+    def record_reads(self) -> Iterator[ContextDict]:
+        """Records the context values read by a memoized strategy.  Reads
+        of nested memoized strategies are recorded for the outer one as
+        well."""
+        outer_reads, outer_depth = self._reads, self._reads_depth
+        reads: ContextDict = {}
+        self._reads, self._reads_depth = reads, len(self._stack)
+        try:
+            with self:
+                yield reads
+        finally:
+            self._reads, self._reads_depth = outer_reads, outer_depth
+            if outer_reads is not None:
+                for key, value in reads.items():
+                    outer_reads.setdefault(key, value)
+
     def __enter__(self) -> "GroupingContext":
         self.push()
         return self
@@ -148,6 +181,95 @@ class GroupingContext:
         return rv
 
 
+MemoKey = Tuple[str, Optional[str], Optional[Tuple[Any, ...]], str]
+
+
+class GroupingComponentMemo:
+    """Reuses the components produced by memoized strategies while the
+    grouping of one event is computed with several grouping configs (for
+    instance the primary and secondary config during a config transition).
+
+    Entries are keyed by strategy id, event platform, the interface's data
+    path and its serialized data.  As strategies read their options from the
+    `GroupingContext`, every entry also remembers the context values read
+    while producing it and is only reused if they have the same values in
+    the context asking for it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[MemoKey, List[Tuple[Tuple[str, ...], Tuple[Any, ...], Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(strategy: "Strategy[Any]", interface: Interface, event: Event) -> MemoKey:
+        datapath = getattr(interface, "datapath", None)
+        return (
+            strategy.id,
+            event.platform,
+            tuple(datapath) if datapath is not None else None,
+            # Copies of the same event serialize identically.
+            json.dumps(interface.to_json()),
+        )
+
+    def get(self, key: MemoKey, context: GroupingContext) -> Optional[ReturnedVariants]:
+        for keys, values, rv in self._entries.get(key, ()):
+            try:
+                # Reading the values also records them for an outer
+                # memoized strategy, if any.
+                matches = tuple(context[k] for k in keys) == values
+            except KeyError:
+                matches = False
+            if matches:
+                self.hits += 1
+                return _copy_variants(rv)
+        self.misses += 1
+        return None
+
+    def set(self, key: MemoKey, reads: ContextDict, rv: ReturnedVariants) -> None:
+        keys = tuple(reads)
+        self._entries.setdefault(key, []).append(
+            (keys, tuple(reads[k] for k in keys), _copy_variants(rv))
+        )
+
+
+def _copy_variants(variants: ReturnedVariants) -> ReturnedVariants:
+    # Callers update the returned components in place.
+    return {
+        variant: component.deep_copy() if component is not None else None
+        for variant, component in variants.items()
+    }
+
+
+_memo_local = threading.local()
+
+
+def get_grouping_component_memo() -> Optional[GroupingComponentMemo]:
+    return getattr(_memo_local, "memo", None)
+
+
+@contextmanager
+def memoize_grouping_components() -> Iterator[GroupingComponentMemo]:
+    """Memoizes the components of memoized strategies for all grouping
+    configs computed within the block.  Nested blocks share the outer memo.
+
+    The block must only cover the grouping of a single event.
+    """
+    memo = get_grouping_component_memo()
+    if memo is not None:
+        yield memo
+        return
+
+    memo = _memo_local.memo = GroupingComponentMemo()
+    try:
+        yield memo
+    finally:
+        _memo_local.memo = None
+        if memo.hits or memo.misses:
+            metrics.incr("grouping.component_memo.hit", amount=memo.hits, skip_internal=True)
+            metrics.incr("grouping.component_memo.miss", amount=memo.misses, skip_internal=True)
+
+
 def lookup_strategy(strategy_id: str) -> "Strategy[Any]":
     """Looks up a strategy by id."""
     try:
@@ -166,6 +288,7 @@ class Strategy(Generic[ConcreteInterface]):
         interface: str,
         score: Optional[int],
         func: StrategyFunc[ConcreteInterface],
+        memoize: bool = False,
     ):
         self.id = id
         self.strategy_class = id.split(":", 1)[0]
@@ -173,6 +296,7 @@ class Strategy(Generic[ConcreteInterface]):
         self.interface = interface
         self.score = score
         self.func = func
+        self.memoize = memoize
         self.variant_processor_func: Optional[VariantProcessor] = None
 
     def __repr__(self) -> str:
@@ -188,8 +312,28 @@ class Strategy(Generic[ConcreteInterface]):
         return func(*args, **kwargs)
 
     def __call__(self, *args: Any, **kwargs: Any) -> ReturnedVariants:
+        if self.memoize:
+            memo = get_grouping_component_memo()
+            # Extra meta arguments are not part of the memo key.
+            if memo is not None and len(args) == 1 and kwargs.keys() == {"event", "context"}:
+                return self._invoke_memoized(memo, args[0], **kwargs)
         return self._invoke(self.func, *args, **kwargs)
 
+    def _invoke_memoized(
+        self,
+        memo: GroupingComponentMemo,
+        interface: ConcreteInterface,
+        event: Event,
+        context: GroupingContext,
+    ) -> ReturnedVariants:
+        key = memo.make_key(self, interface, event)
+        rv = memo.get(key, context)
+        if rv is None:
+            with context.record_reads() as reads:
+                rv = self._invoke(self.func, interface, event=event, context=context)
+            memo.set(key, reads, rv)
+        return rv
+
     def variant_processor(self, func: VariantProcessor) -> VariantProcessor:
         """Registers a variant reducer function that can be used to postprocess
         all variants created from this strategy.
@@ -147,7 +147,7 @@ def normalize_message_for_grouping(message: str) -> str:
     return _parameterization_regex.sub(_handle_match, trimmed)
 
 
-@strategy(ids=["message:v1"], interface=Message, score=0)
+@strategy(ids=["message:v1"], interface=Message, score=0, memoize=True)
 @produces_variants(["default"])
 def message_v1(
     interface: Message, event: Event, context: GroupingContext, **meta: Any
@@ -330,6 +330,7 @@ def get_function_component(
 @strategy(
     ids=["frame:v1"],
     interface=Frame,
+    memoize=True,
 )
 def frame(
     interface: Frame, event: Event, context: GroupingContext, **meta: Any
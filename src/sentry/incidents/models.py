@@ -100,6 +100,57 @@ class IncidentManager(BaseManager["Incident"]):
 
         return incident
 
+    def get_active_incidents(self, alert_rule_project_ids):
+        """
+        Like `get_active_incident`, but for many (alert_rule_id, project_id) pairs at
+        once. Returns a dict keyed by those pairs, with None for pairs without an active
+        incident. Attempts to fetch from cache then hits the database for the rest in a
+        single query.
+        """
+        cache_keys = {
+            self._build_active_incident_cache_key(alert_rule_id, project_id): (
+                alert_rule_id,
+                project_id,
+            )
+            for alert_rule_id, project_id in alert_rule_project_ids
+        }
+        incidents = {
+            cache_keys[cache_key]: incident or None
+            for cache_key, incident in cache.get_many(cache_keys).items()
+            if incident is not None
+        }
+
+        missing = {key for key in cache_keys.values() if key not in incidents}
+        if missing:
+            found = {}
+            incident_projects = (
+                IncidentProject.objects.filter(
+                    incident__type=IncidentType.ALERT_TRIGGERED.value,
+                    incident__alert_rule_id__in={alert_rule_id for alert_rule_id, _ in missing},
+                    project_id__in={project_id for _, project_id in missing},
+                )
+                .exclude(incident__status=IncidentStatus.CLOSED.value)
+                .select_related("incident")
+                .order_by("incident__date_added")
+            )
+            # Ordered by date added, so the most recent incident of each pair wins
+            for incident_project in incident_projects:
+                key = (incident_project.incident.alert_rule_id, incident_project.project_id)
+                if key in missing:
+                    found[key] = incident_project.incident
+
+            to_cache = {}
+            for alert_rule_id, project_id in missing:
+                incident = found.get((alert_rule_id, project_id))
+                incidents[(alert_rule_id, project_id)] = incident
+                # Store False so that we can have a negative cache as well.
+                to_cache[self._build_active_incident_cache_key(alert_rule_id, project_id)] = (
+                    incident if incident is not None else False
+                )
+            cache.set_many(to_cache)
+
+        return incidents
+
     @classmethod
     def clear_active_incident_cache(cls, instance, **kwargs):
         for project in instance.projects.all():
@@ -383,6 +434,44 @@ class AlertRuleManager(BaseManager["AlertRule"]):
 
         return alert_rule
 
+    def get_for_subscriptions(self, subscriptions):
+        """
+        Fetches the AlertRules associated with many Subscriptions, as a dict keyed by
+        subscription id. Subscriptions without an AlertRule are left out. Attempts to
+        fetch from cache then hits the database for the rest in a single query.
+        """
+        cache_keys = {
+            self.__build_subscription_cache_key(subscription.id): subscription
+            for subscription in subscriptions
+        }
+        alert_rules = {
+            cache_keys[cache_key].id: alert_rule
+            for cache_key, alert_rule in cache.get_many(cache_keys).items()
+            if alert_rule is not None
+        }
+
+        missing = [
+            subscription
+            for subscription in cache_keys.values()
+            if subscription.id not in alert_rules
+        ]
+        if missing:
+            alert_rules_by_snuba_query = {
+                alert_rule.snuba_query_id: alert_rule
+                for alert_rule in AlertRule.objects.filter(
+                    snuba_query_id__in={subscription.snuba_query_id for subscription in missing}
+                )
+            }
+            to_cache = {}
+            for subscription in missing:
+                alert_rule = alert_rules_by_snuba_query.get(subscription.snuba_query_id)
+                if alert_rule is not None:
+                    alert_rules[subscription.id] = alert_rule
+                    to_cache[self.__build_subscription_cache_key(subscription.id)] = alert_rule
+            cache.set_many(to_cache, 3600)
+
+        return alert_rules
+
     @classmethod
     def clear_subscription_cache(cls, instance, **kwargs):
         cache.delete(cls.__build_subscription_cache_key(instance.id))
@@ -557,6 +646,40 @@ class AlertRuleTriggerManager(BaseManager["AlertRuleTrigger"]):
             cache.set(cache_key, triggers, 3600)
         return triggers
 
+    def get_for_alert_rules(self, alert_rules):
+        """
+        Fetches the AlertRuleTriggers associated with many AlertRules, as a dict keyed
+        by alert rule id. Attempts to fetch from cache then hits the database for the
+        rest in a single query.
+        """
+        cache_keys = {
+            self._build_trigger_cache_key(alert_rule.id): alert_rule.id
+            for alert_rule in alert_rules
+        }
+        triggers = {
+            cache_keys[cache_key]: alert_rule_triggers
+            for cache_key, alert_rule_triggers in cache.get_many(cache_keys).items()
+            if alert_rule_triggers is not None
+        }
+
+        missing = [
+            alert_rule_id for alert_rule_id in cache_keys.values() if alert_rule_id not in triggers
+        ]
+        if missing:
+            fetched = {alert_rule_id: [] for alert_rule_id in missing}
+            for trigger in AlertRuleTrigger.objects.filter(alert_rule_id__in=missing):
+                fetched[trigger.alert_rule_id].append(trigger)
+            cache.set_many(
+                {
+                    self._build_trigger_cache_key(alert_rule_id): alert_rule_triggers
+                    for alert_rule_id, alert_rule_triggers in fetched.items()
+                },
+                3600,
+            )
+            triggers.update(fetched)
+
+        return triggers
+
     @classmethod
     def clear_trigger_cache(cls, instance, **kwargs):
         cache.delete(cls._build_trigger_cache_key(instance.alert_rule_id))
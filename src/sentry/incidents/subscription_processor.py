@@ -4,7 +4,7 @@ import logging
 import operator
 from copy import deepcopy
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Sequence, Tuple, TypeVar, cast
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar, cast
 
 from django.conf import settings
 from django.db import router, transaction
@@ -64,6 +64,9 @@ CRASH_RATE_ALERT_MINIMUM_THRESHOLD: Optional[int] = None
 
 T = TypeVar("T")
 
+# (last_update, trigger_alert_counts, trigger_resolve_counts)
+AlertRuleStats = Tuple[datetime, Dict[int, int], Dict[int, int]]
+
 
 class SubscriptionProcessor:
     """
@@ -79,21 +82,41 @@ class SubscriptionProcessor:
         AlertRuleThresholdType.BELOW: (operator.lt, operator.gt),
     }
 
-    def __init__(self, subscription: QuerySubscription) -> None:
+    def __init__(
+        self,
+        subscription: QuerySubscription,
+        alert_rule: AlertRule | None = None,
+        triggers: List[AlertRuleTrigger] | None = None,
+        alert_rule_stats: AlertRuleStats | None = None,
+        stats_pipeline: Any | None = None,
+    ) -> None:
+        """
+        `alert_rule`, `triggers` and `alert_rule_stats` can be passed when they were
+        already fetched in bulk, see `process_updates_in_batch`. If `stats_pipeline` is
+        passed, rule stats are queued on it rather than written straight away.
+        """
         self.subscription = subscription
-        try:
-            self.alert_rule = AlertRule.objects.get_for_subscription(subscription)
-        except AlertRule.DoesNotExist:
-            return
-
-        self.triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
-        self.triggers.sort(key=lambda trigger: trigger.alert_threshold)
-
+        self.stats_pipeline = stats_pipeline
+        if alert_rule is None:
+            try:
+                alert_rule = AlertRule.objects.get_for_subscription(subscription)
+            except AlertRule.DoesNotExist:
+                return
+        self.alert_rule = alert_rule
+
+        if triggers is None:
+            triggers = AlertRuleTrigger.objects.get_for_alert_rule(self.alert_rule)
+        self.triggers = sorted(triggers, key=lambda trigger: trigger.alert_threshold)
+
+        if alert_rule_stats is None:
+            alert_rule_stats = get_alert_rule_stats(
+                self.alert_rule, self.subscription, self.triggers
+            )
         (
             self.last_update,
             self.trigger_alert_counts,
             self.trigger_resolve_counts,
-        ) = get_alert_rule_stats(self.alert_rule, self.subscription, self.triggers)
+        ) = alert_rule_stats
         self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
         self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
 
@@ -783,7 +806,111 @@ class SubscriptionProcessor:
             self.last_update,
             updated_trigger_alert_counts,
             updated_trigger_resolve_counts,
+            pipeline=self.stats_pipeline,
         )
+        # A processor can handle several updates, only write what changed since the last one
+        self.orig_trigger_alert_counts = deepcopy(self.trigger_alert_counts)
+        self.orig_trigger_resolve_counts = deepcopy(self.trigger_resolve_counts)
+
+
+def process_updates_in_batch(
+    updates: Sequence[Tuple[SubscriptionUpdate, QuerySubscription]]
+) -> None:
+    """
+    Processes the updates of many subscriptions at once. Alert rules, triggers and
+    active incidents are fetched in bulk, rule stats are read with one pipelined
+    redis call, and the updates are then evaluated one after the other. Updates for
+    the same subscription are applied in order by the same `SubscriptionProcessor`,
+    and the rule stats it changed are written once they are done.
+    """
+    subscriptions = {subscription.id: subscription for _, subscription in updates}
+
+    with metrics.timer("incidents.subscription_processor.batch.prefetch"):
+        alert_rules = AlertRule.objects.get_for_subscriptions(subscriptions.values())
+        triggers = AlertRuleTrigger.objects.get_for_alert_rules(
+            {alert_rule.id: alert_rule for alert_rule in alert_rules.values()}.values()
+        )
+        with_alert_rule = [
+            (alert_rules[subscription.id], subscription)
+            for subscription in subscriptions.values()
+            if subscription.id in alert_rules
+        ]
+        stats = get_alert_rule_stats_many(
+            [
+                (alert_rule, subscription, triggers[alert_rule.id])
+                for alert_rule, subscription in with_alert_rule
+            ]
+        )
+        active_incidents = Incident.objects.get_active_incidents(
+            {
+                (alert_rule.id, subscription.project_id)
+                for alert_rule, subscription in with_alert_rule
+            }
+        )
+        incident_triggers: Dict[int, Dict[int, IncidentTrigger]] = {}
+        for incident_trigger in IncidentTrigger.objects.filter(
+            incident__in=[incident for incident in active_incidents.values() if incident]
+        ).select_related("alert_rule_trigger"):
+            incident_triggers.setdefault(incident_trigger.incident_id, {})[
+                incident_trigger.alert_rule_trigger_id
+            ] = incident_trigger
+
+    pipeline = get_redis_client().pipeline()
+    processors = {}
+    for (alert_rule, subscription), alert_rule_stats in zip(with_alert_rule, stats):
+        processor = SubscriptionProcessor(
+            subscription,
+            alert_rule=alert_rule,
+            triggers=triggers[alert_rule.id],
+            alert_rule_stats=alert_rule_stats,
+            stats_pipeline=pipeline,
+        )
+        active_incident = active_incidents[(alert_rule.id, subscription.project_id)]
+        processor.active_incident = active_incident
+        processor._incident_triggers = (
+            incident_triggers.get(active_incident.id, {}) if active_incident else {}
+        )
+        processors[subscription.id] = processor
+
+    updates_by_subscription: Dict[int, List[SubscriptionUpdate]] = {}
+    for subscription_update, subscription in updates:
+        updates_by_subscription.setdefault(subscription.id, []).append(subscription_update)
+
+    for subscription_id, subscription_updates in updates_by_subscription.items():
+        # Goes through the usual lookup, and is dropped if the alert rule is gone
+        processor = processors.get(subscription_id) or SubscriptionProcessor(
+            subscriptions[subscription_id]
+        )
+        try:
+            for i, subscription_update in enumerate(subscription_updates):
+                try:
+                    # noinspection SpellCheckingInspection
+                    with metrics.timer("incidents.subscription_procesor.process_update"):
+                        processor.process_update(subscription_update)
+                except Exception:
+                    # The processor may be left half way through an update, so the
+                    # remaining updates for this subscription are skipped rather than
+                    # applied on top of it
+                    logger.exception(
+                        "Failed to process subscription update in batch",
+                        extra={"subscription_id": subscription_id},
+                    )
+                    for _ in subscription_updates[i + 1 :]:
+                        metrics.incr(
+                            "incidents.subscription_processor.batch.skipping_failed_subscription"
+                        )
+                    break
+        finally:
+            # Incidents and actions for this subscription may already have fired.
+            # Write the trigger counts they were based on right away, otherwise the
+            # next update would fire them again.
+            try:
+                pipeline.execute()
+            except Exception:
+                logger.exception(
+                    "Failed to write alert rule stats in batch",
+                    extra={"subscription_id": subscription_id},
+                )
 
 
 def build_alert_rule_stat_keys(alert_rule: AlertRule, subscription: QuerySubscription) -> List[str]:
@@ -831,7 +958,7 @@ def partition(iterable: Sequence[T], n: int) -> Sequence[Sequence[T]]:
 
 def get_alert_rule_stats(
     alert_rule: AlertRule, subscription: QuerySubscription, triggers: List[AlertRuleTrigger]
-) -> Tuple[datetime, Dict[str, int], Dict[str, int]]:
+) -> AlertRuleStats:
     """
     Fetches stats about the alert rule, specific to the current subscription
     :return: A tuple containing the stats about the alert rule and subscription.
@@ -846,6 +973,40 @@ def get_alert_rule_stats(
     alert_rule_keys = build_alert_rule_stat_keys(alert_rule, subscription)
     trigger_keys = build_trigger_stat_keys(alert_rule, subscription, triggers)
     results = get_redis_client().mget(alert_rule_keys + trigger_keys)
+    return _parse_alert_rule_stats(triggers, results)
+
+
+def get_alert_rule_stats_many(
+    items: Sequence[Tuple[AlertRule, QuerySubscription, List[AlertRuleTrigger]]]
+) -> List[AlertRuleStats]:
+    """
+    Like `get_alert_rule_stats`, but fetches the stats of many alert rules and
+    subscriptions in a single pipelined call.
+    :return: A list of stats, in the same order as `items`
+    """
+    pipeline = get_redis_client().pipeline()
+    key_counts = []
+    for alert_rule, subscription, triggers in items:
+        keys = build_alert_rule_stat_keys(alert_rule, subscription) + build_trigger_stat_keys(
+            alert_rule, subscription, triggers
+        )
+        # Keys of different alert rules live in different slots, so they can't share an mget
+        for key in keys:
+            pipeline.get(key)
+        key_counts.append(len(keys))
+
+    results = pipeline.execute() if items else []
+    stats = []
+    start = 0
+    for (_, _, triggers), key_count in zip(items, key_counts):
+        stats.append(_parse_alert_rule_stats(triggers, results[start : start + key_count]))
+        start += key_count
+    return stats
+
+
+def _parse_alert_rule_stats(
+    triggers: List[AlertRuleTrigger], results: Sequence[Any]
+) -> AlertRuleStats:
     results = tuple(0 if result is None else int(result) for result in results)
     last_update = to_datetime(results[0])
     trigger_results = results[1:]
@@ -867,11 +1028,16 @@ def update_alert_rule_stats(
     last_update: datetime,
     alert_counts: Dict[int, int],
     resolve_counts: Dict[int, int],
+    pipeline: Any | None = None,
 ) -> None:
     """
     Updates stats about the alert rule, subscription and triggers if they've changed.
+    If `pipeline` is passed, the updates are queued on it and the caller is
+    responsible for executing it.
     """
-    pipeline = get_redis_client().pipeline()
+    execute = pipeline is None
+    if pipeline is None:
+        pipeline = get_redis_client().pipeline()
 
     counts_with_stat_keys = zip(ALERT_RULE_TRIGGER_STAT_KEYS, (alert_counts, resolve_counts))
     for stat_key, trigger_counts in counts_with_stat_keys:
@@ -886,7 +1052,8 @@ def update_alert_rule_stats(
 
     last_update_key = build_alert_rule_stat_keys(alert_rule, subscription)[0]
     pipeline.set(last_update_key, int(to_timestamp(last_update)), ex=REDIS_TTL)
-    pipeline.execute()
+    if execute:
+        pipeline.execute()
 
 
 def get_redis_client() -> RetryingRedisCluster:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 from urllib.parse import urlencode
 
 from django.urls import reverse
@@ -24,7 +24,7 @@ from sentry.services.hybrid_cloud.user.service import user_service
 from sentry.silo import SiloMode
 from sentry.snuba.dataset import Dataset
 from sentry.snuba.models import QuerySubscription
-from sentry.snuba.query_subscriptions.consumer import register_subscriber
+from sentry.snuba.query_subscriptions.consumer import register_batch_subscriber, register_subscriber
 from sentry.tasks.base import instrumented_task
 from sentry.utils import metrics
 from sentry.utils.email import MessageBuilder
@@ -172,6 +172,19 @@ def handle_snuba_query_update(
         SubscriptionProcessor(subscription).process_update(subscription_update)
 
 
+@register_batch_subscriber(INCIDENTS_SNUBA_SUBSCRIPTION_TYPE)
+def handle_snuba_query_update_batch(
+    updates: Sequence[Tuple[SubscriptionUpdate, QuerySubscription]]
+) -> None:
+    """
+    Handles all updates of a consumer batch for `QuerySubscription`s at once.
+    """
+    from sentry.incidents.subscription_processor import process_updates_in_batch
+
+    with metrics.timer("incidents.subscription_processor.process_updates_in_batch"):
+        process_updates_in_batch(updates)
+
+
 @instrumented_task(
     name="sentry.incidents.tasks.handle_trigger_action",
     queue="incidents",
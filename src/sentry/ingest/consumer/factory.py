@@ -8,6 +8,7 @@ from arroyo.backends.kafka.consumer import KafkaConsumer, KafkaPayload
 from arroyo.commit import ONCE_PER_SECOND
 from arroyo.processing.processor import StreamProcessor
 from arroyo.processing.strategies import (
+    BatchStep,
     CommitOffsets,
     FilterStep,
     ProcessingStrategy,
@@ -23,7 +24,7 @@ from sentry.utils import kafka_config
 from sentry.utils.arroyo import RunTaskWithMultiprocessing
 
 from .attachment_event import decode_and_process_chunks, process_attachments_and_events
-from .simple_event import process_simple_event_message
+from .simple_event import process_simple_event_batch, process_simple_event_message
 
 
 class MultiProcessConfig(NamedTuple):
@@ -69,9 +70,16 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         max_batch_time: int,
         input_block_size: int,
         output_block_size: int,
+        batched: bool = False,
     ):
         self.consumer_type = consumer_type
         self.is_attachment_topic = consumer_type == ConsumerType.Attachments
+        # Events are processed in batches of up to `max_batch_size` messages or
+        # `max_batch_time` seconds. Offsets of a batch are committed once the
+        # whole batch is processed.
+        self.batched = batched
+        self.max_batch_size = max_batch_size
+        self.max_batch_time = max_batch_time
 
         self.multi_process = None
         if num_processes > 1:
@@ -91,7 +99,14 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         final_step = CommitOffsets(commit)
 
         if not self.is_attachment_topic:
-            next_step = maybe_multiprocess_step(mp, process_simple_event_message, final_step)
+            if self.batched:
+                next_step = BatchStep(
+                    max_batch_size=self.max_batch_size,
+                    max_batch_time=self.max_batch_time,
+                    next_step=maybe_multiprocess_step(mp, process_simple_event_batch, final_step),
+                )
+            else:
+                next_step = maybe_multiprocess_step(mp, process_simple_event_message, final_step)
             return create_backpressure_step(health_checker=self.health_checker, next_step=next_step)
 
         # The `attachments` topic is a bit different, as it allows multiple event types:
@@ -1,7 +1,7 @@
 import functools
 import logging
 import random
-from typing import Any, Mapping
+from typing import Any, Callable, Mapping, MutableMapping, Sequence, Tuple
 
 import sentry_sdk
 from django.conf import settings
@@ -44,48 +44,27 @@ def trace_func(**span_kwargs):
     return wrapper
 
 
-@trace_func(name="ingest_consumer.process_event")
-@metrics.wraps("ingest_consumer.process_event")
-def process_event(message: IngestMessage, project: Project) -> None:
+def _deduplication_key(message: IngestMessage) -> str:
+    return f"ev:{message['project_id']}:{message['event_id']}"
+
+
+def _log_duplicate(message: IngestMessage) -> None:
+    logger.warning(
+        "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
+        message["event_id"],
+        message["project_id"],
+    )
+
+
+def _parse_event(message: IngestMessage, project: Project) -> Any:
     """
-    Perform some initial filtering and deserialize the message payload.
+    Deserializes the event payload, returning None for events that are
+    load-shed before or after parsing.
     """
-    payload = message["payload"]
-    start_time = float(message["start_time"])
     event_id = message["event_id"]
     project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
     attachments = message.get("attachments") or ()
 
-    sentry_sdk.set_extra("event_id", event_id)
-    sentry_sdk.set_extra("len_attachments", len(attachments))
-
-    if project_id == settings.SENTRY_PROJECT:
-        metrics.incr("internal.captured.ingest_consumer.unparsed")
-
-    # check that we haven't already processed this event (a previous instance of the forwarder
-    # died before it could commit the event queue offset)
-    #
-    # XXX(markus): I believe this code is extremely broken:
-    #
-    # * it practically uses memcached in prod which has no consistency
-    #   guarantees (no idea how we don't run into issues there)
-    #
-    # * a TTL of 1h basically doesn't guarantee any deduplication at all. It
-    #   just guarantees a good error message... for one hour.
-    #
-    # This code has been ripped from the old python store endpoint. We're
-    # keeping it around because it does provide some protection against
-    # reprocessing good events if a single consumer is in a restart loop.
-    deduplication_key = f"ev:{project_id}:{event_id}"
-    if cache.get(deduplication_key) is not None:
-        logger.warning(
-            "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
-            event_id,
-            project_id,
-        )
-        return  # message already processed do not reprocess
-
     if killswitch_matches_context(
         "store.load-shed-pipeline-projects",
         {
@@ -96,14 +75,14 @@ def process_event(message: IngestMessage, project: Project) -> None:
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return None
 
     # Parse the JSON payload. This is required to compute the cache key and
     # call process_event. The payload will be put into Kafka raw, to avoid
     # serializing it again.
     # XXX: Do not use CanonicalKeyDict here. This may break preprocess_event
     # which assumes that data passed in is a raw dictionary.
-    data = json.loads(payload, use_rapid_json=True)
+    data = json.loads(message["payload"], use_rapid_json=True)
     if project_id == settings.SENTRY_PROJECT:
         metrics.incr(
             "internal.captured.ingest_consumer.parsed",
@@ -120,10 +99,22 @@ def process_event(message: IngestMessage, project: Project) -> None:
             "event_id": event_id,
         },
     ):
-        return
+        return None
 
-    with metrics.timer("ingest_consumer._store_event"):
-        cache_key = event_processing_store.store(data)
+    return data
+
+
+def _dispatch_event(
+    message: IngestMessage,
+    project: Project,
+    data: Any,
+    cache_key: str,
+    feedback_enabled: Callable[[Project], bool],
+) -> None:
+    start_time = float(message["start_time"])
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    attachments = message.get("attachments") or ()
 
     if attachments:
         with sentry_sdk.start_span(op="ingest_consumer.set_attachment_cache"):
@@ -145,7 +136,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
             project_id=project_id,
         )
     elif data.get("type") == "feedback":
-        if features.has("organizations:user-feedback-ingest", project.organization, actor=None):
+        if feedback_enabled(project):
             save_event_feedback.delay(
                 cache_key=None,  # no need to cache as volume is low
                 data=data,
@@ -167,6 +158,56 @@ def process_event(message: IngestMessage, project: Project) -> None:
                 has_attachments=bool(attachments),
             )
 
+
+def _has_feedback_ingest(project: Project) -> bool:
+    return features.has("organizations:user-feedback-ingest", project.organization, actor=None)
+
+
+@trace_func(name="ingest_consumer.process_event")
+@metrics.wraps("ingest_consumer.process_event")
+def process_event(message: IngestMessage, project: Project) -> None:
+    """
+    Perform some initial filtering and deserialize the message payload.
+    """
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
+    remote_addr = message.get("remote_addr")
+    attachments = message.get("attachments") or ()
+
+    sentry_sdk.set_extra("event_id", event_id)
+    sentry_sdk.set_extra("len_attachments", len(attachments))
+
+    if project_id == settings.SENTRY_PROJECT:
+        metrics.incr("internal.captured.ingest_consumer.unparsed")
+
+    # check that we haven't already processed this event (a previous instance of the forwarder
+    # died before it could commit the event queue offset)
+    #
+    # XXX(markus): I believe this code is extremely broken:
+    #
+    # * it practically uses memcached in prod which has no consistency
+    #   guarantees (no idea how we don't run into issues there)
+    #
+    # * a TTL of 1h basically doesn't guarantee any deduplication at all. It
+    #   just guarantees a good error message... for one hour.
+    #
+    # This code has been ripped from the old python store endpoint. We're
+    # keeping it around because it does provide some protection against
+    # reprocessing good events if a single consumer is in a restart loop.
+    deduplication_key = _deduplication_key(message)
+    if cache.get(deduplication_key) is not None:
+        _log_duplicate(message)
+        return  # message already processed do not reprocess
+
+    data = _parse_event(message, project)
+    if data is None:
+        return
+
+    with metrics.timer("ingest_consumer._store_event"):
+        cache_key = event_processing_store.store(data)
+
+    _dispatch_event(message, project, data, cache_key, _has_feedback_ingest)
+
     # remember for an 1 hour that we saved this event (deduplication protection)
     cache.set(deduplication_key, "", CACHE_TIMEOUT)
 
@@ -174,6 +215,67 @@ def process_event(message: IngestMessage, project: Project) -> None:
     event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
 
 
+@trace_func(name="ingest_consumer.process_event_batch")
+@metrics.wraps("ingest_consumer.process_event_batch")
+def process_event_batch(messages: Sequence[Tuple[IngestMessage, Project]]) -> None:
+    """
+    Batched counterpart of `process_event`. Deduplication keys are read and
+    written and event payloads are stored with one call for the whole batch,
+    and per-organization feature checks are made once per batch.
+    """
+    if not messages:
+        return
+
+    metrics.incr("ingest_consumer.process_event_batch.messages", amount=len(messages))
+    internal = sum(
+        1 for message, _ in messages if int(message["project_id"]) == settings.SENTRY_PROJECT
+    )
+    if internal:
+        metrics.incr("internal.captured.ingest_consumer.unparsed", amount=internal)
+
+    # See `process_event` for the caveats of this deduplication
+    deduplication_keys = [_deduplication_key(message) for message, _ in messages]
+    seen = cache.get_many(deduplication_keys)
+
+    parsed = []
+    new_keys = set()
+    for (message, project), deduplication_key in zip(messages, deduplication_keys):
+        # Duplicates may also be part of the same batch
+        if deduplication_key in seen or deduplication_key in new_keys:
+            _log_duplicate(message)
+            continue
+        new_keys.add(deduplication_key)
+
+        data = _parse_event(message, project)
+        if data is not None:
+            parsed.append((message, project, data, deduplication_key))
+
+    if not parsed:
+        return
+
+    with metrics.timer("ingest_consumer._store_event_batch"):
+        cache_keys = event_processing_store.store_many([data for _, _, data, _ in parsed])
+
+    feedback_enabled: MutableMapping[int, bool] = {}
+
+    def has_feedback_ingest(project: Project) -> bool:
+        if project.organization_id not in feedback_enabled:
+            feedback_enabled[project.organization_id] = _has_feedback_ingest(project)
+        return feedback_enabled[project.organization_id]
+
+    for (message, project, data, _), cache_key in zip(parsed, cache_keys):
+        _dispatch_event(message, project, data, cache_key, has_feedback_ingest)
+
+    # remember for an 1 hour that we saved these events (deduplication protection)
+    cache.set_many({key: "" for _, _, _, key in parsed}, CACHE_TIMEOUT)
+
+    # emit event_accepted once everything is done
+    for message, project, data, _ in parsed:
+        event_accepted.send_robust(
+            ip=message.get("remote_addr"), data=data, project=project, sender=process_event
+        )
+
+
 @trace_func(name="ingest_consumer.process_attachment_chunk")
 @metrics.wraps("ingest_consumer.process_attachment_chunk")
 def process_attachment_chunk(message: IngestMessage) -> None:
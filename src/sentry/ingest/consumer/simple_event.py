@@ -2,12 +2,13 @@ import logging
 
 import msgpack
 from arroyo.backends.kafka.consumer import KafkaPayload
+from arroyo.processing.strategies.batching import ValuesBatch
 from arroyo.types import Message
 
 from sentry.models.project import Project
 from sentry.utils import metrics
 
-from .processors import IngestMessage, process_event
+from .processors import IngestMessage, process_event, process_event_batch
 
 logger = logging.getLogger(__name__)
 
@@ -44,3 +45,38 @@ def process_simple_event_message(raw_message: Message[KafkaPayload]) -> None:
         return
 
     return process_event(message, project)
+
+
+def process_simple_event_batch(raw_batch: Message[ValuesBatch[KafkaPayload]]) -> None:
+    """
+    Processes a batch of Kafka Messages containing "simple" Event payloads.
+
+    Like `process_simple_event_message`, but projects are fetched with one
+    cache lookup for the whole batch and the events are handed to
+    `process_event_batch` grouped by project.
+    """
+    messages_by_project: dict[int, list[IngestMessage]] = {}
+    for value in raw_batch.payload:
+        message: IngestMessage = msgpack.unpackb(value.payload.value, use_list=False)
+
+        message_type = message["type"]
+        if message_type != "event":
+            raise ValueError(f"Unsupported message type: {message_type}")
+
+        messages_by_project.setdefault(message["project_id"], []).append(message)
+
+    with metrics.timer("ingest_consumer.fetch_projects"):
+        projects = {
+            project.id: project
+            for project in Project.objects.get_many_from_cache(list(messages_by_project))
+        }
+
+    batch = []
+    for project_id, messages in messages_by_project.items():
+        project = projects.get(project_id)
+        if project is None:
+            logger.error("Project for ingested event does not exist: %s", project_id)
+            continue
+        batch.extend((message, project) for message in messages)
+
+    process_event_batch(batch)
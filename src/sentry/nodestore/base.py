@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from threading import local
+import struct
+import zlib
+from threading import Lock, local
+from weakref import WeakKeyDictionary
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
+from sentry.nodestore.localcache import LocalNodeCache
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -24,6 +29,23 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json.loads
 
+# Framed node payloads start with this magic (which can't be the start of
+# either a JSON document or a pickle) followed by the format version, the
+# length of the header and the header itself. The header is a JSON list of
+# ``[subkey, offset, length, codec]`` entries locating each section relative to
+# the end of the header, with the default (``None``) subkey first.
+FRAMED_MAGIC = b"\x00nsf"
+FRAMED_VERSION = 1
+FRAMED_PREFIX = struct.Struct(">4sBI")
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+
+# `NodeStorage` is thread-local, the local cache tier is shared by all threads
+# of the process.
+_local_caches: WeakKeyDictionary[NodeStorage, LocalNodeCache] = WeakKeyDictionary()
+_local_caches_lock = Lock()
+
 
 class NodeStorage(local, Service):
     """
@@ -68,6 +90,7 @@ class NodeStorage(local, Service):
         "get_multi",
         "set",
         "set_bytes",
+        "set_multi",
         "set_subkeys",
         "cleanup",
         "validate",
@@ -96,6 +119,9 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        if value.startswith(FRAMED_MAGIC):
+            return self._decode_framed(value, subkey)
+
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -116,6 +142,29 @@ class NodeStorage(local, Service):
         except StopIteration:
             return None
 
+    def _decode_framed(self, value, subkey):
+        """
+        Decode only the section of a framed payload that holds ``subkey``.
+        """
+        _, version, header_length = FRAMED_PREFIX.unpack_from(value)
+        if version != FRAMED_VERSION:
+            raise ValueError(f"Unsupported node format version: {version}")
+
+        body = FRAMED_PREFIX.size + header_length
+        for key, offset, length, codec in json_loads(value[FRAMED_PREFIX.size : body]):
+            if key == subkey:
+                break
+        else:
+            return None
+
+        section = value[body + offset : body + offset + length]
+        if codec == CODEC_ZLIB:
+            section = zlib.decompress(section)
+        elif codec != CODEC_NONE:
+            raise ValueError(f"Unsupported node section codec: {codec}")
+
+        return json_loads(section)
+
     def get_bytes(self, id):
         """
         >>> nodestore._get_bytes('key1')
@@ -134,6 +183,14 @@ class NodeStorage(local, Service):
         with sentry_sdk.start_span(op="nodestore.get") as span:
             span.set_tag("node_id", id)
             if subkey is None:
+                local_cache = self.local_cache
+                if local_cache is not None:
+                    item_from_local_cache = local_cache.get(id)
+                    if item_from_local_cache:
+                        span.set_tag("origin", "from_local_cache")
+                        span.set_tag("found", True)
+                        return item_from_local_cache
+
                 item_from_cache = self._get_cache_item(id)
                 if item_from_cache:
                     span.set_tag("origin", "from_cache")
@@ -146,6 +203,8 @@ class NodeStorage(local, Service):
             if subkey is None:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
+                if local_cache is not None and bytes_data:
+                    self._set_local_cache_items(local_cache, {id: rv}, {id: bytes_data})
 
             span.set_tag("result", "from_service")
             if bytes_data:
@@ -177,7 +236,18 @@ class NodeStorage(local, Service):
             span.set_tag("num_ids", len(id_list))
 
             if subkey is None:
-                cache_items = self._get_cache_items(id_list)
+                local_cache = self.local_cache
+                if local_cache is not None:
+                    cache_items = local_cache.get_many(id_list)
+                    if len(cache_items) == len(id_list):
+                        span.set_tag("result", "from_local_cache")
+                        return cache_items
+                    remaining_ids = [id for id in id_list if id not in cache_items]
+                else:
+                    cache_items = {}
+                    remaining_ids = id_list
+
+                cache_items.update(self._get_cache_items(remaining_ids))
                 if len(cache_items) == len(id_list):
                     span.set_tag("result", "from_cache")
                     return cache_items
@@ -186,12 +256,12 @@ class NodeStorage(local, Service):
             else:
                 uncached_ids = id_list
 
-            items = {
-                id: self._decode(value, subkey=subkey)
-                for id, value in self._get_bytes_multi(uncached_ids).items()
-            }
+            bytes_items = self._get_bytes_multi(uncached_ids)
+            items = {id: self._decode(value, subkey=subkey) for id, value in bytes_items.items()}
             if subkey is None:
                 self._set_cache_items(items)
+                if local_cache is not None:
+                    self._set_local_cache_items(local_cache, items, bytes_items)
                 items.update(cache_items)
 
             span.set_tag("result", "from_service")
@@ -208,6 +278,9 @@ class NodeStorage(local, Service):
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
         """
+        if options.get("nodestore.framed-format"):
+            return self._encode_framed(data)
+
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
@@ -215,6 +288,42 @@ class NodeStorage(local, Service):
 
         return b"\n".join(lines)
 
+    def _encode_framed(self, data):
+        """
+        Encode data dict into the framed format, which allows decoding a
+        single subkey without scanning the others. Sections at least
+        ``nodestore.framed-format.compress-min-bytes`` large are compressed
+        individually.
+        """
+        compress_min_bytes = options.get("nodestore.framed-format.compress-min-bytes")
+
+        header = []
+        sections = []
+        offset = 0
+        for key in [None, *(key for key in data if key is not None)]:
+            if key is not None:
+                # See `_decode`, subkeys are statically known ASCII identifiers.
+                key.encode("ascii")
+
+            section = json_dumps(data[key]).encode("utf8")
+            codec = CODEC_NONE
+            if compress_min_bytes and len(section) >= compress_min_bytes:
+                section = zlib.compress(section)
+                codec = CODEC_ZLIB
+
+            header.append([key, offset, len(section), codec])
+            sections.append(section)
+            offset += len(section)
+
+        header_bytes = json_dumps(header).encode("utf8")
+        return b"".join(
+            [
+                FRAMED_PREFIX.pack(FRAMED_MAGIC, FRAMED_VERSION, len(header_bytes)),
+                header_bytes,
+                *sections,
+            ]
+        )
+
     def set_bytes(self, id, data, ttl=None):
         """
         >>> nodestore.set_bytes('key1', b"{'foo': 'bar'}")
@@ -256,6 +365,36 @@ class NodeStorage(local, Service):
             self._set_bytes(id, bytes_data, ttl=ttl)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
+            local_cache = self.local_cache
+            if local_cache is not None:
+                local_cache.delete(id)
+
+    def _set_bytes_multi(self, items: dict[str, bytes], ttl=None) -> None:
+        """
+        >>> nodestore._set_bytes_multi({"key1": b'{"foo": "bar"}'})
+        """
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl=ttl)
+
+    def set_multi(self, items, ttl=None):
+        """
+        Set values for many ids at once. Like `set`, this deletes existing
+        subkeys of the ids. Backends that can write many nodes in one round
+        trip implement `_set_bytes_multi`.
+
+        >>> nodestore.set_multi({'key1': {'foo': 'bar'}, 'key2': {'foo': 'baz'}})
+        """
+        with sentry_sdk.start_span(op="nodestore", description="set_multi") as span:
+            span.set_data("num_ids", len(items))
+            self._set_bytes_multi(
+                {id: self._encode({None: data}) for id, data in items.items()}, ttl=ttl
+            )
+            # set cache only after encoding and write to nodestore has succeeded
+            self._set_cache_items({id: data for id, data in items.items() if data})
+            local_cache = self.local_cache
+            if local_cache is not None:
+                for id in items:
+                    local_cache.delete(id)
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
@@ -283,10 +422,47 @@ class NodeStorage(local, Service):
     def _delete_cache_item(self, id):
         if self.cache:
             self.cache.delete(id)
+        local_cache = self.local_cache
+        if local_cache is not None:
+            local_cache.delete(id)
 
     def _delete_cache_items(self, id_list):
         if self.cache:
             self.cache.delete_many([id for id in id_list])
+        local_cache = self.local_cache
+        if local_cache is not None:
+            for id in id_list:
+                local_cache.delete(id)
+
+    @property
+    def local_cache(self) -> LocalNodeCache | None:
+        """
+        The in-process cache tier in front of `cache`, configured through the
+        ``nodestore.local-cache.*`` options. ``None`` if it is disabled.
+        """
+        max_bytes = options.get("nodestore.local-cache.max-bytes")
+        if not max_bytes:
+            return None
+
+        local_cache = _local_caches.get(self)
+        if local_cache is None:
+            with _local_caches_lock:
+                local_cache = _local_caches.get(self)
+                if local_cache is None:
+                    local_cache = _local_caches[self] = LocalNodeCache(
+                        max_bytes, options.get("nodestore.local-cache.ttl")
+                    )
+
+        local_cache.max_bytes = max_bytes
+        return local_cache
+
+    def _set_local_cache_items(self, local_cache, items, bytes_items):
+        # The ttl only matters for new entries, so it is looked up once per
+        # write instead of on every access to `local_cache`.
+        local_cache.ttl = options.get("nodestore.local-cache.ttl")
+        for id, value in items.items():
+            if bytes_items[id]:
+                local_cache.set(id, value, len(bytes_items[id]))
 
     @memoize
     def cache(self):
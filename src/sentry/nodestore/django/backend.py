@@ -3,11 +3,13 @@ from __future__ import annotations
 import logging
 import math
 import pickle
+import zlib
 
+from django.db import connections, router
 from django.utils import timezone
 
 from sentry.db.models import create_or_update
-from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.base import FRAMED_MAGIC, NodeStorage
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
@@ -16,6 +18,21 @@ logger = logging.getLogger("sentry")
 
 
 class DjangoNodeStorage(NodeStorage):
+    """
+    A nodestore backend on top of the ``nodestore_node`` table.
+
+    :param binary: Write payloads as zlib-compressed ``bytea`` into the
+        ``data_bytes`` column instead of base64 encoded text into ``data``.
+        Rows written in either mode are always readable, so this can be
+        switched on for an existing installation.
+    :param batch_size: The maximum number of nodes written by a single
+        statement in `set_multi`.
+    """
+
+    def __init__(self, binary=False, batch_size=500):
+        self.binary = binary
+        self.batch_size = batch_size
+
     def delete(self, id):
         Node.objects.filter(id=id).delete()
         self._delete_cache_item(id)
@@ -25,7 +42,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
-            if value.startswith(b"{"):
+            if value.startswith((b"{", FRAMED_MAGIC)):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
             if subkey is None:
@@ -36,22 +53,63 @@ class DjangoNodeStorage(NodeStorage):
             logger.exception(e)
             return {}
 
+    def _get_node_bytes(self, node):
+        if node.data_bytes is not None:
+            return zlib.decompress(node.data_bytes)
+        return decompress(node.data)
+
     def _get_bytes(self, id):
         try:
-            data = Node.objects.get(id=id).data
-            return decompress(data)
+            node = Node.objects.get(id=id)
         except Node.DoesNotExist:
             return None
+        return self._get_node_bytes(node)
 
     def _get_bytes_multi(self, id_list: list[str]) -> dict[str, bytes | None]:
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: self._get_node_bytes(n) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list):
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
 
+    def _encode_node(self, data):
+        """
+        Returns the ``(data, data_bytes)`` column values for a payload.
+        """
+        if self.binary:
+            return "", zlib.compress(data)
+        return compress(data), None
+
     def _set_bytes(self, id, data, ttl=None):
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+        text, binary = self._encode_node(data)
+        create_or_update(
+            Node,
+            id=id,
+            values={"data": text, "data_bytes": binary, "timestamp": timezone.now()},
+        )
+
+    def _set_bytes_multi(self, items: dict[str, bytes], ttl=None) -> None:
+        if not items:
+            return
+
+        connection = connections[router.db_for_write(Node)]
+        timestamp = timezone.now()
+        rows = [(id, *self._encode_node(data), timestamp) for id, data in items.items()]
+
+        with connection.cursor() as cursor:
+            for i in range(0, len(rows), self.batch_size):
+                batch = rows[i : i + self.batch_size]
+                cursor.execute(
+                    f"""
+                    INSERT INTO {Node._meta.db_table} (id, data, data_bytes, timestamp)
+                    VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))}
+                    ON CONFLICT (id) DO UPDATE SET
+                        data = EXCLUDED.data,
+                        data_bytes = EXCLUDED.data_bytes,
+                        timestamp = EXCLUDED.timestamp
+                    """,
+                    [value for row in batch for value in row],
+                )
 
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
@@ -13,6 +13,8 @@ class Node(BaseModel):
     # TODO(dcramer): this being pickle and not JSON has the ability to cause
     # hard errors as it accepts other serialization than native JSON
     data = models.TextField()
+    # zlib compressed payload, written instead of `data` in binary mode
+    data_bytes = models.BinaryField(null=True)
     timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     __repr__ = sane_repr("timestamp")
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import pickle
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Tuple
+
+from sentry.utils import metrics
+
+_MISSING = object()
+
+
+class LocalNodeCache:
+    """
+    An in-process LRU of decoded node payloads.
+
+    The cache is bounded by the total size of the encoded payloads it holds
+    rather than by the number of entries, since node sizes vary by orders of
+    magnitude. Entries also expire after ``ttl`` seconds so that writes from
+    other processes become visible eventually.
+
+    Payloads are kept pickled, which is much cheaper to produce and to load
+    than a deep copy of the decoded node or another JSON decode, and hands
+    every caller its own copy to mutate.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._items: OrderedDict[str, Tuple[bytes, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, id: str) -> Any:
+        """
+        Returns a copy of the cached payload for ``id``, or ``None``.
+        """
+        with self._lock:
+            item = self._items.get(id, _MISSING)
+            if item is not _MISSING:
+                value, size, expires = item
+                if expires > monotonic():
+                    self._items.move_to_end(id)
+                else:
+                    self._remove(id)
+                    item = _MISSING
+
+        if item is _MISSING:
+            metrics.incr("nodestore.local_cache.miss", skip_internal=True)
+            return None
+
+        metrics.incr("nodestore.local_cache.hit", skip_internal=True)
+        return pickle.loads(value)
+
+    def get_many(self, id_list: list[str]) -> dict[str, Any]:
+        rv = {}
+        for id in id_list:
+            value = self.get(id)
+            if value is not None:
+                rv[id] = value
+        return rv
+
+    def set(self, id: str, value: Any, size: int) -> None:
+        """
+        Cache ``value`` for ``id``. ``size`` is the size of its encoded form
+        and is counted against ``max_bytes``.
+        """
+        if value is None or size > self.max_bytes:
+            return
+
+        value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        evicted = 0
+        with self._lock:
+            self._remove(id)
+            self._items[id] = (value, size, monotonic() + self.ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._items)))
+                evicted += 1
+
+        if evicted:
+            metrics.incr("nodestore.local_cache.evict", amount=evicted, skip_internal=True)
+
+    def delete(self, id: str) -> None:
+        with self._lock:
+            self._remove(id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _remove(self, id: str) -> None:
+        item = self._items.pop(id, None)
+        if item is not None:
+            self.size -= item[1]
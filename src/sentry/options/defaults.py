@@ -507,6 +507,15 @@ register("snuba.search.max-chunk-size", default=2000, flags=FLAG_AUTOMATOR_MODIF
 register("snuba.search.max-total-chunk-time-seconds", default=30.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.search.hits-sample-size", default=100, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.track-outcomes-sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Only one process runs a query missing from the snuba query cache while concurrent
+# callers wait for its result, for at most `coalesce-wait-ms`.
+register("snuba.query-cache.coalesce", type=Bool, default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+register("snuba.query-cache.coalesce-wait-ms", default=2000, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Seconds an expired snuba query cache entry keeps being served while it is
+# refreshed in the background. 0 disables stale-while-revalidate.
+register("snuba.query-cache.stale-ttl", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Run multiple SnQL queries of one call as asyncio tasks instead of on the query thread pool
+register("snuba.async-client.enabled", type=Bool, default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register(
@@ -649,6 +658,33 @@ register(
     "nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE
 )
 
+# In-process cache of decoded nodes, bounded by the total size of the
+# encoded nodes. 0 disables it.
+register(
+    "nodestore.local-cache.max-bytes",
+    default=0,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+register(
+    "nodestore.local-cache.ttl",
+    default=60,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+
+# Write nodes in the framed format, which stores a header of subkey offsets
+# so a single subkey can be decoded without scanning the whole payload.
+register(
+    "nodestore.framed-format",
+    default=False,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+# Compress sections of framed nodes at least this large. 0 disables it.
+register(
+    "nodestore.framed-format.compress-min-bytes",
+    default=0,
+    flags=FLAG_PRIORITIZE_DISK | FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Use nodestore for eventstore.get_events
 register(
     "eventstore.use-nodestore",
@@ -803,6 +839,10 @@ register("store.background-grouping-sample-rate", default=0.0, flags=FLAG_AUTOMA
 # True if background grouping should run before secondary and primary grouping
 register("store.background-grouping-before", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
+# Reuse grouping components that are identical between the primary, secondary
+# and background grouping configs of an event
+register("store.grouping-memoize-components", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
 # Store release files bundled as zip files
 register(
     "processing.save-release-archives", default=False, flags=FLAG_AUTOMATOR_MODIFIABLE
@@ -1007,6 +1047,20 @@ register(
     flags=FLAG_AUTOMATOR_MODIFIABLE,
 )
 
+# An option to enable the in-process cache in front of the shared indexer cache
+register(
+    "sentry-metrics.indexer.local-cache.enabled",
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
+# An option to process indexer batches with the columnar batch representation
+register(
+    "sentry-metrics.indexer.columnar-batch",
+    default=False,
+    flags=FLAG_AUTOMATOR_MODIFIABLE,
+)
+
 # Option to control sampling percentage of schema validation on the generic metrics pipeline
 # based on namespace.
 register(
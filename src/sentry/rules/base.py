@@ -49,6 +49,12 @@ by the rule's logic. Each rule condition may be associated with a form.
 # collated during rule processing.
 CallbackFuture = namedtuple("CallbackFuture", ["callback", "kwargs", "key"])
 
+# Estimated cost of evaluating a condition or filter, used by the rule processor
+# to evaluate cheap predicates first.
+PREDICATE_COST_MEMORY = 0  # only looks at the event and its state
+PREDICATE_COST_DATABASE = 1  # may hit the cache or the database
+PREDICATE_COST_SNUBA = 2  # queries Snuba/TSDB
+
 
 class RuleBase(abc.ABC):
     form_cls: Type[forms.Form] = None  # type: ignore
@@ -69,6 +75,7 @@ class RuleBase(abc.ABC):
     id: ClassVar[str]
     label: ClassVar[str]
     rule_type: ClassVar[str]
+    predicate_cost: ClassVar[int] = PREDICATE_COST_MEMORY
 
     def is_enabled(self) -> bool:
         return True
@@ -16,6 +16,7 @@ from sentry.eventstore.models import GroupEvent
 from sentry.issues.constants import get_issue_tsdb_group_model, get_issue_tsdb_user_group_model
 from sentry.receivers.rules import DEFAULT_RULE_LABEL
 from sentry.rules import EventState
+from sentry.rules.base import PREDICATE_COST_SNUBA
 from sentry.rules.conditions.base import EventCondition
 from sentry.types.condition_activity import (
     FREQUENCY_CONDITION_BUCKET_SIZE,
@@ -88,12 +89,29 @@ class EventFrequencyForm(forms.Form):
         return cleaned_data
 
 
+class FrequencyQueryBatch:
+    """
+    Frequency condition results shared by all the rules evaluated for one event.
+
+    Every condition in the batch measures its windows up to the same end
+    timestamp, so conditions of different rules with the same interval,
+    environment and comparison window resolve to the same query, which is only
+    sent to TSDB once.
+    """
+
+    def __init__(self, now: datetime | None = None) -> None:
+        self.now = now or timezone.now()
+        self.results: Dict[Tuple[str, datetime, datetime, str], int] = {}
+
+
 class BaseEventFrequencyCondition(EventCondition, abc.ABC):
     intervals = standard_intervals
     form_cls = EventFrequencyForm
+    predicate_cost = PREDICATE_COST_SNUBA
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.tsdb = kwargs.pop("tsdb", tsdb)
+        self.query_batch: FrequencyQueryBatch | None = kwargs.pop("query_batch", None)
         self.form_fields = {
             "value": {"type": "number", "placeholder": 100},
             "interval": {
@@ -162,14 +180,22 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         raise NotImplementedError
 
     def query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
+        condition_name = re.sub("(?!^)([A-Z]+)", r"_\1", self.__class__.__name__).lower()
+        batch_key = (self.id, start, end, environment_id)
+        if self.query_batch is not None and batch_key in self.query_batch.results:
+            metrics.incr("rules.conditions.batched_query", tags={"condition": condition_name})
+            return self.query_batch.results[batch_key]
+
         query_result = self.query_hook(event, start, end, environment_id)
         metrics.incr(
             "rules.conditions.queried_snuba",
             tags={
-                "condition": re.sub("(?!^)([A-Z]+)", r"_\1", self.__class__.__name__).lower(),
+                "condition": condition_name,
                 "is_created_on_project_creation": self.is_guessed_to_be_created_on_project_creation,
             },
         )
+        if self.query_batch is not None:
+            self.query_batch.results[batch_key] = query_result
         return query_result
 
     def query_hook(
@@ -180,7 +206,7 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
 
     def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
         _, duration = self.intervals[interval]
-        end = timezone.now()
+        end = self.query_batch.now if self.query_batch is not None else timezone.now()
         # For conditions with interval >= 1 hour we don't need to worry about read your writes
         # consistency. Disable it so that we can scale to more nodes.
         option_override_cm = contextlib.nullcontext()
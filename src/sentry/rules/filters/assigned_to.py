@@ -8,6 +8,7 @@ from sentry.eventstore.models import GroupEvent
 from sentry.mail.forms.assigned_to import AssignedToForm
 from sentry.notifications.types import ASSIGNEE_CHOICES, AssigneeTargetType
 from sentry.rules import EventState
+from sentry.rules.base import PREDICATE_COST_DATABASE
 from sentry.rules.filters.base import EventFilter
 from sentry.utils.cache import cache
 
@@ -19,6 +20,7 @@ if TYPE_CHECKING:
 
 class AssignedToFilter(EventFilter):
     id = "sentry.rules.filters.assigned_to.AssignedToFilter"
+    predicate_cost = PREDICATE_COST_DATABASE
     form_cls = AssignedToForm
     label = "The issue is assigned to {targetType}"
     prompt = "The issue is assigned to {no one/team/member}"
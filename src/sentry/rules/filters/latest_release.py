@@ -10,6 +10,7 @@ from sentry.models.environment import Environment
 from sentry.models.release import Release, ReleaseProject
 from sentry.models.releaseenvironment import ReleaseEnvironment
 from sentry.rules import EventState
+from sentry.rules.base import PREDICATE_COST_DATABASE
 from sentry.rules.filters.base import EventFilter
 from sentry.search.utils import get_latest_release
 from sentry.utils.cache import cache
@@ -50,6 +51,7 @@ def clear_release_project_cache(instance: ReleaseProject, **kwargs: Any) -> None
 
 class LatestReleaseFilter(EventFilter):
     id = "sentry.rules.filters.latest_release.LatestReleaseFilter"
+    predicate_cost = PREDICATE_COST_DATABASE
     label = "The event is from the latest release"
 
     def get_latest_release(self, event: GroupEvent) -> Release | None:
@@ -8,6 +8,7 @@ from typing import (
     Any,
     Callable,
     Collection,
+    Dict,
     List,
     Mapping,
     MutableMapping,
@@ -28,9 +29,12 @@ from sentry.models.rule import Rule
 from sentry.models.rulesnooze import RuleSnooze
 from sentry.rules import EventState, history, rules
 from sentry.rules.actions.base import EventAction
+from sentry.rules.base import PREDICATE_COST_MEMORY, PREDICATE_COST_SNUBA
 from sentry.rules.conditions.base import EventCondition
+from sentry.rules.conditions.event_frequency import BaseEventFrequencyCondition, FrequencyQueryBatch
 from sentry.rules.filters.base import EventFilter
 from sentry.types.rules import RuleFuture
+from sentry.utils import metrics
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
@@ -54,6 +58,53 @@ def is_condition_slow(condition: Mapping[str, str]) -> bool:
     return False
 
 
+def get_predicate_cost(condition: Mapping[str, Any]) -> int:
+    if is_condition_slow(condition):
+        return PREDICATE_COST_SNUBA
+    condition_cls = rules.get(condition["id"])
+    if condition_cls is None:
+        return PREDICATE_COST_MEMORY
+    cost: int = condition_cls.predicate_cost
+    return cost
+
+
+class PredicateStats:
+    """
+    Keeps track of how often each kind of condition or filter passes in this
+    process, which lets `RuleProcessor` evaluate the predicates most likely to
+    decide a rule first among predicates of the same cost.
+    """
+
+    # Below this many evaluations a predicate is assumed to pass half the time.
+    min_samples = 100
+
+    def __init__(self) -> None:
+        self._counts: Dict[str, List[int]] = {}
+
+    def record(self, predicate_id: str, passed: bool) -> None:
+        counts = self._counts.setdefault(predicate_id, [0, 0])
+        counts[0] += 1
+        if passed:
+            counts[1] += 1
+
+    def pass_rate(self, predicate_id: str) -> float:
+        evaluated, passed = self._counts.get(predicate_id, (0, 0))
+        if evaluated < self.min_samples:
+            return 0.5
+        return passed / evaluated
+
+
+predicate_stats = PredicateStats()
+
+
+def get_decisive_probability(condition: Mapping[str, Any], match: str) -> float:
+    """Probability that evaluating `condition` settles the outcome of its group."""
+    pass_rate = predicate_stats.pass_rate(condition["id"])
+    if match == "all":
+        return 1.0 - pass_rate
+    return pass_rate
+
+
 class RuleProcessor:
     logger = logging.getLogger("sentry.rules")
 
@@ -77,6 +128,7 @@ class RuleProcessor:
         self.grouped_futures: MutableMapping[
             str, Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]
         ] = {}
+        self.frequency_batch = FrequencyQueryBatch()
 
     def get_rules(self) -> Sequence[Rule]:
         """Get all of the rules for this project from the DB (or cache)."""
@@ -152,7 +204,11 @@ class RuleProcessor:
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
+        kwargs: Dict[str, Any] = {}
+        if issubclass(condition_cls, BaseEventFrequencyCondition):
+            # Frequency conditions of all rules share their queries for this event
+            kwargs["query_batch"] = self.frequency_batch
+        condition_inst = condition_cls(self.project, data=condition, rule=rule, **kwargs)
         if not isinstance(condition_inst, (EventCondition, EventFilter)):
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
@@ -164,6 +220,70 @@ class RuleProcessor:
         )
         return passes
 
+    def predicates_pass(
+        self,
+        predicate_groups: Sequence[Tuple[Sequence[dict[str, Any]], str, str]],
+        state: EventState,
+        rule: Rule,
+    ) -> bool:
+        """
+        Evaluates the filters and conditions of a rule, returning whether every
+        group of predicates passes according to its match.
+
+        Instead of going through the groups in order, all predicates are
+        evaluated cheapest first, and the ones most likely to decide their
+        group first among predicates of the same cost. A group stops being
+        evaluated as soon as its outcome is known, and the rule as soon as a
+        group fails, so slow frequency conditions are skipped whenever a
+        cheaper predicate already rejected the rule.
+        """
+        plan = []
+        remaining = []
+        for group_index, (predicate_list, match, name) in enumerate(predicate_groups):
+            remaining.append(len(predicate_list))
+            for predicate in predicate_list:
+                cost = get_predicate_cost(predicate)
+                plan.append(
+                    (cost, -get_decisive_probability(predicate, match), group_index, predicate)
+                )
+        plan.sort(key=lambda step: step[:2])
+
+        outcomes: Dict[int, bool] = {}
+        evaluated = 0
+        for cost, _, group_index, predicate in plan:
+            if group_index in outcomes:
+                continue
+            _, match, name = predicate_groups[group_index]
+
+            with metrics.timer("rules.predicate.duration", tags={"type": name, "cost": cost}):
+                passed = bool(self.condition_matches(predicate, state, rule))
+            evaluated += 1
+            predicate_stats.record(predicate["id"], passed)
+            metrics.incr(
+                "rules.predicate.evaluated",
+                tags={"type": name, "predicate": predicate["id"], "passed": passed},
+                skip_internal=True,
+            )
+
+            remaining[group_index] -= 1
+            if match == "all" and not passed:
+                outcomes[group_index] = False
+            elif match == "any" and passed:
+                outcomes[group_index] = True
+            elif match == "none" and passed:
+                outcomes[group_index] = False
+            elif not remaining[group_index]:
+                outcomes[group_index] = match != "any"
+
+            if outcomes.get(group_index) is False:
+                break
+
+        if evaluated < len(plan):
+            metrics.incr(
+                "rules.predicate.skipped", amount=len(plan) - evaluated, skip_internal=True
+            )
+        return all(outcomes.values())
+
     def get_rule_type(self, condition: Mapping[str, Any]) -> str | None:
         rule_cls = rules.get(condition["id"])
         if rule_cls is None:
@@ -226,21 +346,14 @@ class RuleProcessor:
             else:
                 filter_list.append(rule_cond)
 
-        # Sort `condition_list` so that most expensive conditions run last.
-        condition_list.sort(key=lambda condition: is_condition_slow(condition))
-
+        predicate_groups = []
         for predicate_list, match, name in (
             (filter_list, filter_match, "filter"),
             (condition_list, condition_match, "condition"),
         ):
             if not predicate_list:
                 continue
-            predicate_iter = (self.condition_matches(f, state, rule) for f in predicate_list)
-            predicate_func = get_match_function(match)
-            if predicate_func:
-                if not predicate_func(predicate_iter):
-                    return
-            else:
+            if get_match_function(match) is None:
                 self.logger.error(
                     f"Unsupported {name}_match {match!r} for rule {rule.id}",
                     filter_match,
@@ -248,6 +361,10 @@ class RuleProcessor:
                     extra={**logging_details},
                 )
                 return
+            predicate_groups.append((predicate_list, match, name))
+
+        if not self.predicates_pass(predicate_groups, state, rule):
+            return
 
         updated = (
             GroupRuleStatus.objects.filter(id=status.id)
@@ -314,6 +431,7 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
+        self.frequency_batch = FrequencyQueryBatch()
         rules = self.get_rules()
         snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
             "rule", flat=True
@@ -803,6 +803,12 @@ def monitors_consumer(**options):
 @strict_offset_reset_option()
 @click.option("--ingest-profile", required=True)
 @click.option("--indexer-db", default="postgres")
+@click.option(
+    "--flush-interval-ms",
+    default=10000,
+    type=int,
+    help="Time (in milliseconds) between updates of the last_seen of stale ids.",
+)
 def last_seen_updater(**options):
     from sentry.sentry_metrics.consumers.last_seen_updater import get_last_seen_updater
     from sentry.utils.metrics import global_tags
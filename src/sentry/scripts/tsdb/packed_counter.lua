@@ -0,0 +1,51 @@
+--[[
+
+Packed counter series.
+
+A packed series stores all buckets of a single (model, key, rollup,
+environment) counter in one Redis string. The string is a ring of ``slot``
+records, each made of two signed 64-bit integers (big endian, as addressed by
+``BITFIELD``):
+
+    [bucket number][count][bucket number][count]...
+
+The slot for a bucket is ``bucket % max_values``. When a slot is written for a
+newer bucket number than the one stored in it, the slot has wrapped around and
+the previous count is discarded. Writes for buckets older than the stored one
+are dropped, as the data they belong to has expired. Readers check the bucket
+number as well, so stale slots read as zero.
+
+Since a series key lives for as long as its newest bucket, the expiration time
+is only ever extended.
+
+KEYS[1]: the series key
+ARGV[1]: the expiration timestamp for the buckets being written
+ARGV[2]: the current timestamp
+ARGV[3...]: repeated (slot, bucket, count) triples
+
+]]--
+
+local key = KEYS[1]
+local expiry = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+
+for i = 3, #ARGV, 3 do
+    local slot = tonumber(ARGV[i])
+    local bucket = tonumber(ARGV[i + 1])
+    local count = tonumber(ARGV[i + 2])
+
+    local bucket_position = '#' .. (slot * 2)
+    local count_position = '#' .. (slot * 2 + 1)
+
+    local stored = redis.call('BITFIELD', key, 'GET', 'i64', bucket_position)[1]
+    if stored == bucket then
+        redis.call('BITFIELD', key, 'INCRBY', 'i64', count_position, count)
+    elseif stored < bucket then
+        redis.call('BITFIELD', key, 'SET', 'i64', bucket_position, bucket, 'SET', 'i64', count_position, count)
+    end
+end
+
+local ttl = redis.call('TTL', key)
+if ttl < 0 or ttl < expiry - now then
+    redis.call('EXPIREAT', key, expiry)
+end
@@ -0,0 +1,31 @@
+--[[
+
+Resets buckets of a packed counter series, see ``packed_counter.lua``.
+
+A slot is only reset if it still holds the bucket being deleted, so newer
+buckets that have since wrapped around into the slot are kept. Missing keys
+are left alone rather than being created zero-filled and without a TTL.
+
+KEYS[1]: the series key
+ARGV[1...]: repeated (slot, bucket) pairs
+
+]]--
+
+local key = KEYS[1]
+
+if redis.call('EXISTS', key) == 0 then
+    return
+end
+
+for i = 1, #ARGV, 2 do
+    local slot = tonumber(ARGV[i])
+    local bucket = tonumber(ARGV[i + 1])
+
+    local bucket_position = '#' .. (slot * 2)
+    local stored = redis.call('BITFIELD', key, 'GET', 'i64', bucket_position)[1]
+    if stored == bucket then
+        -- Resetting the bucket number makes the count read as zero, the same as
+        -- a missing hash field.
+        redis.call('BITFIELD', key, 'SET', 'i64', bucket_position, 0)
+    end
+end
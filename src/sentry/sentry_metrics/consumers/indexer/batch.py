@@ -1,10 +1,12 @@
 import logging
 import random
+from array import array
 from collections import defaultdict, deque
 from typing import (
     Any,
     Callable,
     Dict,
+    List,
     Mapping,
     MutableMapping,
     MutableSequence,
@@ -109,15 +111,14 @@ class IndexerBatch:
         (extract_strings and reconstruct_messages)
         """
         skipped_msgs_cnt: MutableMapping[str, int] = defaultdict(int)
+        disabled_namespaces = options.get("sentry-metrics.indexer.disabled-namespaces")
 
         for msg in self.outer_message.payload:
 
             assert isinstance(msg.value, BrokerValue)
             broker_meta = BrokerMeta(msg.value.partition, msg.value.offset)
 
-            if (namespace := self._extract_namespace(msg.payload.headers)) in options.get(
-                "sentry-metrics.indexer.disabled-namespaces"
-            ):
+            if (namespace := self._extract_namespace(msg.payload.headers)) in disabled_namespaces:
                 assert namespace
                 skipped_msgs_cnt[namespace] += 1
                 self.filtered_msg_meta.add(broker_meta)
@@ -355,26 +356,12 @@ class IndexerBatch:
                 continue
 
             if exceeded_org_quotas or exceeded_global_quotas:
-                metrics.incr(
-                    "sentry_metrics.indexer.process_messages.dropped_message",
-                    tags={
-                        "reason": "writes_limit",
-                        "string_type": "tags",
-                        "use_case_id": use_case_id.value,
-                    },
+                self._record_dropped_tags(
+                    use_case_id,
+                    len(mapping[use_case_id][org_id]),
+                    exceeded_global_quotas,
+                    exceeded_org_quotas,
                 )
-                if _should_sample_debug_log():
-                    logger.error(
-                        "process_messages.dropped_message",
-                        extra={
-                            "reason": "writes_limit",
-                            "string_type": "tags",
-                            "num_global_quotas": exceeded_global_quotas,
-                            "num_org_quotas": exceeded_org_quotas,
-                            "org_batch_size": len(mapping[use_case_id][org_id]),
-                            "use_case_id": use_case_id.value,
-                        },
-                    )
                 continue
 
             fetch_types_encountered = set()
@@ -390,100 +377,163 @@ class IndexerBatch:
 
             numeric_metric_id = mapping[use_case_id][org_id][metric_name]
             if numeric_metric_id is None:
-                metadata = bulk_record_meta[use_case_id][org_id].get(metric_name)
-                metrics.incr(
-                    "sentry_metrics.indexer.process_messages.dropped_message",
-                    tags={
-                        "reason": "missing_numeric_metric_id",
-                        "string_type": "metric_id",
-                        "use_case_id": use_case_id.value,
-                    },
+                self._record_dropped_metric_id(
+                    use_case_id,
+                    len(mapping[use_case_id][org_id]),
+                    bulk_record_meta[use_case_id][org_id].get(metric_name),
                 )
-
-                if _should_sample_debug_log():
-                    logger.error(
-                        "process_messages.dropped_message",
-                        extra={
-                            "string_type": "metric_id",
-                            "is_global_quota": bool(
-                                metadata
-                                and metadata.fetch_type_ext
-                                and metadata.fetch_type_ext.is_global
-                            ),
-                            "org_batch_size": len(mapping[use_case_id][org_id]),
-                            "use_case_id": use_case_id.value,
-                        },
-                    )
                 continue
 
-            new_payload_value: Mapping[str, Any]
+            new_messages.append(
+                self._build_output_message(
+                    message,
+                    old_payload_value,
+                    new_tags,
+                    output_message_meta,
+                    mapping_header_content,
+                    numeric_metric_id,
+                )
+            )
 
-            # timestamp when the message was produced to ingest-* topic,
-            # used for end-to-end latency metrics
-            sentry_received_timestamp = message.value.timestamp.timestamp()
+        self._record_message_stats()
+        return IndexerOutputMessageBatch(
+            new_messages,
+            deque(sorted(self.invalid_msg_meta)),
+            cogs_usage,
+        )
 
-            if self.__should_index_tag_values:
-                # Metrics don't support gauges (which use dicts), so assert value type
-                value = old_payload_value["value"]
-                assert isinstance(value, (int, float, list))
-                new_payload_v1: Metric = {
-                    "tags": new_tags,
-                    # XXX: relay actually sends this value unconditionally
-                    "retention_days": old_payload_value.get("retention_days", 90),
-                    "mapping_meta": output_message_meta,
-                    "use_case_id": old_payload_value["use_case_id"].value,
-                    "metric_id": numeric_metric_id,
-                    "org_id": old_payload_value["org_id"],
-                    "timestamp": old_payload_value["timestamp"],
-                    "project_id": old_payload_value["project_id"],
-                    "type": old_payload_value["type"],
-                    "value": value,
-                    "sentry_received_timestamp": sentry_received_timestamp,
-                }
-
-                new_payload_value = new_payload_v1
-            else:
-                # When sending tag values as strings, set the version on the payload
-                # to 2. This is used by the consumer to determine how to decode the
-                # tag values.
-                new_payload_v2: GenericMetric = {
-                    "tags": cast(Dict[str, str], new_tags),
-                    "version": 2,
-                    "retention_days": old_payload_value.get("retention_days", 90),
-                    "mapping_meta": output_message_meta,
-                    "use_case_id": old_payload_value["use_case_id"].value,
-                    "metric_id": numeric_metric_id,
-                    "org_id": old_payload_value["org_id"],
-                    "timestamp": old_payload_value["timestamp"],
-                    "project_id": old_payload_value["project_id"],
-                    "type": old_payload_value["type"],
-                    "value": old_payload_value["value"],
-                    "sentry_received_timestamp": sentry_received_timestamp,
-                }
-                if aggregation_option := get_aggregation_option(old_payload_value["name"]):
-                    new_payload_v2["aggregation_option"] = aggregation_option.value
-
-                new_payload_value = new_payload_v2
-
-            kafka_payload = KafkaPayload(
-                key=message.payload.key,
-                value=rapidjson.dumps(new_payload_value).encode(),
-                headers=[
-                    *message.payload.headers,
-                    ("mapping_sources", mapping_header_content),
-                    # XXX: type mismatch, but seems to work fine in prod
-                    ("metric_type", new_payload_value["type"]),  # type: ignore
-                ],
+    def _record_dropped_tags(
+        self,
+        use_case_id: UseCaseID,
+        org_batch_size: int,
+        exceeded_global_quotas: int,
+        exceeded_org_quotas: int,
+    ) -> None:
+        metrics.incr(
+            "sentry_metrics.indexer.process_messages.dropped_message",
+            tags={
+                "reason": "writes_limit",
+                "string_type": "tags",
+                "use_case_id": use_case_id.value,
+            },
+        )
+        if _should_sample_debug_log():
+            logger.error(
+                "process_messages.dropped_message",
+                extra={
+                    "reason": "writes_limit",
+                    "string_type": "tags",
+                    "num_global_quotas": exceeded_global_quotas,
+                    "num_org_quotas": exceeded_org_quotas,
+                    "org_batch_size": org_batch_size,
+                    "use_case_id": use_case_id.value,
+                },
             )
-            if self.is_output_sliced:
-                routing_payload = RoutingPayload(
-                    routing_header={"org_id": org_id},
-                    routing_message=kafka_payload,
-                )
-                new_messages.append(Message(message.value.replace(routing_payload)))
-            else:
-                new_messages.append(Message(message.value.replace(kafka_payload)))
 
+    def _record_dropped_metric_id(
+        self, use_case_id: UseCaseID, org_batch_size: int, metadata: Optional[Metadata]
+    ) -> None:
+        metrics.incr(
+            "sentry_metrics.indexer.process_messages.dropped_message",
+            tags={
+                "reason": "missing_numeric_metric_id",
+                "string_type": "metric_id",
+                "use_case_id": use_case_id.value,
+            },
+        )
+
+        if _should_sample_debug_log():
+            logger.error(
+                "process_messages.dropped_message",
+                extra={
+                    "string_type": "metric_id",
+                    "is_global_quota": bool(
+                        metadata and metadata.fetch_type_ext and metadata.fetch_type_ext.is_global
+                    ),
+                    "org_batch_size": org_batch_size,
+                    "use_case_id": use_case_id.value,
+                },
+            )
+
+    def _build_output_message(
+        self,
+        message: Message[KafkaPayload],
+        old_payload_value: ParsedMessage,
+        new_tags: Dict[str, Union[str, int]],
+        output_message_meta: Dict[str, Dict[str, str]],
+        mapping_header_content: bytes,
+        numeric_metric_id: int,
+    ) -> Message[Union[RoutingPayload, KafkaPayload]]:
+        assert isinstance(message.value, BrokerValue)
+        new_payload_value: Mapping[str, Any]
+
+        # timestamp when the message was produced to ingest-* topic,
+        # used for end-to-end latency metrics
+        sentry_received_timestamp = message.value.timestamp.timestamp()
+
+        if self.__should_index_tag_values:
+            # Metrics don't support gauges (which use dicts), so assert value type
+            value = old_payload_value["value"]
+            assert isinstance(value, (int, float, list))
+            new_payload_v1: Metric = {
+                "tags": new_tags,
+                # XXX: relay actually sends this value unconditionally
+                "retention_days": old_payload_value.get("retention_days", 90),
+                "mapping_meta": output_message_meta,
+                "use_case_id": old_payload_value["use_case_id"].value,
+                "metric_id": numeric_metric_id,
+                "org_id": old_payload_value["org_id"],
+                "timestamp": old_payload_value["timestamp"],
+                "project_id": old_payload_value["project_id"],
+                "type": old_payload_value["type"],
+                "value": value,
+                "sentry_received_timestamp": sentry_received_timestamp,
+            }
+
+            new_payload_value = new_payload_v1
+        else:
+            # When sending tag values as strings, set the version on the payload
+            # to 2. This is used by the consumer to determine how to decode the
+            # tag values.
+            new_payload_v2: GenericMetric = {
+                "tags": cast(Dict[str, str], new_tags),
+                "version": 2,
+                "retention_days": old_payload_value.get("retention_days", 90),
+                "mapping_meta": output_message_meta,
+                "use_case_id": old_payload_value["use_case_id"].value,
+                "metric_id": numeric_metric_id,
+                "org_id": old_payload_value["org_id"],
+                "timestamp": old_payload_value["timestamp"],
+                "project_id": old_payload_value["project_id"],
+                "type": old_payload_value["type"],
+                "value": old_payload_value["value"],
+                "sentry_received_timestamp": sentry_received_timestamp,
+            }
+            if aggregation_option := get_aggregation_option(old_payload_value["name"]):
+                new_payload_v2["aggregation_option"] = aggregation_option.value
+
+            new_payload_value = new_payload_v2
+
+        kafka_payload = KafkaPayload(
+            key=message.payload.key,
+            value=rapidjson.dumps(new_payload_value).encode(),
+            headers=[
+                *message.payload.headers,
+                ("mapping_sources", mapping_header_content),
+                # XXX: type mismatch, but seems to work fine in prod
+                ("metric_type", new_payload_value["type"]),  # type: ignore
+            ],
+        )
+        if self.is_output_sliced:
+            routing_payload = RoutingPayload(
+                routing_header={"org_id": old_payload_value["org_id"]},
+                routing_message=kafka_payload,
+            )
+            return Message(message.value.replace(routing_payload))
+        else:
+            return Message(message.value.replace(kafka_payload))
+
+    def _record_message_stats(self) -> None:
         for use_case_id in self.__message_count:
             metrics.incr(
                 "metrics_consumer.process_message.messages_seen",
@@ -500,6 +550,270 @@ class IndexerBatch:
                 self.__message_size_max[use_case_id],
                 tags={"use_case_id": use_case_id.value},
             )
+
+
+class _ResolvedOrgStrings:
+    """
+    The ids and fetch metadata of the interned strings of a batch, for one
+    use case and org. Every string is looked up once, no matter how many
+    messages of the batch it occurs in.
+    """
+
+    def __init__(
+        self,
+        strings: Sequence[str],
+        mapping: Mapping[str, Optional[int]],
+        meta: Mapping[str, Metadata],
+    ) -> None:
+        self.strings = strings
+        self.mapping = mapping
+        self.meta = meta
+        self.__ids: Dict[int, Optional[int]] = {}
+        self.__metadata: Dict[int, Optional[Metadata]] = {}
+
+    def id(self, string_id: int) -> Optional[int]:
+        """
+        Raises KeyError if the string was not resolved by the indexer.
+        """
+        try:
+            return self.__ids[string_id]
+        except KeyError:
+            id = self.__ids[string_id] = self.mapping[self.strings[string_id]]
+            return id
+
+    def metadata(self, string_id: int) -> Optional[Metadata]:
+        try:
+            return self.__metadata[string_id]
+        except KeyError:
+            metadata = self.__metadata[string_id] = self.meta.get(self.strings[string_id])
+            return metadata
+
+    def is_global_quota(self, string_id: int) -> bool:
+        metadata = self.metadata(string_id)
+        return bool(metadata and metadata.fetch_type_ext and metadata.fetch_type_ext.is_global)
+
+
+class ColumnarIndexerBatch(IndexerBatch):
+    """
+    An IndexerBatch that keeps the valid messages of the batch in columns:
+    one entry per message for the org id, use case id and metric name, and
+    flat arrays of tag keys and values indexed by per-message offsets.
+
+    Every metric name, tag key and tag value is interned into a pool of the
+    distinct strings of the batch, and the columns refer to strings by their
+    position in the pool. This way `extract_strings` only deals with ints
+    until the distinct strings of every org are collected, and
+    `reconstruct_messages` looks up the id and fetch metadata of every
+    distinct string once instead of once per message it appears in.
+    """
+
+    def __init__(
+        self,
+        outer_message: Message[MessageBatch],
+        should_index_tag_values: bool,
+        is_output_sliced: bool,
+        tags_validator: Callable[[Mapping[str, str]], bool],
+        schema_validator: Callable[[str, IngestMetric], None],
+    ) -> None:
+        self.__should_index_tag_values = should_index_tag_values
+
+        self.__strings: List[str] = []
+        self.__string_ids: Dict[str, int] = {}
+
+        self.__messages: List[Message[KafkaPayload]] = []
+        self.__broker_metas: List[BrokerMeta] = []
+        self.__org_ids: List[OrgId] = []
+        self.__use_case_ids: List[UseCaseID] = []
+        self.__name_ids = array("I")
+        self.__tag_offsets = array("I", [0])
+        self.__tag_key_ids = array("I")
+        self.__tag_value_ids = array("I")
+
+        super().__init__(
+            outer_message,
+            should_index_tag_values=should_index_tag_values,
+            is_output_sliced=is_output_sliced,
+            tags_validator=tags_validator,
+            schema_validator=schema_validator,
+        )
+
+    def __intern(self, string: str) -> int:
+        string_id = self.__string_ids.get(string)
+        if string_id is None:
+            string_id = self.__string_ids[string] = len(self.__strings)
+            self.__strings.append(string)
+        return string_id
+
+    def _extract_messages(self) -> None:
+        super()._extract_messages()
+
+        intern = self.__intern
+        for msg in self.outer_message.payload:
+            assert isinstance(msg.value, BrokerValue)
+            broker_meta = BrokerMeta(msg.value.partition, msg.value.offset)
+            parsed_payload = self.parsed_payloads_by_meta.get(broker_meta)
+            if parsed_payload is None:
+                continue
+
+            tags = parsed_payload.get("tags", {})
+            self.__messages.append(msg)
+            self.__broker_metas.append(broker_meta)
+            self.__org_ids.append(parsed_payload["org_id"])
+            self.__use_case_ids.append(parsed_payload["use_case_id"])
+            self.__name_ids.append(intern(parsed_payload["name"]))
+            self.__tag_key_ids.extend(map(intern, tags.keys()))
+            self.__tag_value_ids.extend(map(intern, tags.values()))
+            self.__tag_offsets.append(len(self.__tag_key_ids))
+
+    @metrics.wraps("process_messages.extract_strings")
+    def extract_strings(self) -> Mapping[UseCaseID, Mapping[OrgId, Set[str]]]:
+        string_ids: MutableMapping[Tuple[UseCaseID, OrgId], Set[int]] = defaultdict(set)
+        skipped_msg_meta = self.invalid_msg_meta | self.filtered_msg_meta
+        tag_offsets = self.__tag_offsets
+
+        for row, broker_meta in enumerate(self.__broker_metas):
+            if skipped_msg_meta and broker_meta in skipped_msg_meta:
+                continue
+
+            org_string_ids = string_ids[self.__use_case_ids[row], self.__org_ids[row]]
+            org_string_ids.add(self.__name_ids[row])
+            start, end = tag_offsets[row], tag_offsets[row + 1]
+            org_string_ids.update(self.__tag_key_ids[start:end])
+            if self.__should_index_tag_values:
+                org_string_ids.update(self.__tag_value_ids[start:end])
+
+        strings: Mapping[UseCaseID, MutableMapping[OrgId, Set[str]]] = defaultdict(dict)
+        pool = self.__strings
+        for (use_case_id, org_id), ids in string_ids.items():
+            strings[use_case_id][org_id] = {pool[string_id] for string_id in ids}
+
+        for use_case_id, org_mapping in strings.items():
+            metrics.gauge(
+                "process_messages.lookups_per_batch",
+                value=sum(len(parsed_strings) for parsed_strings in org_mapping.values()),
+                tags={"use_case": use_case_id.value},
+            )
+
+        return strings
+
+    @metrics.wraps("process_messages.reconstruct_messages")
+    def reconstruct_messages(
+        self,
+        mapping: Mapping[UseCaseID, Mapping[OrgId, Mapping[str, Optional[int]]]],
+        bulk_record_meta: Mapping[UseCaseID, Mapping[OrgId, Mapping[str, Metadata]]],
+    ) -> IndexerOutputMessageBatch:
+        new_messages: MutableSequence[Message[Union[RoutingPayload, KafkaPayload]]] = []
+        cogs_usage: MutableMapping[UseCaseID, int] = defaultdict(int)
+        resolved_by_org: Dict[Tuple[UseCaseID, OrgId], _ResolvedOrgStrings] = {}
+        skipped_msg_meta = self.invalid_msg_meta | self.filtered_msg_meta
+        tag_offsets = self.__tag_offsets
+        tag_key_ids = self.__tag_key_ids
+        tag_value_ids = self.__tag_value_ids
+        last_org_id: Optional[OrgId] = None
+
+        for row, message in enumerate(self.__messages):
+            broker_meta = self.__broker_metas[row]
+            if skipped_msg_meta and broker_meta in skipped_msg_meta:
+                continue
+            old_payload_value = self.parsed_payloads_by_meta.pop(broker_meta)
+
+            use_case_id = self.__use_case_ids[row]
+            org_id = last_org_id = self.__org_ids[row]
+            cogs_usage[use_case_id] += 1
+            start, end = tag_offsets[row], tag_offsets[row + 1]
+
+            new_tags: Dict[str, Union[str, int]] = {}
+            exceeded_global_quotas = 0
+            exceeded_org_quotas = 0
+
+            try:
+                resolved = resolved_by_org.get((use_case_id, org_id))
+                if resolved is None:
+                    resolved = resolved_by_org[use_case_id, org_id] = _ResolvedOrgStrings(
+                        self.__strings,
+                        mapping[use_case_id][org_id],
+                        bulk_record_meta[use_case_id][org_id],
+                    )
+
+                for key_id, value_id in zip(tag_key_ids[start:end], tag_value_ids[start:end]):
+                    new_k = resolved.id(key_id)
+                    if new_k is None:
+                        if resolved.is_global_quota(key_id):
+                            exceeded_global_quotas += 1
+                        else:
+                            exceeded_org_quotas += 1
+                        continue
+
+                    value_to_write: Union[int, str]
+                    if self.__should_index_tag_values:
+                        new_v = resolved.id(value_id)
+                        if new_v is None:
+                            if resolved.is_global_quota(value_id):
+                                exceeded_global_quotas += 1
+                            else:
+                                exceeded_org_quotas += 1
+                            continue
+                        value_to_write = new_v
+                    else:
+                        value_to_write = self.__strings[value_id]
+
+                    new_tags[str(new_k)] = value_to_write
+            except KeyError:
+                logger.error(
+                    "process_messages.key_error",
+                    extra={"tags": old_payload_value.get("tags", {})},
+                    exc_info=True,
+                )
+                continue
+
+            if exceeded_org_quotas or exceeded_global_quotas:
+                self._record_dropped_tags(
+                    use_case_id,
+                    len(resolved.mapping),
+                    exceeded_global_quotas,
+                    exceeded_org_quotas,
+                )
+                continue
+
+            name_id = self.__name_ids[row]
+            output_message_meta: Dict[str, Dict[str, str]] = defaultdict(dict)
+            fetch_types_encountered = set()
+            for string_id in {name_id, *tag_key_ids[start:end], *tag_value_ids[start:end]}:
+                metadata = resolved.metadata(string_id)
+                if metadata is not None:
+                    fetch_types_encountered.add(metadata.fetch_type)
+                    output_message_meta[metadata.fetch_type.value][
+                        str(metadata.id)
+                    ] = self.__strings[string_id]
+
+            mapping_header_content = bytes(
+                "".join(sorted(t.value for t in fetch_types_encountered)), "utf-8"
+            )
+
+            numeric_metric_id = resolved.id(name_id)
+            if numeric_metric_id is None:
+                self._record_dropped_metric_id(
+                    use_case_id, len(resolved.mapping), resolved.metadata(name_id)
+                )
+                continue
+
+            new_messages.append(
+                self._build_output_message(
+                    message,
+                    old_payload_value,
+                    new_tags,
+                    output_message_meta,
+                    mapping_header_content,
+                    numeric_metric_id,
+                )
+            )
+
+        # Only the last org of the batch would remain set after setting the
+        # tag for every message.
+        if last_org_id is not None:
+            sentry_sdk.set_tag("sentry_metrics.organization_id", last_org_id)
+
+        self._record_message_stats()
         return IndexerOutputMessageBatch(
             new_messages,
             deque(sorted(self.invalid_msg_meta)),
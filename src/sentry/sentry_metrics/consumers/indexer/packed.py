@@ -0,0 +1,250 @@
+"""
+Compact representations of the batches exchanged between the parallel
+indexer's main process and its subprocesses.
+
+Arroyo's multiprocessing step pickles every batch with pickle protocol 5 and
+copies out-of-band buffers into its shared memory blocks. A plain list of
+messages still pickles a `Message`, `BrokerValue`, timestamp and headers for
+every message, and hands over every payload value as a separate buffer.
+`PackedMessages` instead concatenates all payload values into a single
+buffer and stores the per-message fields in typed arrays, which are handed
+to pickle as a handful of out-of-band buffers. Only a small descriptor with
+the distinct partitions and headers of the batch is pickled in-band.
+"""
+
+from __future__ import annotations
+
+import itertools
+import pickle
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition
+
+from sentry.sentry_metrics.consumers.indexer.common import (
+    BrokerMeta,
+    IndexerOutputMessageBatch,
+    MessageBatch,
+)
+from sentry.sentry_metrics.consumers.indexer.routing_producer import RoutingPayload
+from sentry.sentry_metrics.use_case_id_registry import UseCaseID
+
+_EPOCH = datetime(1970, 1, 1)
+
+# (key, headers, tzinfo of the broker timestamp)
+_Envelope = Tuple[Optional[bytes], Tuple[Tuple[str, Any], ...], Optional[tzinfo]]
+
+Buffer = Union[bytes, bytearray, memoryview, array]
+
+
+def _typed_view(buffer: Buffer, typecode: str) -> memoryview:
+    return memoryview(buffer).cast("B").cast(typecode)
+
+
+class _Interner:
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self.__ids: Dict[Hashable, int] = {}
+
+    def intern(self, value: Hashable) -> int:
+        id = self.__ids.get(value)
+        if id is None:
+            id = self.__ids[value] = len(self.values)
+            self.values.append(value)
+        return id
+
+
+class PackedMessages:
+    """
+    A sequence of broker messages whose payload values live in one contiguous
+    buffer, indexed by an offset table.
+
+    When pickled with protocol 5, all buffers are exposed as `PickleBuffer`s,
+    which arroyo writes to its shared memory blocks and reads back as one
+    `bytes` object each, rather than pickling every message on its own.
+    Messages are rebuilt lazily when iterating over the batch.
+    """
+
+    def __init__(
+        self,
+        values: Buffer,
+        value_offsets: Buffer,
+        partition_ids: Buffer,
+        offsets: Buffer,
+        timestamps: Buffer,
+        envelope_ids: Buffer,
+        routing_ids: Buffer,
+        partitions: Sequence[Partition],
+        envelopes: Sequence[_Envelope],
+        routing_headers: Sequence[Tuple[Tuple[str, Any], ...]],
+    ) -> None:
+        self.values = values
+        self.value_offsets = value_offsets
+        self.partition_ids = partition_ids
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.envelope_ids = envelope_ids
+        self.routing_ids = routing_ids
+        self.partitions = partitions
+        self.envelopes = envelopes
+        self.routing_headers = routing_headers
+
+    @classmethod
+    def pack(
+        cls, messages: Sequence[Message[Union[KafkaPayload, RoutingPayload]]]
+    ) -> PackedMessages:
+        partitions = _Interner()
+        envelopes = _Interner()
+        routing_headers = _Interner()
+
+        values: MutableSequence[bytes] = []
+        partition_ids = array("I")
+        offsets = array("q")
+        timestamps = array("q")
+        envelope_ids = array("I")
+        routing_ids = array("i")
+
+        for message in messages:
+            assert isinstance(message.value, BrokerValue)
+            payload = message.payload
+            if isinstance(payload, RoutingPayload):
+                routing_ids.append(
+                    routing_headers.intern(tuple(sorted(payload.routing_header.items())))
+                )
+                payload = payload.routing_message
+            else:
+                routing_ids.append(-1)
+
+            timestamp = message.value.timestamp
+            values.append(payload.value)
+            partition_ids.append(partitions.intern(message.value.partition))
+            offsets.append(message.value.offset)
+            # Microseconds since the epoch of the wall clock time fit in an
+            # int64 and round trip exactly, the timezone goes in the envelope.
+            timestamps.append(
+                (timestamp.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+            )
+            envelope_ids.append(
+                envelopes.intern((payload.key, tuple(payload.headers), timestamp.tzinfo))
+            )
+
+        return cls(
+            values=b"".join(values),
+            value_offsets=array("Q", itertools.accumulate(len(value) for value in values)),
+            partition_ids=partition_ids,
+            offsets=offsets,
+            timestamps=timestamps,
+            envelope_ids=envelope_ids,
+            routing_ids=routing_ids,
+            partitions=partitions.values,
+            envelopes=envelopes.values,
+            routing_headers=routing_headers.values,
+        )
+
+    def __len__(self) -> int:
+        return len(_typed_view(self.value_offsets, "Q"))
+
+    def __iter__(self) -> Iterator[Message[Union[KafkaPayload, RoutingPayload]]]:
+        values = memoryview(self.values).cast("B")
+        value_offsets = _typed_view(self.value_offsets, "Q")
+        partition_ids = _typed_view(self.partition_ids, "I")
+        offsets = _typed_view(self.offsets, "q")
+        timestamps = _typed_view(self.timestamps, "q")
+        envelope_ids = _typed_view(self.envelope_ids, "I")
+        routing_ids = _typed_view(self.routing_ids, "i")
+
+        start = 0
+        for i, end in enumerate(value_offsets):
+            key, headers, tz = self.envelopes[envelope_ids[i]]
+            payload: Union[KafkaPayload, RoutingPayload] = KafkaPayload(
+                key, bytes(values[start:end]), list(headers)
+            )
+            start = end
+
+            routing_id = routing_ids[i]
+            if routing_id >= 0:
+                payload = RoutingPayload(
+                    routing_header=dict(self.routing_headers[routing_id]),
+                    routing_message=payload,
+                )
+
+            timestamp = _EPOCH + timedelta(microseconds=timestamps[i])
+            yield Message(
+                BrokerValue(
+                    payload,
+                    self.partitions[partition_ids[i]],
+                    offsets[i],
+                    timestamp.replace(tzinfo=tz) if tz is not None else timestamp,
+                )
+            )
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        buffers: Sequence[Any] = (
+            self.values,
+            self.value_offsets,
+            self.partition_ids,
+            self.offsets,
+            self.timestamps,
+            self.envelope_ids,
+            self.routing_ids,
+        )
+        if isinstance(protocol, int) and protocol >= 5:
+            buffers = [pickle.PickleBuffer(buffer) for buffer in buffers]
+        else:
+            buffers = [bytes(memoryview(buffer).cast("B")) for buffer in buffers]
+
+        return (
+            PackedMessages,
+            (*buffers, list(self.partitions), list(self.envelopes), list(self.routing_headers)),
+        )
+
+
+def pack_message_batch(message: Message[MessageBatch]) -> PackedMessages:
+    return PackedMessages.pack(
+        cast(Sequence[Message[Union[KafkaPayload, RoutingPayload]]], message.payload)
+    )
+
+
+def unpack_message_batch(packed: PackedMessages) -> MessageBatch:
+    return cast(MessageBatch, list(packed))
+
+
+@dataclass(frozen=True)
+class PackedIndexerOutputMessageBatch:
+    """
+    The packed counterpart of `IndexerOutputMessageBatch`, returned by the
+    subprocesses of the parallel indexer.
+    """
+
+    data: PackedMessages
+    invalid_msg_meta: Deque[BrokerMeta]
+    cogs_data: Mapping[UseCaseID, int]
+
+    @classmethod
+    def pack(cls, batch: IndexerOutputMessageBatch) -> PackedIndexerOutputMessageBatch:
+        return cls(
+            data=PackedMessages.pack(batch.data),
+            invalid_msg_meta=batch.invalid_msg_meta,
+            cogs_data=batch.cogs_data,
+        )
+
+    def unpack(self) -> IndexerOutputMessageBatch:
+        data: MutableSequence[Message[Union[RoutingPayload, KafkaPayload]]] = list(self.data)
+        return IndexerOutputMessageBatch(data, self.invalid_msg_meta, self.cogs_data)
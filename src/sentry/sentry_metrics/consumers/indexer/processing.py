@@ -8,13 +8,19 @@ from arroyo.types import Message
 from django.conf import settings
 from sentry_kafka_schemas.schema_types.ingest_metrics_v1 import IngestMetric
 
+from sentry import options
 from sentry.sentry_metrics.configuration import (
     IndexerStorage,
     MetricsIngestConfiguration,
     UseCaseKey,
 )
-from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch
+from sentry.sentry_metrics.consumers.indexer.batch import ColumnarIndexerBatch, IndexerBatch
 from sentry.sentry_metrics.consumers.indexer.common import IndexerOutputMessageBatch, MessageBatch
+from sentry.sentry_metrics.consumers.indexer.packed import (
+    PackedIndexerOutputMessageBatch,
+    PackedMessages,
+    unpack_message_batch,
+)
 from sentry.sentry_metrics.consumers.indexer.schema_validator import MetricsSchemaValidator
 from sentry.sentry_metrics.consumers.indexer.tags_validator import (
     GenericMetricsTagsValidator,
@@ -82,6 +88,17 @@ class MessageProcessor:
         ):
             return self._process_messages_impl(outer_message)
 
+    def process_packed_messages(
+        self, outer_message: Message[PackedMessages]
+    ) -> PackedIndexerOutputMessageBatch:
+        """
+        Variant of `process_messages` for the shared memory transport of the
+        parallel indexer, where both the input and the output batches are
+        packed into buffers instead of being pickled message by message.
+        """
+        batch = outer_message.replace(unpack_message_batch(outer_message.payload))
+        return PackedIndexerOutputMessageBatch.pack(self.process_messages(batch))
+
     def _process_messages_impl(
         self,
         outer_message: Message[MessageBatch],
@@ -115,7 +132,12 @@ class MessageProcessor:
         should_index_tag_values = self._config.should_index_tag_values
         is_output_sliced = self._config.is_output_sliced or False
 
-        batch = IndexerBatch(
+        batch_cls = (
+            ColumnarIndexerBatch
+            if options.get("sentry-metrics.indexer.columnar-batch")
+            else IndexerBatch
+        )
+        batch = batch_cls(
             outer_message,
             should_index_tag_values=should_index_tag_values,
             is_output_sliced=is_output_sliced,
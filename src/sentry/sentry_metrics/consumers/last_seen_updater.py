@@ -1,8 +1,9 @@
 import datetime
 import functools
+import time
 from abc import abstractmethod
 from datetime import timedelta
-from typing import Any, Callable, Mapping, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Set, Tuple, Type
 
 import rapidjson
 from arroyo.backends.kafka import KafkaConsumer, KafkaPayload
@@ -13,7 +14,7 @@ from arroyo.processing.strategies.commit import CommitOffsets
 from arroyo.processing.strategies.filter import FilterStep
 from arroyo.processing.strategies.reduce import Reduce
 from arroyo.processing.strategies.run_task import RunTask
-from arroyo.types import BaseValue, Commit, Message, Partition, Topic
+from arroyo.types import BaseValue, Commit, Message, Partition, Topic, Value
 from django.utils import timezone
 
 from sentry.sentry_metrics.configuration import MetricsIngestConfiguration
@@ -25,6 +26,9 @@ from sentry.utils import json
 
 MAPPING_META = "mapping_meta"
 
+# Only rows whose last_seen is older than this get updated
+STALE_LAST_SEEN_THRESHOLD = timedelta(hours=12)
+
 
 @functools.lru_cache(maxsize=10)
 def get_metrics():
@@ -74,11 +78,9 @@ def _update_stale_last_seen(
     if new_last_seen_time is None:
         new_last_seen_time = timezone.now()
 
-    # TODO: filter out ints that we've handled recently in memcache to reduce DB load
-    # we may not need a cache, we should see as we dial up the accept rate
     return int(
         table.objects.filter(
-            id__in=seen_ints, last_seen__lt=(timezone.now() - timedelta(hours=12))
+            id__in=seen_ints, last_seen__lt=(timezone.now() - STALE_LAST_SEEN_THRESHOLD)
         ).update(last_seen=new_last_seen_time)
     )
 
@@ -97,6 +99,137 @@ def retrieve_db_read_keys(message: Message[KafkaPayload]) -> Set[int]:
         return set()
 
 
+class LastSeenAccumulator:
+    """
+    Keeps track of when the last_seen of every id was last written (or found
+    to be fresh) by this consumer, so that ids that keep showing up in the
+    stream are only sent to postgres once per `stale_after`.
+
+    Entries are dropped once they are older than `stale_after`, as such ids
+    would be written again anyway. This bounds the memory used to the ids seen
+    within that window.
+    """
+
+    def __init__(self, stale_after: timedelta = STALE_LAST_SEEN_THRESHOLD) -> None:
+        self.__stale_after = stale_after.total_seconds()
+        self.__last_written: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.__last_written)
+
+    def stale(self, ids: Iterable[int], now: float) -> Set[int]:
+        """
+        Returns the ids whose last_seen may be older than `stale_after`.
+        """
+        threshold = now - self.__stale_after
+        last_written = self.__last_written
+        return {id for id in ids if id not in last_written or last_written[id] < threshold}
+
+    def record(self, ids: Iterable[int], now: float) -> None:
+        """
+        Records that the last_seen of `ids` is no older than `now`.
+
+        After an update, rows that were fresh and not updated have a last_seen
+        somewhere within `stale_after` of `now`. Treating them as written at
+        `now` delays their next write by at most `stale_after`.
+        """
+        self.__last_written.update(dict.fromkeys(ids, now))
+
+    def prune(self, now: float) -> None:
+        threshold = now - self.__stale_after
+        self.__last_written = {
+            id: written for id, written in self.__last_written.items() if written >= threshold
+        }
+
+
+class LastSeenUpdateStep(ProcessingStrategy[Set[int]]):
+    """
+    Collects the ids of incoming batches that are stale according to the
+    accumulator, and updates them all with a single statement every
+    `flush_interval` seconds. Offsets are only committed after the update
+    that covers them.
+    """
+
+    def __init__(
+        self,
+        table: Type[IndexerTable],
+        accumulator: LastSeenAccumulator,
+        flush_interval: float,
+        metrics: Any,
+        next_step: ProcessingStrategy[Set[int]],
+    ) -> None:
+        self.__table = table
+        self.__accumulator = accumulator
+        self.__flush_interval = flush_interval
+        self.__metrics = metrics
+        self.__next_step = next_step
+
+        self.__pending: Set[int] = set()
+        self.__committable: Dict[Partition, int] = {}
+        self.__deadline: Optional[float] = None
+        self.__closed = False
+
+    def submit(self, message: Message[Set[int]]) -> None:
+        assert not self.__closed
+
+        now = time.time()
+        seen_ints = message.payload
+        stale_ints = self.__accumulator.stale(seen_ints, now)
+        self.__metrics.incr(
+            "last_seen_updater.skipped_fresh_keys", amount=len(seen_ints) - len(stale_ints)
+        )
+        self.__pending.update(stale_ints)
+
+        # Only the offsets are needed to commit once the ids have been written.
+        # Batches may span different partitions, keep the highest offset of each.
+        for partition, offset in message.committable.items():
+            self.__committable[partition] = max(offset, self.__committable.get(partition, offset))
+        if self.__deadline is None:
+            self.__deadline = now + self.__flush_interval
+
+    def poll(self) -> None:
+        self.__next_step.poll()
+
+        if self.__deadline is not None and time.time() >= self.__deadline:
+            self.__flush()
+
+    def __flush(self) -> None:
+        if self.__pending:
+            keys_to_pass_to_update = len(self.__pending)
+            logger.debug(f"{keys_to_pass_to_update} unique keys seen")
+            self.__metrics.incr(
+                "last_seen_updater.unique_update_candidate_keys", amount=keys_to_pass_to_update
+            )
+            with self.__metrics.timer("last_seen_updater.postgres_time"):
+                update_count = _update_stale_last_seen(self.__table, self.__pending)
+            self.__metrics.incr("last_seen_updater.updated_rows_count", amount=update_count)
+            logger.debug(f"{update_count} keys updated")
+
+            now = time.time()
+            self.__accumulator.prune(now)
+            self.__accumulator.record(self.__pending, now)
+            self.__metrics.gauge("last_seen_updater.accumulator_size", len(self.__accumulator))
+
+        if self.__committable:
+            self.__next_step.submit(Message(Value(set(), self.__committable)))
+
+        self.__pending = set()
+        self.__committable = {}
+        self.__deadline = None
+
+    def close(self) -> None:
+        self.__closed = True
+
+    def terminate(self) -> None:
+        self.__closed = True
+        self.__next_step.terminate()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self.__flush()
+        self.__next_step.close()
+        self.__next_step.join(timeout)
+
+
 class LastSeenUpdaterStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
     def __init__(
         self,
@@ -104,6 +237,7 @@ class LastSeenUpdaterStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         max_batch_time: float,
         ingest_profile: str,
         indexer_db: str,
+        flush_interval_ms: int = 10000,
     ) -> None:
         from sentry.sentry_metrics.configuration import (
             IndexerStorage,
@@ -118,6 +252,10 @@ class LastSeenUpdaterStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         self.__max_batch_time = max_batch_time
         self.__metrics = get_metrics()
         self.__prefilter = LastSeenUpdaterMessageFilter(metrics=self.__metrics)
+        self.__flush_interval = flush_interval_ms / 1000
+        # Shared by all assignments of this consumer, so that ids that were
+        # written recently aren't written again after a rebalance
+        self.__accumulator = LastSeenAccumulator()
 
     def __should_accept(self, message: Message[KafkaPayload]) -> bool:
         return not self.__prefilter.should_drop(message)
@@ -133,26 +271,18 @@ class LastSeenUpdaterStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
 
         initial_value: Callable[[], Set[int]] = lambda: set()
 
-        def do_update(message: Message[Set[int]]) -> None:
-            table = TABLE_MAPPING[self.__use_case_id]
-            seen_ints = message.payload
-
-            keys_to_pass_to_update = len(seen_ints)
-            logger.debug(f"{keys_to_pass_to_update} unique keys seen")
-            self.__metrics.incr(
-                "last_seen_updater.unique_update_candidate_keys", amount=keys_to_pass_to_update
-            )
-            with self.__metrics.timer("last_seen_updater.postgres_time"):
-                update_count = _update_stale_last_seen(table, seen_ints)
-            self.__metrics.incr("last_seen_updater.updated_rows_count", amount=update_count)
-            logger.debug(f"{update_count} keys updated")
-
         collect_step: Reduce[Set[int], Set[int]] = Reduce(
             self.__max_batch_size,
             self.__max_batch_time,
             accumulator,
             initial_value,
-            RunTask(do_update, CommitOffsets(commit)),
+            LastSeenUpdateStep(
+                table=TABLE_MAPPING[self.__use_case_id],
+                accumulator=self.__accumulator,
+                flush_interval=self.__flush_interval,
+                metrics=self.__metrics,
+                next_step=CommitOffsets(commit),
+            ),
         )
 
         transform_step = RunTask(retrieve_db_read_keys, collect_step)
@@ -167,6 +297,7 @@ def get_last_seen_updater(
     strict_offset_reset: bool,
     ingest_profile: str,
     indexer_db: str,
+    flush_interval_ms: int = 10000,
 ) -> Tuple[MetricsIngestConfiguration, StreamProcessor[KafkaPayload]]:
     """
     The last_seen updater uses output from the metrics indexer to update the
@@ -180,6 +311,7 @@ def get_last_seen_updater(
         indexer_db=indexer_db,
         max_batch_size=max_batch_size,
         max_batch_time=max_batch_time,
+        flush_interval_ms=flush_interval_ms,
     )
 
     return processing_factory.config, StreamProcessor(
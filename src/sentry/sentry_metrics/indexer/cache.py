@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
+import time
 from datetime import datetime
-from typing import Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Callable, Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
 
+from cachetools import TLRUCache
 from django.conf import settings
 from django.core.cache import caches
 
@@ -30,12 +33,14 @@ _INDEXER_CACHE_RESOLVE_METRIC = "sentry_metrics.indexer.memcache.resolve"
 _INDEXER_CACHE_RESOLVE_CACHE_REPLENISHMENT_METRIC = (
     "sentry_metrics.indexer.memcache.resolve.replenish"
 )
+_INDEXER_LOCAL_CACHE_BULK_RECORD_METRIC = "sentry_metrics.indexer.local_cache"
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
 
 
 NAMESPACED_WRITE_FEAT_FLAG = "sentry-metrics.indexer.write-new-cache-namespace"
 NAMESPACED_READ_FEAT_FLAG = "sentry-metrics.indexer.read-new-cache-namespace"
+LOCAL_CACHE_FEAT_FLAG = "sentry-metrics.indexer.local-cache.enabled"
 
 BULK_RECORD_CACHE_NAMESPACE = "br"
 RESOLVE_CACHE_NAMESPACE = "res"
@@ -187,10 +192,86 @@ class StringIndexerCache:
             )
 
 
+class LocalStringIndexerCache:
+    """
+    A bounded, per-process LRU of "use_case_id:org_id:string" keys to ids
+    that sits in front of the shared StringIndexerCache.
+
+    A small set of metric names and tag keys makes up most lookups, so
+    keeping them in memory saves a round trip to the shared cache for
+    most of every batch. Entries expire after the same randomized ttl
+    as the shared cache so that they don't all expire at once either.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        shared_cache: StringIndexerCache,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.shared_cache = shared_cache
+        self.cache: TLRUCache[str, int] = TLRUCache(
+            maxsize=maxsize, ttu=self._time_to_use, timer=timer
+        )
+        self.lock = threading.Lock()
+
+    def _time_to_use(self, key: str, value: int, now: float) -> float:
+        return now + self.shared_cache.randomized_ttl
+
+    def get_many(self, keys: Iterable[str]) -> MutableMapping[str, int]:
+        with self.lock:
+            results = {}
+            for key in keys:
+                value = self.cache.get(key)
+                if value is not None:
+                    results[key] = value
+            return results
+
+    def set_many(self, key_values: Mapping[str, int]) -> None:
+        with self.lock:
+            self.cache.update(key_values)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.cache.clear()
+
+
 class CachingIndexer(StringIndexer):
-    def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
+    def __init__(
+        self,
+        cache: StringIndexerCache,
+        indexer: StringIndexer,
+        local_cache_size: Optional[int] = None,
+    ) -> None:
         self.cache = cache
         self.indexer = indexer
+        if local_cache_size is None:
+            local_cache_size = settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE
+        self.local_cache = (
+            LocalStringIndexerCache(local_cache_size, cache) if local_cache_size > 0 else None
+        )
+
+    def _get_many_from_local_cache(self, keys: Sequence[str]) -> Mapping[str, int]:
+        if self.local_cache is None or not options.get(LOCAL_CACHE_FEAT_FLAG):
+            return {}
+
+        local_results = self.local_cache.get_many(keys)
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_BULK_RECORD_METRIC,
+            tags={"cache_hit": "true", "caller": "get_many_ids"},
+            amount=len(local_results),
+        )
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_BULK_RECORD_METRIC,
+            tags={"cache_hit": "false", "caller": "get_many_ids"},
+            amount=len(keys) - len(local_results),
+        )
+        return local_results
+
+    def _set_many_in_local_cache(self, key_values: Mapping[str, int]) -> None:
+        if self.local_cache is None or not key_values or not options.get(LOCAL_CACHE_FEAT_FLAG):
+            return
+        self.local_cache.set_many(key_values)
 
     def bulk_record(
         self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
@@ -199,9 +280,18 @@ class CachingIndexer(StringIndexer):
         cache_keys = UseCaseKeyCollection(strings)
         metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
         cache_key_strs = cache_keys.as_strings()
-        cache_results = self.cache.get_many(BULK_RECORD_CACHE_NAMESPACE, cache_key_strs)
+        local_results = self._get_many_from_local_cache(cache_key_strs)
+        if local_results:
+            cache_key_strs = [k for k in cache_key_strs if k not in local_results]
+
+        cache_results = (
+            self.cache.get_many(BULK_RECORD_CACHE_NAMESPACE, cache_key_strs)
+            if cache_key_strs
+            else {}
+        )
 
-        hits = [k for k, v in cache_results.items() if v is not None]
+        hits = {k: v for k, v in cache_results.items() if v is not None}
+        self._set_many_in_local_cache(hits)
 
         # record all the cache hits we had
         metrics.incr(
@@ -223,7 +313,8 @@ class CachingIndexer(StringIndexer):
 
         cache_key_results = UseCaseKeyResults()
         cache_key_results.add_use_case_key_results(
-            [UseCaseKeyResult.from_string(k, v) for k, v in cache_results.items() if v is not None],
+            [UseCaseKeyResult.from_string(k, v) for k, v in local_results.items()]
+            + [UseCaseKeyResult.from_string(k, v) for k, v in hits.items()],
             FetchType.CACHE_HIT,
         )
 
@@ -239,9 +330,9 @@ class CachingIndexer(StringIndexer):
             }
         )
 
-        self.cache.set_many(
-            BULK_RECORD_CACHE_NAMESPACE, db_record_key_results.get_mapped_strings_to_ints()
-        )
+        db_mapped_strings = db_record_key_results.get_mapped_strings_to_ints()
+        self.cache.set_many(BULK_RECORD_CACHE_NAMESPACE, db_mapped_strings)
+        self._set_many_in_local_cache(db_mapped_strings)
 
         return cache_key_results.merge(db_record_key_results)
 
@@ -1,6 +1,6 @@
 import logging
 from datetime import timezone
-from typing import Callable, Dict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 import sentry_sdk
 from dateutil.parser import parse as parse_date
@@ -8,16 +8,21 @@ from sentry_kafka_schemas.codecs import Codec, ValidationError
 from sentry_kafka_schemas.schema_types.events_subscription_results_v1 import SubscriptionResult
 
 from sentry.incidents.utils.types import SubscriptionUpdate
+from sentry.models.project import Project
 from sentry.snuba.dataset import EntityKey
-from sentry.snuba.models import QuerySubscription
+from sentry.snuba.models import QuerySubscription, SnubaQuery
 from sentry.snuba.query_subscriptions.constants import topic_to_dataset
 from sentry.snuba.tasks import _delete_from_snuba
 from sentry.utils import metrics
 
 logger = logging.getLogger(__name__)
 TQuerySubscriptionCallable = Callable[[SubscriptionUpdate, QuerySubscription], None]
+TQuerySubscriptionBatchCallable = Callable[
+    [Sequence[Tuple[SubscriptionUpdate, QuerySubscription]]], None
+]
 
 subscriber_registry: Dict[str, TQuerySubscriptionCallable] = {}
+batch_subscriber_registry: Dict[str, TQuerySubscriptionBatchCallable] = {}
 
 
 def register_subscriber(
@@ -32,6 +37,24 @@ def register_subscriber(
     return inner
 
 
+def register_batch_subscriber(
+    subscriber_key: str,
+) -> Callable[[TQuerySubscriptionBatchCallable], TQuerySubscriptionBatchCallable]:
+    """
+    Registers a callback that is passed all updates of a consumer batch for
+    subscriptions of `subscriber_key` at once, see `handle_message_batch`. A callback
+    must also be registered with `register_subscriber` for the type.
+    """
+
+    def inner(func: TQuerySubscriptionBatchCallable) -> TQuerySubscriptionBatchCallable:
+        if subscriber_key in batch_subscriber_registry:
+            raise Exception("Batch handler already registered for %s" % subscriber_key)
+        batch_subscriber_registry[subscriber_key] = func
+        return func
+
+    return inner
+
+
 def parse_message_value(value: bytes, jsoncodec: Codec[SubscriptionResult]) -> SubscriptionUpdate:
     """
     Parses the value received via the Kafka consumer and verifies that it
@@ -59,6 +82,94 @@ def parse_message_value(value: bytes, jsoncodec: Codec[SubscriptionResult]) -> S
     }
 
 
+def _parse_update(
+    message_value: bytes,
+    message_offset: int,
+    message_partition: int,
+    dataset: str,
+    jsoncodec: Codec[SubscriptionResult],
+) -> Optional[SubscriptionUpdate]:
+    try:
+        with metrics.timer("snuba_query_subscriber.parse_message_value", tags={"dataset": dataset}):
+            return parse_message_value(message_value, jsoncodec)
+    except InvalidMessageError:
+        # If the message is in an invalid format, just log the error
+        # and continue
+        logger.exception(
+            "Subscription update could not be parsed",
+            extra={
+                "offset": message_offset,
+                "partition": message_partition,
+                "value": message_value,
+            },
+        )
+        return None
+
+
+def _handle_missing_subscription(
+    contents: SubscriptionUpdate,
+    message_value: bytes,
+    message_offset: int,
+    message_partition: int,
+    topic: str,
+    dataset: str,
+) -> None:
+    metrics.incr("snuba_query_subscriber.subscription_doesnt_exist", tags={"dataset": dataset})
+    logger.warning(
+        "Received subscription update, but subscription does not exist",
+        extra={
+            "offset": message_offset,
+            "partition": message_partition,
+            "value": message_value,
+        },
+    )
+    try:
+        if topic in topic_to_dataset:
+            _delete_from_snuba(
+                topic_to_dataset[topic],
+                contents["subscription_id"],
+                EntityKey(contents["entity"]),
+            )
+        else:
+            logger.error(
+                "Topic not registered with QuerySubscriptionConsumer, can't remove "
+                "non-existent subscription from Snuba",
+                extra={"topic": topic, "subscription_id": contents["subscription_id"]},
+            )
+    except InvalidMessageError as e:
+        logger.exception(e)
+    except Exception:
+        logger.exception("Failed to delete unused subscription from snuba.")
+
+
+def _should_handle(
+    subscription: QuerySubscription,
+    message_value: bytes,
+    message_offset: int,
+    message_partition: int,
+    dataset: str,
+) -> bool:
+    if subscription.status != QuerySubscription.Status.ACTIVE.value:
+        metrics.incr("snuba_query_subscriber.subscription_inactive")
+        return False
+
+    if subscription.type not in subscriber_registry:
+        metrics.incr(
+            "snuba_query_subscriber.subscription_type_not_registered", tags={"dataset": dataset}
+        )
+        logger.error(
+            "Received subscription update, but no subscription handler registered",
+            extra={
+                "offset": message_offset,
+                "partition": message_partition,
+                "value": message_value,
+            },
+        )
+        return False
+
+    return True
+
+
 def handle_message(
     message_value: bytes,
     message_offset: int,
@@ -75,22 +186,10 @@ def handle_message(
     :return:
     """
     with sentry_sdk.push_scope() as scope:
-        try:
-            with metrics.timer(
-                "snuba_query_subscriber.parse_message_value", tags={"dataset": dataset}
-            ):
-                contents = parse_message_value(message_value, jsoncodec)
-        except InvalidMessageError:
-            # If the message is in an invalid format, just log the error
-            # and continue
-            logger.exception(
-                "Subscription update could not be parsed",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
-            )
+        contents = _parse_update(
+            message_value, message_offset, message_partition, dataset, jsoncodec
+        )
+        if contents is None:
             return
         scope.set_tag("query_subscription_id", contents["subscription_id"])
 
@@ -101,52 +200,15 @@ def handle_message(
                 subscription: QuerySubscription = QuerySubscription.objects.get_from_cache(
                     subscription_id=contents["subscription_id"]
                 )
-                if subscription.status != QuerySubscription.Status.ACTIVE.value:
-                    metrics.incr("snuba_query_subscriber.subscription_inactive")
-                    return
         except QuerySubscription.DoesNotExist:
-            metrics.incr(
-                "snuba_query_subscriber.subscription_doesnt_exist", tags={"dataset": dataset}
-            )
-            logger.warning(
-                "Received subscription update, but subscription does not exist",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
+            _handle_missing_subscription(
+                contents, message_value, message_offset, message_partition, topic, dataset
             )
-            try:
-                if topic in topic_to_dataset:
-                    _delete_from_snuba(
-                        topic_to_dataset[topic],
-                        contents["subscription_id"],
-                        EntityKey(contents["entity"]),
-                    )
-                else:
-                    logger.error(
-                        "Topic not registered with QuerySubscriptionConsumer, can't remove "
-                        "non-existent subscription from Snuba",
-                        extra={"topic": topic, "subscription_id": contents["subscription_id"]},
-                    )
-            except InvalidMessageError as e:
-                logger.exception(e)
-            except Exception:
-                logger.exception("Failed to delete unused subscription from snuba.")
             return
 
-        if subscription.type not in subscriber_registry:
-            metrics.incr(
-                "snuba_query_subscriber.subscription_type_not_registered", tags={"dataset": dataset}
-            )
-            logger.error(
-                "Received subscription update, but no subscription handler registered",
-                extra={
-                    "offset": message_offset,
-                    "partition": message_partition,
-                    "value": message_value,
-                },
-            )
+        if not _should_handle(
+            subscription, message_value, message_offset, message_partition, dataset
+        ):
             return
 
         sentry_sdk.set_tag("project_id", subscription.project_id)
@@ -171,6 +233,121 @@ def handle_message(
             callback(contents, subscription)
 
 
+def handle_message_batch(
+    messages: Sequence[Tuple[bytes, int, int]],
+    topic: str,
+    dataset: str,
+    jsoncodec: Codec[SubscriptionResult],
+) -> None:
+    """
+    Like `handle_message`, but for a batch of `(value, offset, partition)` messages.
+    Subscriptions, their queries and projects are fetched in bulk, and updates are
+    grouped by subscription type. Types registered with `register_batch_subscriber`
+    get all of their updates in one call, others are passed to their callback one
+    update at a time, in the order they were received.
+    """
+    parsed = []
+    for message_value, message_offset, message_partition in messages:
+        contents = _parse_update(
+            message_value, message_offset, message_partition, dataset, jsoncodec
+        )
+        if contents is not None:
+            parsed.append((contents, message_value, message_offset, message_partition))
+
+    with metrics.timer("snuba_query_subscriber.fetch_subscriptions", tags={"dataset": dataset}):
+        subscriptions: Dict[str, QuerySubscription] = {
+            subscription.subscription_id: subscription
+            for subscription in QuerySubscription.objects.get_many_from_cache(
+                list({contents["subscription_id"] for contents, _, _, _ in parsed}),
+                key="subscription_id",
+            )
+        }
+
+    updates_by_type: Dict[str, List[Tuple[SubscriptionUpdate, QuerySubscription]]] = {}
+    for contents, message_value, message_offset, message_partition in parsed:
+        subscription = subscriptions.get(contents["subscription_id"])
+        if subscription is None:
+            _handle_missing_subscription(
+                contents, message_value, message_offset, message_partition, topic, dataset
+            )
+            continue
+
+        if _should_handle(subscription, message_value, message_offset, message_partition, dataset):
+            updates_by_type.setdefault(subscription.type, []).append((contents, subscription))
+
+    with metrics.timer("snuba_query_subscriber.fetch_related", tags={"dataset": dataset}):
+        _prefetch_related(
+            [subscription for updates in updates_by_type.values() for _, subscription in updates]
+        )
+
+    for subscription_type, updates in updates_by_type.items():
+        metrics.incr(
+            "snuba_query_subscriber.batch.updates",
+            amount=len(updates),
+            instance=subscription_type,
+            tags={"dataset": dataset},
+        )
+        with sentry_sdk.start_span(op="process_message_batch") as span, metrics.timer(
+            "snuba_query_subscriber.callback.duration",
+            instance=subscription_type,
+            tags={"dataset": dataset},
+        ):
+            span.set_data("subscription_type", subscription_type)
+            span.set_data("updates", len(updates))
+
+            batch_callback = batch_subscriber_registry.get(subscription_type)
+            if batch_callback is not None:
+                try:
+                    batch_callback(updates)
+                except Exception:
+                    logger.exception(
+                        "Failed to handle subscription updates in batch",
+                        extra={"subscription_type": subscription_type, "updates": len(updates)},
+                    )
+                continue
+
+            callback = subscriber_registry[subscription_type]
+            for contents, subscription in updates:
+                # An update failing shouldn't drop the rest of the batch, like it wouldn't
+                # when messages are handled one at a time
+                try:
+                    callback(contents, subscription)
+                except Exception:
+                    logger.exception(
+                        "Failed to handle subscription update",
+                        extra={
+                            "subscription_type": subscription_type,
+                            "subscription_id": contents["subscription_id"],
+                        },
+                    )
+
+
+def _prefetch_related(subscriptions: Sequence[QuerySubscription]) -> None:
+    """
+    Attaches the snuba queries and projects of `subscriptions`, so that callbacks
+    don't fetch them one subscription at a time.
+    """
+    if not subscriptions:
+        return
+
+    snuba_queries = SnubaQuery.objects.in_bulk(
+        {subscription.snuba_query_id for subscription in subscriptions}
+    )
+    projects = {
+        project.id: project
+        for project in Project.objects.get_many_from_cache(
+            list({subscription.project_id for subscription in subscriptions})
+        )
+    }
+    for subscription in subscriptions:
+        snuba_query = snuba_queries.get(subscription.snuba_query_id)
+        if snuba_query is not None:
+            subscription.snuba_query = snuba_query
+        project = projects.get(subscription.project_id)
+        if project is not None:
+            subscription.project = project
+
+
 class InvalidMessageError(Exception):
     pass
 
@@ -10,11 +10,13 @@ from arroyo.backends.kafka.consumer import KafkaConsumer, KafkaPayload
 from arroyo.commit import ONCE_PER_SECOND
 from arroyo.processing.processor import StreamProcessor
 from arroyo.processing.strategies import (
+    BatchStep,
     CommitOffsets,
     ProcessingStrategy,
     ProcessingStrategyFactory,
     RunTask,
 )
+from arroyo.processing.strategies.batching import ValuesBatch
 from arroyo.types import BrokerValue, Commit, Message, Partition
 from sentry_kafka_schemas import get_codec
 
@@ -35,6 +37,7 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         input_block_size: int,
         output_block_size: int,
         multi_proc: bool = True,
+        batched: bool = False,
     ):
         self.topic = topic
         self.dataset = topic_to_dataset[self.topic]
@@ -45,12 +48,28 @@ class QuerySubscriptionStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         self.input_block_size = input_block_size
         self.output_block_size = output_block_size
         self.multi_proc = multi_proc
+        # Updates are handled in batches of up to `max_batch_size` messages or
+        # `max_batch_time` seconds. Offsets of a batch are committed once the
+        # whole batch is handled.
+        self.batched = batched
+        if batched and max_batch_size is None:
+            raise ValueError("--batched requires --max-batch-size")
 
     def create_with_partitions(
         self,
         commit: Commit,
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
+        if self.batched:
+            batch_callable = partial(
+                process_message_batch, self.dataset, self.topic, self.logical_topic
+            )
+            return BatchStep(
+                max_batch_size=self.max_batch_size,
+                max_batch_time=self.max_batch_time,
+                next_step=RunTask(batch_callable, CommitOffsets(commit)),
+            )
+
         callable = partial(process_message, self.dataset, self.topic, self.logical_topic)
         if self.multi_proc:
             return RunTaskWithMultiprocessing(
@@ -106,6 +125,43 @@ def process_message(
             )
 
 
+def process_message_batch(
+    dataset: Dataset,
+    topic: str,
+    logical_topic: str,
+    message: Message[ValuesBatch[KafkaPayload]],
+) -> None:
+    from sentry import options
+    from sentry.snuba.query_subscriptions.consumer import handle_message_batch
+    from sentry.utils import metrics
+
+    messages = []
+    for value in message.payload:
+        assert isinstance(value, BrokerValue)
+        messages.append((value.payload.value, value.offset, value.partition.index))
+
+    with sentry_sdk.start_transaction(
+        op="handle_message_batch",
+        name="query_subscription_consumer_process_message_batch",
+        sampled=random() <= options.get("subscriptions-query.sample-rate"),
+    ), metrics.timer(
+        "snuba_query_subscriber.handle_message_batch", tags={"dataset": dataset.value}
+    ):
+        try:
+            handle_message_batch(messages, topic, dataset.value, get_codec(logical_topic))
+        except Exception:
+            # Same failsafe as `process_message`, for the parts of a batch that aren't
+            # handled per subscription type.
+            logger.exception(
+                "Unexpected error while handling message batch in QuerySubscriptionStrategy. Skipping batch.",
+                extra={
+                    "first_offset": messages[0][1] if messages else None,
+                    "last_offset": messages[-1][1] if messages else None,
+                    "messages": len(messages),
+                },
+            )
+
+
 def get_query_subscription_consumer(
     topic: str,
     group_id: str,
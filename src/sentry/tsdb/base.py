@@ -1,3 +1,4 @@
+import itertools
 from collections.abc import Callable
 from datetime import timedelta
 from enum import Enum
@@ -249,13 +250,17 @@ class BaseTSDB(Service):
         # to the requested interval using the requested (or inferred) rollup
         # resolution. This result always includes the ``end`` timestamp, but
         # may not include the ``start`` timestamp.
-        series = []
-        timestamp = end
-        while timestamp >= start:
-            series.append(self.normalize_to_epoch(timestamp, rollup))
-            timestamp = timestamp - timedelta(seconds=rollup)
-
-        return rollup, sorted(series)
+        #
+        # Stepping back from ``end`` in whole rollup intervals moves its
+        # normalized epoch back by exactly one interval each time, so the
+        # series can be computed arithmetically instead of by walking
+        # datetimes.
+        if end < start:
+            return rollup, []
+
+        steps = (end - start) // timedelta(seconds=rollup)
+        last = self.normalize_to_epoch(end, rollup)
+        return rollup, list(range(last - steps * rollup, last + 1, rollup))
 
     def get_active_series(self, start=None, end=None, timestamp=None):
         rollups = {}
@@ -271,11 +276,10 @@ class BaseTSDB(Service):
         return rollups
 
     def make_series(self, default, start, end=None, rollup=None):
-        f = default if isinstance(default, Callable) else lambda timestamp: default
-        return [
-            (timestamp, f(timestamp))
-            for timestamp in self.get_optimal_rollup_series(start, end, rollup)[1]
-        ]
+        series = self.get_optimal_rollup_series(start, end, rollup)[1]
+        if isinstance(default, Callable):
+            return [(timestamp, default(timestamp)) for timestamp in series]
+        return list(zip(series, itertools.repeat(default)))
 
     def calculate_expiry(self, rollup, samples, timestamp):
         """
@@ -414,18 +418,15 @@ class BaseTSDB(Service):
         Given a set of values (as returned from ``get_range``), roll them up
         using the ``rollup`` time (in seconds).
         """
-        normalize_ts_to_epoch = self.normalize_ts_to_epoch
         result = {}
         for key, points in values.items():
-            result[key] = []
-            last_new_ts = None
-            for (ts, count) in points:
-                new_ts = normalize_ts_to_epoch(ts, rollup)
-                if new_ts == last_new_ts:
-                    result[key][-1][1] += count
-                else:
-                    result[key].append([new_ts, count])
-                    last_new_ts = new_ts
+            # Points are ordered by timestamp, so every new rollup bucket
+            # starts a new group. ``ts - ts % rollup`` is
+            # ``normalize_ts_to_epoch`` inlined.
+            result[key] = [
+                [new_ts, sum(count for _, count in group)]
+                for new_ts, group in itertools.groupby(points, lambda p: p[0] - p[0] % rollup)
+            ]
         return result
 
     def record(self, model, key, values, timestamp=None, environment_id=None):
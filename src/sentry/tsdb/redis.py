@@ -1,6 +1,8 @@
 import itertools
 import logging
 import random
+import struct
+import time
 import uuid
 from collections import defaultdict, namedtuple
 from functools import reduce
@@ -25,6 +27,34 @@ SketchParameters = namedtuple("SketchParameters", "depth width capacity")
 
 CountMinScript = SentryScript(None, resource_string("sentry", "scripts/tsdb/cmsketch.lua"))
 
+PackedCounterScript = SentryScript(
+    None, resource_string("sentry", "scripts/tsdb/packed_counter.lua")
+)
+
+PackedCounterResetScript = SentryScript(
+    None, resource_string("sentry", "scripts/tsdb/packed_counter_reset.lua")
+)
+
+# Each slot of a packed counter series is a (bucket number, count) pair of
+# big endian signed 64-bit integers, see ``packed_counter.lua``.
+PACKED_SLOT = struct.Struct(">qq")
+
+COUNTER_STORAGE_HASH = "hash"
+COUNTER_STORAGE_PACKED = "packed"
+COUNTER_STORAGE_DUAL = "dual"
+
+
+def unpack_counter_slots(data):
+    """
+    Decode a (possibly partial) packed counter series into a mapping of bucket
+    number to count.
+    """
+    results = {}
+    for bucket, count in PACKED_SLOT.iter_unpack(data[: len(data) - len(data) % PACKED_SLOT.size]):
+        if bucket:
+            results[bucket] = count
+    return results
+
 
 class SuppressionWrapper:
     """\
@@ -89,6 +119,21 @@ class RedisTSDB(BaseTSDB):
             ...
         }
 
+    Alternatively (``counter_storage="packed"``), each counter series is stored
+    as a single Redis string per model, key, rollup and environment, holding a
+    fixed-width ring of ``(bucket number, count)`` integer pairs with one slot
+    per retained rollup interval::
+
+        {
+            "<model>:p<rollup>:<key>": <bucket><count><bucket><count>...,
+            ...
+        }
+
+    Reading a range of a series then only requires a single ``GETRANGE``. To
+    migrate an existing installation, first set ``counter_storage="dual"``,
+    which writes both layouts and keeps reading hashes, and switch to
+    ``"packed"`` once the longest rollup period has been filled.
+
     Frequency tables are modeled using two data structures:
 
         * top-N index: a sorted set containing the most frequently observed items,
@@ -114,11 +159,31 @@ class RedisTSDB(BaseTSDB):
         self.prefix = prefix
         self.vnodes = vnodes
         self.enable_frequency_sketches = options.pop("enable_frequency_sketches", False)
+        self.counter_storage = options.pop("counter_storage", COUNTER_STORAGE_HASH)
+        assert self.counter_storage in (
+            COUNTER_STORAGE_HASH,
+            COUNTER_STORAGE_PACKED,
+            COUNTER_STORAGE_DUAL,
+        )
         super().__init__(**options)
 
+    @property
+    def write_hash_counters(self):
+        return self.counter_storage != COUNTER_STORAGE_PACKED
+
+    @property
+    def write_packed_counters(self):
+        return self.counter_storage != COUNTER_STORAGE_HASH
+
     def validate(self):
         logger.debug("Validating Redis version...")
-        version = Version((2, 8, 18)) if self.enable_frequency_sketches else Version((2, 8, 9))
+        if self.write_packed_counters:
+            # BITFIELD
+            version = Version((3, 2, 0))
+        elif self.enable_frequency_sketches:
+            version = Version((2, 8, 18))
+        else:
+            version = Version((2, 8, 9))
         check_cluster_versions(self.cluster, version, recommended=Version((2, 8, 18)), label="TSDB")
 
     def get_cluster(self, environment_id):
@@ -183,6 +248,28 @@ class RedisTSDB(BaseTSDB):
             self.add_environment_parameter(model_key, environment_id),
         )
 
+    def make_packed_counter_key(self, model, rollup, key, environment_id):
+        """
+        Make the key of a packed counter series.
+        """
+        return self.add_environment_parameter(
+            "{prefix}{model}:p{rollup}:{key}".format(
+                prefix=self.prefix,
+                model=model.value,
+                rollup=rollup,
+                key=self.get_model_key(key),
+            ),
+            environment_id,
+        )
+
+    def get_packed_counter_slot(self, rollup, timestamp):
+        """
+        Returns a 2-tuple of the bucket number and the slot within a packed
+        counter series that holds ``timestamp``.
+        """
+        bucket = self.normalize_to_rollup(timestamp, rollup)
+        return bucket, bucket % self.rollups[rollup]
+
     def get_model_key(self, key):
         # We specialize integers so that a pure int-map can be optimized by
         # Redis, whereas long strings (say tag values) will store in a more
@@ -224,30 +311,28 @@ class RedisTSDB(BaseTSDB):
             default_timestamp = timezone.now()
 
         for (cluster, durable), environment_ids in self.get_cluster_groups({None, environment_id}):
-            manager = cluster.map()
-            if not durable:
-                manager = SuppressionWrapper(manager)
-
-            with manager as client:
-                # (hash_key, hash_field) -> count
-                key_operations = defaultdict(lambda: 0)
-                # (hash_key) -> "max expiration encountered"
-                key_expiries = defaultdict(lambda: 0.0)
-
-                for rollup, max_values in self.rollups.items():
-                    for item in items:
-                        if len(item) == 2:
-                            model, key = item
-                            options = {}
-                        else:
-                            model, key, options = item
-
-                        count = options.get("count", default_count)
-                        timestamp = options.get("timestamp", default_timestamp)
-
-                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
-
-                        for environment_id in environment_ids:
+            # (hash_key, hash_field) -> count
+            key_operations = defaultdict(lambda: 0)
+            # (hash_key) -> "max expiration encountered"
+            key_expiries = defaultdict(lambda: 0.0)
+            # packed_key -> (slot, bucket) -> count
+            packed_operations = defaultdict(lambda: defaultdict(lambda: 0))
+
+            for rollup, max_values in self.rollups.items():
+                for item in items:
+                    if len(item) == 2:
+                        model, key = item
+                        options = {}
+                    else:
+                        model, key, options = item
+
+                    count = options.get("count", default_count)
+                    timestamp = options.get("timestamp", default_timestamp)
+
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+
+                    for environment_id in environment_ids:
+                        if self.write_hash_counters:
                             hash_key, hash_field = self.make_counter_key(
                                 model, rollup, timestamp, key, environment_id
                             )
@@ -257,10 +342,42 @@ class RedisTSDB(BaseTSDB):
 
                             key_operations[(hash_key, hash_field)] += count
 
-                for (hash_key, hash_field), count in key_operations.items():
-                    client.hincrby(hash_key, hash_field, count)
-                    if key_expiries.get(hash_key):
-                        client.expireat(hash_key, key_expiries.pop(hash_key))
+                        if self.write_packed_counters:
+                            packed_key = self.make_packed_counter_key(
+                                model, rollup, key, environment_id
+                            )
+                            bucket, slot = self.get_packed_counter_slot(rollup, timestamp)
+
+                            if key_expiries[packed_key] < expiry:
+                                key_expiries[packed_key] = expiry
+
+                            packed_operations[packed_key][(slot, bucket)] += count
+
+            if key_operations:
+                manager = cluster.map()
+                if not durable:
+                    manager = SuppressionWrapper(manager)
+
+                with manager as client:
+                    for (hash_key, hash_field), count in key_operations.items():
+                        client.hincrby(hash_key, hash_field, count)
+                        if key_expiries.get(hash_key):
+                            client.expireat(hash_key, key_expiries.pop(hash_key))
+
+            if packed_operations:
+                commands = {}
+                now = int(time.time())
+                for packed_key, operations in packed_operations.items():
+                    arguments = [key_expiries[packed_key], now]
+                    for (slot, bucket), count in operations.items():
+                        arguments.extend((slot, bucket, count))
+                    commands[packed_key] = [(PackedCounterScript, [packed_key], arguments)]
+
+                try:
+                    cluster.execute_commands(commands)
+                except Exception:
+                    if durable:
+                        raise
 
     def get_range(
         self,
@@ -291,6 +408,10 @@ class RedisTSDB(BaseTSDB):
         self.validate_arguments([model], [environment_id])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        if self.counter_storage == COUNTER_STORAGE_PACKED:
+            return self._get_packed_range(model, keys, rollup, series, environment_id)
+
         series = [to_datetime(item) for item in series]
 
         results = []
@@ -313,6 +434,113 @@ class RedisTSDB(BaseTSDB):
             results_by_key[key] = sorted(points.items())
         return dict(results_by_key)
 
+    def _get_packed_range(self, model, keys, rollup, series, environment_id):
+        max_values = self.rollups[rollup]
+        buckets = [self.normalize_ts_to_rollup(epoch, rollup) for epoch in series]
+
+        first_slot = buckets[0] % max_values
+        last_slot = buckets[-1] % max_values
+        if buckets[-1] - buckets[0] >= max_values or first_slot > last_slot:
+            # The range wraps around the end of the ring, read all of it.
+            first_slot, last_slot = 0, max_values - 1
+
+        cluster, _ = self.get_cluster(environment_id)
+        with cluster.map() as client:
+            responses = {
+                key: client.getrange(
+                    self.make_packed_counter_key(model, rollup, key, environment_id),
+                    first_slot * PACKED_SLOT.size,
+                    (last_slot + 1) * PACKED_SLOT.size - 1,
+                )
+                for key in keys
+            }
+
+        results = {}
+        for key, response in responses.items():
+            counts = unpack_counter_slots(response.value or b"")
+            results[key] = [
+                (epoch, counts.get(bucket, 0)) for epoch, bucket in zip(series, buckets)
+            ]
+        return results
+
+    def _merge_packed(self, model, destination, sources, timestamp, environment_ids):
+        active_buckets = {
+            rollup: {self.normalize_to_rollup(ts, rollup) for ts in series}
+            for rollup, series in self.get_active_series(timestamp=timestamp).items()
+        }
+
+        for (cluster, durable), environment_ids in self.get_cluster_groups(environment_ids):
+            manager = cluster.map()
+            if not durable:
+                manager = SuppressionWrapper(manager)
+
+            responses = {}
+            with manager as client:
+                for rollup in active_buckets:
+                    for environment_id in environment_ids:
+                        for source in sources:
+                            source_key = self.make_packed_counter_key(
+                                model, rollup, source, environment_id
+                            )
+                            responses.setdefault((rollup, environment_id), []).append(
+                                client.get(source_key)
+                            )
+                            client.delete(source_key)
+
+            commands = {}
+            for (rollup, environment_id), promises in responses.items():
+                max_values = self.rollups[rollup]
+                totals = defaultdict(lambda: 0)
+                for promise in promises:
+                    for bucket, count in unpack_counter_slots(promise.value or b"").items():
+                        if bucket in active_buckets[rollup]:
+                            totals[bucket] += count
+
+                if not totals:
+                    continue
+
+                destination_key = self.make_packed_counter_key(
+                    model, rollup, destination, environment_id
+                )
+                arguments = [
+                    self.calculate_expiry(rollup, max_values, to_datetime(max(totals) * rollup)),
+                    int(time.time()),
+                ]
+                for bucket, count in totals.items():
+                    arguments.extend((bucket % max_values, bucket, count))
+                commands[destination_key] = [(PackedCounterScript, [destination_key], arguments)]
+
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
+
+    def _delete_packed(self, models, keys, rollups, environment_ids):
+        for (cluster, durable), environment_ids in self.get_cluster_groups(environment_ids):
+            commands = {}
+            for rollup, series in rollups.items():
+                arguments = []
+                for timestamp in series:
+                    bucket, slot = self.get_packed_counter_slot(rollup, timestamp)
+                    arguments.extend((slot, bucket))
+
+                for model in models:
+                    for key in keys:
+                        for environment_id in environment_ids:
+                            packed_key = self.make_packed_counter_key(
+                                model, rollup, key, environment_id
+                            )
+                            commands.setdefault(packed_key, []).append(
+                                (PackedCounterResetScript, [packed_key], arguments)
+                            )
+
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
+
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
             [None]
@@ -320,6 +548,12 @@ class RedisTSDB(BaseTSDB):
 
         self.validate_arguments([model], environment_ids)
 
+        if self.write_packed_counters:
+            self._merge_packed(model, destination, sources, timestamp, environment_ids)
+
+        if not self.write_hash_counters:
+            return
+
         rollups = self.get_active_series(timestamp=timestamp)
 
         for (cluster, durable), environment_ids in self.get_cluster_groups(environment_ids):
@@ -370,6 +604,12 @@ class RedisTSDB(BaseTSDB):
 
         rollups = self.get_active_series(start, end, timestamp)
 
+        if self.write_packed_counters:
+            self._delete_packed(models, keys, rollups, environment_ids)
+
+        if not self.write_hash_counters:
+            return
+
         for (cluster, durable), environment_ids in self.get_cluster_groups(environment_ids):
             manager = cluster.map()
             if not durable:
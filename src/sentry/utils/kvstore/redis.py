@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import timedelta
-from typing import Optional, TypeVar
+from typing import Optional, Sequence, Tuple, TypeVar
 
 from redis import StrictRedis
 from rediscluster import RedisCluster
@@ -26,6 +26,12 @@ class RedisKVStorage(KVStorage[str, T]):
     def set(self, key: str, value: T, ttl: Optional[timedelta] = None) -> None:
         self.client.set(key.encode("utf8"), value, ex=ttl)
 
+    def set_many(self, items: Sequence[Tuple[str, T]], ttl: Optional[timedelta] = None) -> None:
+        with self.client.pipeline(transaction=False) as pipeline:
+            for key, value in items:
+                pipeline.set(key.encode("utf8"), value, ex=ttl)
+            pipeline.execute()
+
     def delete(self, key: str) -> None:
         self.client.delete(key.encode("utf8"))
 
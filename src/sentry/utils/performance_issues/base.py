@@ -6,7 +6,7 @@ import re
 from abc import ABC, abstractmethod
 from datetime import timedelta
 from enum import Enum
-from typing import Any, ClassVar, Dict, List, Optional, Union, cast
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union, cast
 from urllib.parse import parse_qs, urlparse
 
 from sentry import options
@@ -27,6 +27,7 @@ from sentry.issues.grouptype import (
 from sentry.models.organization import Organization
 from sentry.models.project import Project
 
+from .span_index import SpanIndex
 from .types import PerformanceProblemsMap, Span
 
 
@@ -89,6 +90,14 @@ class PerformanceDetector(ABC):
     type: ClassVar[DetectorType]
     stored_problems: PerformanceProblemsMap
 
+    # Op prefixes of the spans this detector needs to visit. Spans with other
+    # ops are not dispatched to `visit_span`, so this may only be set by
+    # detectors that ignore those spans entirely. `None` visits every span.
+    span_ops: Optional[Tuple[str, ...]] = None
+
+    # Shared derived span data, set while the detector runs on an event.
+    span_index: Optional[SpanIndex] = None
+
     def __init__(self, settings: Dict[DetectorType, Any], event: dict[str, Any]) -> None:
         self.settings = settings[self.settings_key]
         self._event = event
@@ -110,13 +119,19 @@ class PerformanceDetector(ABC):
         if not op or not span_id:
             return None
 
-        span_duration = get_span_duration(span)
+        span_duration = self.span_duration(span)
         for setting in self.settings:
             op_prefix = self.find_span_prefix(setting, op)
             if op_prefix:
                 return op, span_id, op_prefix, span_duration, setting
         return None
 
+    def span_duration(self, span: Span) -> timedelta:
+        """Same as `get_span_duration`, but reuses the shared span index when available."""
+        if self.span_index is not None:
+            return self.span_index.duration(span)
+        return get_span_duration(span)
+
     def event(self) -> dict[str, Any]:
         return self._event
 
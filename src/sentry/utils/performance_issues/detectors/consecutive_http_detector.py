@@ -19,7 +19,6 @@ from ..base import (
     fingerprint_http_spans,
     get_duration_between_spans,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -51,7 +50,7 @@ class ConsecutiveHTTPSpanDetector(PerformanceDetector):
         if not span_id or not self._is_eligible_http_span(span):
             return
 
-        span_duration = get_span_duration(span).total_seconds() * 1000
+        span_duration = self.span_duration(span).total_seconds() * 1000
         if span_duration < self.settings.get("span_duration_threshold"):
             return
 
@@ -52,6 +52,7 @@ class HTTPOverheadDetector(PerformanceDetector):
 
     type = DetectorType.HTTP_OVERHEAD
     settings_key = DetectorType.HTTP_OVERHEAD
+    span_ops = ("http.client",)
 
     def init(self):
         self.stored_problems: dict[str, PerformanceProblem] = {}
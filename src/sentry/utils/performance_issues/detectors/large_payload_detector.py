@@ -14,7 +14,6 @@ from ..base import (
     PerformanceDetector,
     fingerprint_http_spans,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -32,13 +31,14 @@ class LargeHTTPPayloadDetector(PerformanceDetector):
 
     type = DetectorType.LARGE_HTTP_PAYLOAD
     settings_key = DetectorType.LARGE_HTTP_PAYLOAD
+    span_ops = ("http",)
 
     def init(self):
         self.stored_problems: dict[str, PerformanceProblem] = {}
         self.consecutive_http_spans: list[Span] = []
 
     def visit_span(self, span: Span) -> None:
-        if not LargeHTTPPayloadDetector._is_span_eligible(span):
+        if not self._is_span_eligible(span):
             return
 
         data = span.get("data", None)
@@ -92,8 +92,7 @@ class LargeHTTPPayloadDetector(PerformanceDetector):
             },
         )
 
-    @classmethod
-    def _is_span_eligible(cls, span: Span) -> bool:
+    def _is_span_eligible(self, span: Span) -> bool:
         span_id = span.get("span_id", None)
         op: str = span.get("op", "") or ""
         hash = span.get("hash", None)
@@ -106,7 +105,7 @@ class LargeHTTPPayloadDetector(PerformanceDetector):
         if not op.startswith("http"):
             return False
 
-        if get_span_duration(span) < MINIMUM_SPAN_DURATION:
+        if self.span_duration(span) < MINIMUM_SPAN_DURATION:
             return False
 
         normalized_description = description.strip().upper()
@@ -53,6 +53,7 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
         self.stored_problems: PerformanceProblemsMap = {}
         self.spans: list[Span] = []
         self.span_hashes = {}
+        self.span_ops = tuple(self.settings.get("allowed_span_ops", []))
 
     def visit_span(self, span: Span) -> None:
         if not NPlusOneAPICallsDetector.is_span_eligible(span):
@@ -14,7 +14,6 @@ from ..base import (
     PerformanceDetector,
     fingerprint_resource_span,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -26,6 +25,7 @@ class RenderBlockingAssetSpanDetector(PerformanceDetector):
 
     type = DetectorType.RENDER_BLOCKING_ASSET_SPAN
     settings_key = DetectorType.RENDER_BLOCKING_ASSET_SPAN
+    span_ops = ("resource.link", "resource.script")
 
     MAX_SIZE_BYTES = 1_000_000_000  # 1GB
 
@@ -148,7 +148,7 @@ class RenderBlockingAssetSpanDetector(PerformanceDetector):
         if encoded_body_size < minimum_size_bytes or encoded_body_size > self.MAX_SIZE_BYTES:
             return False
 
-        span_duration = get_span_duration(span)
+        span_duration = self.span_duration(span)
         fcp_ratio_threshold = self.settings.get("fcp_ratio_threshold")
         return span_duration / self.fcp > fcp_ratio_threshold
 
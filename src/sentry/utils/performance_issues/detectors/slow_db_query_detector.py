@@ -34,6 +34,10 @@ class SlowDBQueryDetector(PerformanceDetector):
 
     def init(self):
         self.stored_problems = {}
+        # See `settings_for_span`: no allowed ops means every op is allowed.
+        allowed_span_ops = [setting.get("allowed_span_ops", []) for setting in self.settings]
+        if all(allowed_span_ops):
+            self.span_ops = tuple(op for ops in allowed_span_ops for op in ops)
 
     def visit_span(self, span: Span):
         settings_for_span = self.settings_for_span(span)
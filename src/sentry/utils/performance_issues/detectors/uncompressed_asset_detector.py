@@ -13,7 +13,6 @@ from ..base import (
     PerformanceDetector,
     fingerprint_resource_span,
     get_notification_attachment_body,
-    get_span_duration,
     get_span_evidence_value,
 )
 from ..performance_problem import PerformanceProblem
@@ -36,6 +35,7 @@ class UncompressedAssetSpanDetector(PerformanceDetector):
     def init(self):
         self.stored_problems = {}
         self.any_compression = False
+        self.span_ops = tuple(self.settings.get("allowed_span_ops") or ())
 
     def visit_span(self, span: Span) -> None:
         op = span.get("op", None)
@@ -86,7 +86,7 @@ class UncompressedAssetSpanDetector(PerformanceDetector):
             return
 
         # Ignore assets under a certain duration threshold
-        if get_span_duration(span).total_seconds() * 1000 <= self.settings.get(
+        if self.span_duration(span).total_seconds() * 1000 <= self.settings.get(
             "duration_threshold"
         ):
             return
@@ -3,7 +3,7 @@ from __future__ import annotations
 import hashlib
 import logging
 import random
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 
 import sentry_sdk
 
@@ -34,8 +34,25 @@ from .detectors.render_blocking_asset_span_detector import RenderBlockingAssetSp
 from .detectors.slow_db_query_detector import SlowDBQueryDetector
 from .detectors.uncompressed_asset_detector import UncompressedAssetSpanDetector
 from .performance_problem import PerformanceProblem
+from .span_index import SpanIndex
 
 PERFORMANCE_GROUP_COUNT_LIMIT = 10
+
+DETECTOR_CLASSES: Tuple[Type[PerformanceDetector], ...] = (
+    ConsecutiveDBSpanDetector,
+    ConsecutiveHTTPSpanDetector,
+    DBMainThreadDetector,
+    SlowDBQueryDetector,
+    RenderBlockingAssetSpanDetector,
+    NPlusOneDBSpanDetector,
+    NPlusOneDBSpanDetectorExtended,
+    FileIOMainThreadDetector,
+    NPlusOneAPICallsDetector,
+    MNPlusOneDBSpanDetector,
+    UncompressedAssetSpanDetector,
+    LargeHTTPPayloadDetector,
+    HTTPOverheadDetector,
+)
 INTEGRATIONS_OF_INTEREST = [
     "django",
     "flask",
@@ -313,23 +330,10 @@ def _detect_performance_problems(
 
     detection_settings = get_detection_settings(project.id)
     detectors: List[PerformanceDetector] = [
-        ConsecutiveDBSpanDetector(detection_settings, data),
-        ConsecutiveHTTPSpanDetector(detection_settings, data),
-        DBMainThreadDetector(detection_settings, data),
-        SlowDBQueryDetector(detection_settings, data),
-        RenderBlockingAssetSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetectorExtended(detection_settings, data),
-        FileIOMainThreadDetector(detection_settings, data),
-        NPlusOneAPICallsDetector(detection_settings, data),
-        MNPlusOneDBSpanDetector(detection_settings, data),
-        UncompressedAssetSpanDetector(detection_settings, data),
-        LargeHTTPPayloadDetector(detection_settings, data),
-        HTTPOverheadDetector(detection_settings, data),
+        detector_class(detection_settings, data) for detector_class in DETECTOR_CLASSES
     ]
 
-    for detector in detectors:
-        run_detector_on_data(detector, data)
+    run_detectors_on_data(detectors, data)
 
     # Metrics reporting only for detection, not created issues.
     report_metrics_for_detectors(data, event_id, detectors, sdk_span, project.organization)
@@ -371,14 +375,33 @@ def _detect_performance_problems(
 
 
 def run_detector_on_data(detector, data):
-    if not detector.is_event_eligible(data):
+    run_detectors_on_data([detector], data)
+
+
+def run_detectors_on_data(detectors: Sequence[PerformanceDetector], data: dict[str, Any]) -> None:
+    """
+    Walks the spans of the event once, dispatching each span to every eligible
+    detector interested in its op. Derived span data is computed up front and
+    shared through `PerformanceDetector.span_index`.
+    """
+    detectors = [detector for detector in detectors if detector.is_event_eligible(data)]
+    if not detectors:
         return
 
-    spans = data.get("spans", [])
-    for span in spans:
-        detector.visit_span(span)
+    span_index = SpanIndex(data.get("spans", []))
+    for detector in detectors:
+        detector.span_index = span_index
+
+    # Detectors keep their relative order for every span.
+    for position, span in enumerate(span_index.spans):
+        op = span_index.ops[position]
+        for detector in detectors:
+            if detector.span_ops is None or op.startswith(detector.span_ops):
+                detector.visit_span(span)
 
-    detector.on_complete()
+    for detector in detectors:
+        detector.on_complete()
+        detector.span_index = None
 
 
 # Reports metrics and creates spans for detection
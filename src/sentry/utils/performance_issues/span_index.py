@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+
+from .types import Span
+
+
+class SpanIndex:
+    """
+    Derived data for the spans of a single transaction. It is computed once and
+    shared by all performance detectors that run on the transaction, so they do
+    not each re-parse span ops and timestamps. Only what detectors read is
+    computed, every extra field is paid for on every transaction.
+
+    Spans are referred to by their position in the event's span list.
+    """
+
+    def __init__(self, spans: Sequence[Span]) -> None:
+        self.spans = spans
+        self.ops: List[str] = []
+        self.durations: List[timedelta] = []
+        self._positions: Dict[int, int] = {}
+
+        for position, span in enumerate(spans):
+            op = span.get("op")
+            self.ops.append(op if isinstance(op, str) else "")
+            # Same arithmetic as `get_span_duration`, so results are identical.
+            self.durations.append(
+                timedelta(seconds=span.get("timestamp", 0))
+                - timedelta(seconds=span.get("start_timestamp", 0))
+            )
+            self._positions[id(span)] = position
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def position(self, span: Span) -> Optional[int]:
+        return self._positions.get(id(span))
+
+    def duration(self, span: Span) -> timedelta:
+        position = self._positions.get(id(span))
+        if position is None:
+            return timedelta(seconds=span.get("timestamp", 0)) - timedelta(
+                seconds=span.get("start_timestamp", 0)
+            )
+        return self.durations[position]
@@ -4,9 +4,11 @@ import functools
 import logging
 import os
 import re
+import threading
 import time
 from collections import namedtuple
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
@@ -15,6 +17,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
@@ -34,6 +37,8 @@ from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
 
+from sentry import options
+from sentry.locks import locks
 from sentry.models.environment import Environment
 from sentry.models.group import Group
 from sentry.models.grouprelease import GroupRelease
@@ -47,6 +52,7 @@ from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.locking import UnableToAcquireLock
 
 logger = logging.getLogger(__name__)
 
@@ -405,6 +411,13 @@ _snuba_pool = connection_from_url(
     maxsize=10,
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Refreshes stale query cache entries in the background, kept apart from
+# `_query_thread_pool` so that refreshes never hold up foreground queries.
+_cache_refresh_pool = ThreadPoolExecutor(max_workers=2)
+# Cache keys of the queries currently running in this process, mapped to a future
+# resolving to the serialized result.
+_inflight_queries: MutableMapping[str, Future[str]] = {}
+_inflight_queries_lock = threading.Lock()
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -741,6 +754,16 @@ class SnubaQueryParams:
         self.kwargs = kwargs
 
 
+# Shapes of the "data" member of a query result:
+# - rows: a list with one translated dict per row
+# - lazy rows: an iterator translating each row as it is consumed, it can only be
+#   iterated once
+# - columnar: a dict mapping each column to the list of its translated values
+RESULT_FORMAT_ROWS = "rows"
+RESULT_FORMAT_LAZY_ROWS = "lazy_rows"
+RESULT_FORMAT_COLUMNAR = "columnar"
+
+
 def raw_query(
     dataset=None,
     start=None,
@@ -753,11 +776,15 @@ def raw_query(
     referrer=None,
     is_grouprelease=False,
     use_cache=False,
+    result_format=RESULT_FORMAT_ROWS,
+    use_rapid_json=False,
     **kwargs,
 ) -> Mapping[str, Any]:
     """
     Sends a query to snuba.  See `SnubaQueryParams` docstring for param
-    descriptions.
+    descriptions, and `RESULT_FORMAT_*` for the shape of the returned data.
+    `use_rapid_json` decodes the response with rapidjson, which is faster but
+    may differ from the default decoder on edge cases.
     """
 
     if referrer:
@@ -777,7 +804,13 @@ def raw_query(
         **kwargs,
     )
 
-    return bulk_raw_query([snuba_params], referrer=referrer, use_cache=use_cache)[0]
+    return bulk_raw_query(
+        [snuba_params],
+        referrer=referrer,
+        use_cache=use_cache,
+        result_format=result_format,
+        use_rapid_json=use_rapid_json,
+    )[0]
 
 
 SnubaQuery = Union[Request, MutableMapping[str, Any]]
@@ -790,6 +823,9 @@ def raw_snql_query(
     request: Request,
     referrer: Optional[str] = None,
     use_cache: bool = False,
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
 ) -> Mapping[str, Any]:
     # XXX (evanh): This function does none of the extra processing that the
     # other functions do here. It does not add any automatic conditions, format
@@ -803,13 +839,23 @@ def raw_snql_query(
         request.tenant_ids["referrer"] = referrer
 
     params: SnubaQueryBody = (request, lambda x: x, lambda x: x)
-    return _apply_cache_and_build_results([params], referrer=referrer, use_cache=use_cache)[0]
+    return _apply_cache_and_build_results(
+        [params],
+        referrer=referrer,
+        use_cache=use_cache,
+        result_format=result_format,
+        columns=columns,
+        use_rapid_json=use_rapid_json,
+    )[0]
 
 
 def bulk_snql_query(
     requests: List[Request],
     referrer: Optional[str] = None,
     use_cache: bool = False,
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
 ) -> Mapping[str, Any]:
     # XXX (evanh): This function does none of the extra processing that the
     # other functions do here. It does not add any automatic conditions, format
@@ -825,7 +871,14 @@ def bulk_snql_query(
             request.tenant_ids["referrer"] = referrer
 
     params: SnubaQuery = [(request, lambda x: x, lambda x: x) for request in requests]
-    return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
+    return _apply_cache_and_build_results(
+        params,
+        referrer=referrer,
+        use_cache=use_cache,
+        result_format=result_format,
+        columns=columns,
+        use_rapid_json=use_rapid_json,
+    )
 
 
 def get_cache_key(query: SnubaQuery) -> str:
@@ -842,15 +895,28 @@ def bulk_raw_query(
     snuba_param_list: Sequence[SnubaQueryParams],
     referrer: Optional[str] = None,
     use_cache: Optional[bool] = False,
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
 ) -> ResultSet:
     params = [_prepare_query_params(param, referrer) for param in snuba_param_list]
-    return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
+    return _apply_cache_and_build_results(
+        params,
+        referrer=referrer,
+        use_cache=use_cache,
+        result_format=result_format,
+        columns=columns,
+        use_rapid_json=use_rapid_json,
+    )
 
 
 def _apply_cache_and_build_results(
     snuba_param_list: Sequence[SnubaQueryBody],
     referrer: Optional[str] = None,
     use_cache: Optional[bool] = False,
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
 ) -> ResultSet:
     headers = {}
     validate_referrer(referrer)
@@ -863,25 +929,67 @@ def _apply_cache_and_build_results(
 
     if use_cache:
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
+        if result_format == RESULT_FORMAT_COLUMNAR:
+            # Columnar results are cached separately, they don't have the shape of row results
+            columns_key = ",".join(columns) if columns is not None else "*"
+            cache_keys = [f"{key}:col:{columns_key}" for key in cache_keys]
+        stale_ttl = options.get("snuba.query-cache.stale-ttl")
+        if stale_ttl:
+            cache_data = cache.get_many(cache_keys + [_fresh_key(key) for key in cache_keys])
+        else:
+            cache_data = cache.get_many(cache_keys)
         to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+        metric_tags = {"referrer": referrer} if referrer else None
         for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
             cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
             if cached_result is None:
                 metrics.incr("snuba.query_cache.miss", tags=metric_tags)
                 to_query.append((query_pos, query_params, cache_key))
+            elif stale_ttl and _fresh_key(cache_key) not in cache_data:
+                metrics.incr("snuba.query_cache.stale", tags=metric_tags)
+                _schedule_refresh(
+                    query_params,
+                    cache_key,
+                    cached_result,
+                    headers,
+                    result_format,
+                    columns,
+                    stale_ttl,
+                    use_rapid_json,
+                )
+                results.append((query_pos, json.loads(cached_result)))
             else:
                 metrics.incr("snuba.query_cache.hit", tags=metric_tags)
                 results.append((query_pos, json.loads(cached_result)))
+
+        if to_query and options.get("snuba.query-cache.coalesce"):
+            results.extend(
+                _coalesced_query(
+                    to_query,
+                    headers,
+                    result_format,
+                    columns,
+                    stale_ttl,
+                    metric_tags,
+                    use_rapid_json,
+                )
+            )
+            to_query = []
     else:
+        stale_ttl = 0
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
 
     if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+        query_results = _bulk_snuba_query(
+            [item[1] for item in to_query],
+            headers,
+            result_format=result_format,
+            columns=columns,
+            use_rapid_json=use_rapid_json,
+        )
         for result, (query_pos, _, cache_key) in zip(query_results, to_query):
             if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
+                _set_cached_result(cache_key, result, result_format, stale_ttl)
             results.append((query_pos, result))
 
     # Sort so that we get the results back in the original param list order
@@ -890,9 +998,226 @@ def _apply_cache_and_build_results(
     return [result[1] for result in results]
 
 
+def _fresh_key(cache_key: str) -> str:
+    # With stale-while-revalidate, cached results outlive the cache TTL by the stale
+    # TTL, this marker tells whether they are still fresh.
+    return f"{cache_key}:fresh"
+
+
+def _set_cached_result(
+    cache_key: str, result: MutableMapping[str, Any], result_format: str, stale_ttl: int
+) -> str:
+    if result_format == RESULT_FORMAT_LAZY_ROWS:
+        result["data"] = list(result["data"])
+    value = json.dumps(result)
+    ttl = settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+    if stale_ttl:
+        cache.set(cache_key, value, ttl + stale_ttl)
+        cache.set(_fresh_key(cache_key), 1, ttl)
+    else:
+        cache.set(cache_key, value, ttl)
+    return value
+
+
+def _schedule_refresh(
+    query_params: SnubaQueryBody,
+    cache_key: str,
+    stale_result: str,
+    headers: Mapping[str, str],
+    result_format: str,
+    columns: Optional[Sequence[str]],
+    stale_ttl: int,
+    use_rapid_json: bool,
+) -> None:
+    with _inflight_queries_lock:
+        if cache_key in _inflight_queries:
+            # Already being refreshed or queried in this process
+            return
+        future: Future[str] = Future()
+        _inflight_queries[cache_key] = future
+    _cache_refresh_pool.submit(
+        _refresh_cached_query,
+        future,
+        query_params,
+        cache_key,
+        stale_result,
+        headers,
+        result_format,
+        columns,
+        stale_ttl,
+        use_rapid_json,
+    )
+
+
+def _refresh_cached_query(
+    future: Future[str],
+    query_params: SnubaQueryBody,
+    cache_key: str,
+    stale_result: str,
+    headers: Mapping[str, str],
+    result_format: str,
+    columns: Optional[Sequence[str]],
+    stale_ttl: int,
+    use_rapid_json: bool,
+) -> None:
+    """
+    Re-runs the query of a stale cache entry. Only one worker refreshes an entry
+    at a time, the others keep serving the stale result.
+    """
+    lock = locks.get(
+        f"{cache_key}:refresh", duration=settings.SENTRY_SNUBA_TIMEOUT, name="snuba_query_cache"
+    )
+    value = stale_result
+    try:
+        with lock.acquire():
+            [result] = _bulk_snuba_query(
+                [query_params],
+                headers,
+                result_format=result_format,
+                columns=columns,
+                use_rapid_json=use_rapid_json,
+            )
+            value = _set_cached_result(cache_key, result, result_format, stale_ttl)
+    except UnableToAcquireLock:
+        pass
+    except Exception:
+        logger.warning("snuba.query_cache.refresh-failed", exc_info=True)
+    finally:
+        future.set_result(value)
+        with _inflight_queries_lock:
+            _inflight_queries.pop(cache_key, None)
+
+
+def _coalesced_query(
+    to_query: Sequence[Tuple[int, SnubaQueryBody, Optional[str]]],
+    headers: Mapping[str, str],
+    result_format: str,
+    columns: Optional[Sequence[str]],
+    stale_ttl: int,
+    metric_tags: Optional[Mapping[str, str]],
+    use_rapid_json: bool = False,
+) -> List[Tuple[int, Any]]:
+    """
+    Runs queries missing from the cache so that only one of the concurrent callers
+    asking for the same cache key sends it to Snuba, the others wait for its
+    result. Within a process callers wait on the in-flight query directly, across
+    processes the first one to take a short lock on the key runs the query and
+    the others poll the cache. Waiting is capped for the call as a whole, after
+    which callers run the query themselves rather than failing.
+    """
+    deadline = time.monotonic() + options.get("snuba.query-cache.coalesce-wait-ms") / 1000.0
+    results: List[Tuple[int, Any]] = []
+
+    owned: List[Tuple[int, SnubaQueryBody, str]] = []
+    waiting: List[Tuple[int, SnubaQueryBody, str, Future[str]]] = []
+    with _inflight_queries_lock:
+        for query_pos, query_params, cache_key in to_query:
+            assert cache_key is not None
+            future = _inflight_queries.get(cache_key)
+            if future is None:
+                _inflight_queries[cache_key] = Future()
+                owned.append((query_pos, query_params, cache_key))
+            else:
+                waiting.append((query_pos, query_params, cache_key, future))
+
+    fallback: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+    held_locks = []
+    try:
+        # Only query the keys no other process is already querying
+        to_run = []
+        locked_out = []
+        for query_pos, query_params, cache_key in owned:
+            lock = locks.get(
+                f"{cache_key}:query",
+                duration=settings.SENTRY_SNUBA_TIMEOUT,
+                name="snuba_query_cache",
+            )
+            try:
+                lock.acquire()
+                held_locks.append(lock)
+            except UnableToAcquireLock:
+                locked_out.append((query_pos, query_params, cache_key))
+            else:
+                to_run.append((query_pos, query_params, cache_key))
+
+        if locked_out:
+            cached_results = _poll_cache([cache_key for _, _, cache_key in locked_out], deadline)
+            for query_pos, query_params, cache_key in locked_out:
+                cached_result = cached_results.get(cache_key)
+                if cached_result is None:
+                    to_run.append((query_pos, query_params, cache_key))
+                    continue
+                metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                _inflight_queries[cache_key].set_result(cached_result)
+                results.append((query_pos, json.loads(cached_result)))
+
+        if to_run:
+            query_results = _bulk_snuba_query(
+                [item[1] for item in to_run],
+                headers,
+                result_format=result_format,
+                columns=columns,
+                use_rapid_json=use_rapid_json,
+            )
+            for result, (query_pos, _, cache_key) in zip(query_results, to_run):
+                value = _set_cached_result(cache_key, result, result_format, stale_ttl)
+                _inflight_queries[cache_key].set_result(value)
+                results.append((query_pos, result))
+    except Exception as error:
+        for _, _, cache_key in owned:
+            if not _inflight_queries[cache_key].done():
+                _inflight_queries[cache_key].set_exception(error)
+        raise
+    finally:
+        for lock in held_locks:
+            lock.release()
+        with _inflight_queries_lock:
+            for _, _, cache_key in owned:
+                _inflight_queries.pop(cache_key, None)
+
+    for query_pos, query_params, cache_key, future in waiting:
+        try:
+            value = future.result(timeout=max(deadline - time.monotonic(), 0.0))
+        except FutureTimeoutError:
+            fallback.append((query_pos, query_params, cache_key))
+        else:
+            metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+            results.append((query_pos, json.loads(value)))
+
+    if fallback:
+        query_results = _bulk_snuba_query(
+            [item[1] for item in fallback],
+            headers,
+            result_format=result_format,
+            columns=columns,
+            use_rapid_json=use_rapid_json,
+        )
+        for result, (query_pos, _, _) in zip(query_results, fallback):
+            results.append((query_pos, result))
+    return results
+
+
+def _poll_cache(cache_keys: Sequence[str], deadline: float) -> Dict[str, str]:
+    """
+    Polls the cache for all of `cache_keys` at once until they are all set or
+    the `time.monotonic()` based `deadline` has passed, returning what was found.
+    """
+    found: Dict[str, str] = {}
+    while True:
+        found.update(
+            cache.get_many([cache_key for cache_key in cache_keys if cache_key not in found])
+        )
+        if len(found) == len(cache_keys) or time.monotonic() >= deadline:
+            return found
+        time.sleep(0.05)
+
+
 def _bulk_snuba_query(
     snuba_param_list: Sequence[SnubaQueryBody],
     headers: Mapping[str, str],
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
 ) -> ResultSet:
     query_referrer = headers.get("referer", "<unknown>")
 
@@ -917,7 +1242,15 @@ def _bulk_snuba_query(
             if scope.transaction:
                 parent_api = scope.transaction.name
 
-        if len(snuba_param_list) > 1:
+        if (
+            len(snuba_param_list) > 1
+            and query_fn is _snql_query
+            and options.get("snuba.async-client.enabled")
+        ):
+            from sentry.utils.snuba_async import bulk_snql_query_raw
+
+            query_results = bulk_snql_query_raw(snuba_param_list, headers, parent_api)
+        elif len(snuba_param_list) > 1:
             query_results = list(
                 _query_thread_pool.map(
                     query_fn,
@@ -931,49 +1264,84 @@ def _bulk_snuba_query(
             # No need to submit to the thread pool if we're just performing a single query
             query_results = [query_fn((snuba_param_list[0], Hub(Hub.current), headers, parent_api))]
 
-    results = []
-    for response, _, reverse in query_results:
-        try:
-            body = json.loads(response.data)
-            if SNUBA_INFO:
-                if "sql" in body:
-                    print(  # NOQA: only prints when an env variable is set
-                        "{}.sql:\n {}".format(
-                            headers.get("referer", "<unknown>"),
-                            sqlparse.format(body["sql"], reindent_aligned=True),
-                        )
-                    )
-                if "error" in body:
-                    print(  # NOQA: only prints when an env variable is set
-                        "{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"])
-                    )
-        except ValueError:
-            if response.status != 200:
-                logger.exception("snuba.query.invalid-json", extra={"response.data": response.data})
-                raise SnubaError("Failed to parse snuba error response")
-            raise UnexpectedResponseError(f"Could not decode JSON response: {response.data!r}")
+    return [
+        _decode_snuba_response(response, reverse, headers, result_format, columns, use_rapid_json)
+        for response, _, reverse in query_results
+    ]
 
-        if response.status != 200:
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
+
+def _decode_snuba_response(
+    response: urllib3.response.HTTPResponse,
+    reverse: Translator,
+    headers: Mapping[str, str],
+    result_format: str = RESULT_FORMAT_ROWS,
+    columns: Optional[Sequence[str]] = None,
+    use_rapid_json: bool = False,
+) -> MutableMapping[str, Any]:
+    try:
+        # rapidjson is faster but may differ from the default decoder on edge cases,
+        # so callers opt in explicitly, independently of the result format.
+        body = json.loads(response.data, use_rapid_json=use_rapid_json)
+        if SNUBA_INFO:
+            if "sql" in body:
+                print(  # NOQA: only prints when an env variable is set
+                    "{}.sql:\n {}".format(
+                        headers.get("referer", "<unknown>"),
+                        sqlparse.format(body["sql"], reindent_aligned=True),
                     )
-                else:
-                    raise SnubaError(error["message"])
+                )
+            if "error" in body:
+                print(  # NOQA: only prints when an env variable is set
+                    "{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"])
+                )
+    except ValueError:
+        if response.status != 200:
+            logger.exception("snuba.query.invalid-json", extra={"response.data": response.data})
+            raise SnubaError("Failed to parse snuba error response")
+        raise UnexpectedResponseError(f"Could not decode JSON response: {response.data!r}")
+
+    if response.status != 200:
+        if body.get("error"):
+            error = body["error"]
+            if response.status == 429:
+                raise RateLimitExceeded(error["message"])
+            elif error["type"] == "schema":
+                raise SchemaValidationError(error["message"])
+            elif error["type"] == "clickhouse":
+                raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                    error["message"]
+                )
             else:
-                raise SnubaError(f"HTTP {response.status}")
-
-        # Forward and reverse translation maps from model ids to snuba keys, per column
+                raise SnubaError(error["message"])
+        else:
+            raise SnubaError(f"HTTP {response.status}")
+
+    # Forward and reverse translation maps from model ids to snuba keys, per column
+    if result_format == RESULT_FORMAT_LAZY_ROWS:
+        body["data"] = _iter_translated_rows(body["data"], reverse)
+    elif result_format == RESULT_FORMAT_COLUMNAR:
+        if columns is None:
+            columns = [column["name"] for column in body.get("meta", ())]
+        data: Dict[str, List[Any]] = {column: [] for column in columns}
+        for row in _iter_translated_rows(body["data"], reverse):
+            for column, values in data.items():
+                values.append(row.get(column))
+        body["data"] = data
+    else:
         body["data"] = [reverse(d) for d in body["data"]]
-        results.append(body)
+    return body
 
-    return results
+
+def _iter_translated_rows(rows: List[Any], reverse: Translator) -> Iterator[Any]:
+    """
+    Translates rows one at a time, releasing every decoded row once it has been
+    handed out, so the decoded and the translated result are never both held in
+    memory in full.
+    """
+    for i in range(len(rows)):
+        row = rows[i]
+        rows[i] = None
+        yield reverse(row)
 
 
 RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
@@ -1068,6 +1436,8 @@ def query(
             selected_columns=selected_columns,
             totals=totals,
             use_cache=use_cache,
+            # With groups, `nest_groups` reads the rows in a single pass
+            result_format=RESULT_FORMAT_LAZY_ROWS if groupby else RESULT_FORMAT_ROWS,
             **kwargs,
         )
     except (QueryOutsideRetentionError, QueryOutsideGroupActivityError):
@@ -0,0 +1,247 @@
+"""
+An asyncio transport for Snuba queries.
+
+`utils.snuba` fans multiple queries out over a thread pool, with one blocking
+urllib3 request per thread. This module runs them instead as tasks of a single
+event loop, which lives in a background thread until the client is closed so
+that its connection pool is reused across calls. Synchronous callers hand
+their queries over to the loop and block until all of them are done.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Callable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import aiohttp
+import sentry_sdk
+from django.conf import settings
+from sentry_sdk.tracing import Span
+from snuba_sdk import Request
+
+from sentry.utils import metrics
+from sentry.utils.snuba import SNUBA_INFO, SnubaError, timer
+
+# Unlike threads, open connections are cheap, so the pool is larger than the
+# urllib3 one of the thread pool path.
+MAX_CONNECTIONS = 50
+# Same number of attempts as the urllib3 retries of the thread pool path
+MAX_ATTEMPTS = 5
+
+
+class AsyncSnubaResponse(NamedTuple):
+    """The parts of a urllib3 response read by `_decode_snuba_response`."""
+
+    status: int
+    data: bytes
+
+
+class QueryTimeout(SnubaError):
+    """A query did not complete within its timeout and was cancelled."""
+
+
+Translator = Callable[[Any], Any]
+
+
+class AsyncSnubaClient:
+    def __init__(self, url: str, max_connections: int = MAX_CONNECTIONS) -> None:
+        self.url = url.rstrip("/")
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pid: Optional[int] = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # Event loops and their connections do not survive a fork, workers
+            # forked from a process that used the client start their own.
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="snuba-async-client", daemon=True
+                )
+                thread.start()
+                self._loop = loop
+                self._thread = thread
+                self._session = None
+                self._pid = os.getpid()
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Only called from within the loop, so it needs no locking
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def _post(self, path: str, body: str, headers: Mapping[str, str]) -> AsyncSnubaResponse:
+        session = self._get_session()
+        attempt = 1
+        while True:
+            try:
+                async with session.post(f"{self.url}{path}", data=body, headers=headers) as resp:
+                    return AsyncSnubaResponse(status=resp.status, data=await resp.read())
+            except aiohttp.ServerTimeoutError:
+                raise
+            except aiohttp.ClientConnectionError:
+                # Like the urllib3 retries of the thread pool path, connection
+                # failures are retried while timeouts are not.
+                if attempt >= MAX_ATTEMPTS:
+                    raise
+                attempt += 1
+                metrics.incr("snuba.async_client.retry", skip_internal=True)
+
+    async def _query(
+        self,
+        request: Request,
+        body: str,
+        headers: Mapping[str, str],
+        timeout: float,
+        parent_span: Optional[Span],
+    ) -> AsyncSnubaResponse:
+        # Queries run concurrently on the loop thread, so their spans are
+        # started and finished by hand instead of being entered on a scope.
+        span = None
+        if parent_span is not None:
+            span = parent_span.start_child(op="snuba_snql.run", description=str(request))
+            span.set_tag("snuba.referrer", headers.get("referer", "<unknown>"))
+        try:
+            with timer("snql_query"):
+                return await asyncio.wait_for(
+                    self._post(f"/{request.dataset}/snql", body, headers), timeout=timeout
+                )
+        except asyncio.TimeoutError as error:
+            raise QueryTimeout(f"Query did not complete within {timeout}s") from error
+        except aiohttp.ClientError as error:
+            raise SnubaError(error) from error
+        finally:
+            if span is not None:
+                span.finish()
+
+    async def _query_all(
+        self,
+        requests: Sequence[Request],
+        bodies: Sequence[str],
+        headers: Mapping[str, str],
+        timeout: float,
+        parent_span: Optional[Span],
+    ) -> List[AsyncSnubaResponse]:
+        tasks = [
+            asyncio.ensure_future(self._query(request, body, headers, timeout, parent_span))
+            for request, body in zip(requests, bodies)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # The first failure fails the whole batch, so stop the other queries
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def query(
+        self,
+        requests: Sequence[Request],
+        headers: Mapping[str, str],
+        timeout: Optional[float] = None,
+    ) -> List[AsyncSnubaResponse]:
+        """
+        Runs the given requests concurrently and blocks until all of them
+        returned, in the order of the requests. `timeout` applies to each query
+        separately.
+        """
+        if timeout is None:
+            timeout = settings.SENTRY_SNUBA_TIMEOUT
+
+        referrer = headers.get("referer", "<unknown>")
+        bodies = []
+        for request in requests:
+            if SNUBA_INFO:
+                import pprint
+
+                print(  # NOQA: only prints when an env variable is set
+                    f"{referrer}.body:\n {pprint.pformat(request.to_dict())}"
+                )
+                request.flags.debug = True
+
+            with sentry_sdk.start_span(op="snuba_snql.validation", description=referrer) as span:
+                span.set_tag("snuba.referrer", referrer)
+                bodies.append(request.serialize())
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._query_all(requests, bodies, headers, timeout, sentry_sdk.Hub.current.scope.span),
+            self._get_loop(),
+        )
+        try:
+            # Queries time out on their own, this only guards against a stuck loop
+            return future.result(timeout=timeout * 2)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _close_session(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self) -> None:
+        """
+        Closes the connection pool and stops the loop thread. Using the client
+        again afterwards starts a new loop.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+            # A loop inherited through a fork has no thread running it
+            if loop is None or self._pid != os.getpid():
+                return
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def __enter__(self) -> AsyncSnubaClient:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_client: Optional[AsyncSnubaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AsyncSnubaClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncSnubaClient(settings.SENTRY_SNUBA)
+        return _client
+
+
+def bulk_snql_query_raw(
+    snuba_param_list: Sequence[Tuple[Request, Translator, Translator]],
+    headers: Mapping[str, str],
+    parent_api: str,
+    timeout: Optional[float] = None,
+) -> List[Tuple[AsyncSnubaResponse, Translator, Translator]]:
+    """
+    Asyncio counterpart of running `_snql_query` over the query thread pool.
+    Returns the raw responses along with the translators of every query.
+    """
+    requests = []
+    for request, _, _ in snuba_param_list:
+        request.parent_api = parent_api
+        requests.append(request)
+
+    with metrics.timer("snuba.async_client.query"):
+        responses = get_client().query(requests, headers, timeout=timeout)
+
+    return [
+        (response, forward, reverse)
+        for response, (_, forward, reverse) in zip(responses, snuba_param_list)
+    ]
@@ -176,6 +176,15 @@ def audit_hybrid_cloud_writes_and_deletes(request):
             validate_protected_queries(conn.queries)
 
 
+@pytest.fixture(autouse=True)
+def clear_search_parse_cache():
+    # Parsed queries depend on patched query builders in some tests
+    from sentry.api.event_search import clear_parse_cache
+
+    clear_parse_cache()
+    yield
+
+
 @pytest.fixture(autouse=True)
 def check_leaked_responses_mocks():
     yield
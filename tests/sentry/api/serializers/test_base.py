@@ -1,4 +1,4 @@
-from sentry.api.serializers import Serializer, serialize
+from sentry.api.serializers import Serializer, defer_serialize, serialize
 from sentry.testutils.cases import TestCase
 from sentry.testutils.silo import control_silo_test
 
@@ -33,6 +33,34 @@ class ParentSerializer(Serializer):
         }
 
 
+class CountingSerializer(Serializer):
+    def __init__(self):
+        self.batches = []
+
+    def get_attrs(self, item_list, user, **kwargs):
+        self.batches.append(list(item_list))
+        return {item: {"double": item * 2} for item in item_list}
+
+    def serialize(self, obj, attrs, user, **kwargs):
+        return {"value": obj, "double": attrs["double"]}
+
+
+class DeferringSerializer(Serializer):
+    def __init__(self, child_serializer):
+        self.child_serializer = child_serializer
+
+    def serialize(self, obj, attrs, user, **kwargs):
+        return {
+            "child": defer_serialize(obj, user, self.child_serializer),
+            "children": defer_serialize([obj, obj + 1], user, self.child_serializer),
+        }
+
+
+class FailingAttrsSerializer(Serializer):
+    def get_attrs(self, item_list, user, **kwargs):
+        raise Exception
+
+
 @control_silo_test(stable=True)
 class BaseSerializerTest(TestCase):
     def test_serialize(self):
@@ -78,3 +106,41 @@ class BaseSerializerTest(TestCase):
         result = serialize(foo, serializer=ParentSerializer())
         assert result["parent"] == "something"
         assert result["child"] is None
+
+    def test_defer_serialize_batches_nested_objects(self):
+        child_serializer = CountingSerializer()
+        result = serialize([1, 10], serializer=DeferringSerializer(child_serializer))
+
+        assert child_serializer.batches == [[1, 1, 2, 10, 10, 11]]
+        assert result == [
+            {
+                "child": {"value": 1, "double": 2},
+                "children": [{"value": 1, "double": 2}, {"value": 2, "double": 4}],
+            },
+            {
+                "child": {"value": 10, "double": 20},
+                "children": [{"value": 10, "double": 20}, {"value": 11, "double": 22}],
+            },
+        ]
+
+    def test_defer_serialize_nesting_levels(self):
+        child_serializer = CountingSerializer()
+        result = serialize(
+            [1, 2], serializer=DeferringSerializer(DeferringSerializer(child_serializer))
+        )
+
+        # Every nesting level is resolved in one batch
+        assert len(child_serializer.batches) == 1
+        assert result[1]["children"][1]["children"][1] == {"value": 4, "double": 8}
+
+    def test_defer_serialize_outside_serialize(self):
+        child_serializer = CountingSerializer()
+        assert defer_serialize(3, serializer=child_serializer) == {"value": 3, "double": 6}
+        assert defer_serialize(None, serializer=child_serializer) is None
+
+    def test_defer_serialize_failure(self):
+        result = serialize([1, 2], serializer=DeferringSerializer(FailingAttrsSerializer()))
+        assert result == [
+            {"child": None, "children": [None, None]},
+            {"child": None, "children": [None, None]},
+        ]
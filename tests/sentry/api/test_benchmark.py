@@ -0,0 +1,58 @@
+import pytest
+
+from sentry.api.event_search import (
+    SearchVisitor,
+    clear_parse_cache,
+    default_config,
+    event_search_grammar,
+    parse_search_query,
+)
+
+SIMPLE_QUERIES = [
+    f"event.type:error transaction:/api/{i}/ !user.email:user{i}@example.com" for i in range(100)
+]
+COMPLEX_QUERIES = [
+    f"transaction.duration:>{i}ms (release:1.{i} OR environment:prod) count():>10"
+    for i in range(100)
+]
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("queries", [SIMPLE_QUERIES, COMPLEX_QUERIES], ids=["simple", "complex"])
+def test_benchmark_parse_grammar(queries, benchmark):
+    # Baseline of parsing every query with the full grammar
+    def parse_all():
+        return [SearchVisitor(default_config).visit(event_search_grammar.parse(q)) for q in queries]
+
+    assert len(benchmark(parse_all)) == len(queries)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("queries", [SIMPLE_QUERIES, COMPLEX_QUERIES], ids=["simple", "complex"])
+def test_benchmark_parse_search_query_uncached(queries, benchmark):
+    def parse_all():
+        clear_parse_cache()
+        return [parse_search_query(q) for q in queries]
+
+    assert len(benchmark(parse_all)) == len(queries)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("queries", [SIMPLE_QUERIES, COMPLEX_QUERIES], ids=["simple", "complex"])
+def test_benchmark_parse_search_query_cached(queries, benchmark):
+    for q in queries:
+        parse_search_query(q)
+
+    def parse_all():
+        return [parse_search_query(q) for q in queries]
+
+    assert len(benchmark(parse_all)) == len(queries)
@@ -14,6 +14,10 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    SearchVisitor,
+    _parse_simple_query,
+    default_config,
+    event_search_grammar,
     parse_search_query,
 )
 from sentry.constants import MODULE_ROOT
@@ -705,3 +709,90 @@ def test_search_value_to_query_string(value, expected_query_string):
     actual = search_value.to_query_string()
 
     assert actual == expected_query_string
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        "transaction:/api/0/organizations/",
+        "  event.type:error   !user.email:foo@example.com ",
+        "release:backend@1.2.3 environment:prod-eu",
+        "title:*Timeout*",
+        "url:http://example.com/path",
+        "project_id:abc",
+        "error.handled:yes",
+    ],
+)
+def test_simple_query_matches_grammar(query):
+    def parse(fn):
+        try:
+            return fn(SearchVisitor(default_config))
+        except InvalidSearchQuery as error:
+            return str(error)
+
+    simple = parse(lambda visitor: _parse_simple_query(query, visitor))
+    assert simple is not None
+    assert simple == parse(lambda visitor: visitor.visit(event_search_grammar.parse(query)))
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "free text",
+        "has:user.email",
+        "is:unresolved",
+        "error.handled:true",
+        "project_id:1",
+        "transaction.duration:>5s",
+        "timestamp:-24h",
+        'message:"quoted value"',
+        "event.type:[error, default]",
+        "count():>1",
+        "tags[foo]:bar",
+        "a:b OR c:d",
+        "(a:b)",
+    ],
+)
+def test_simple_query_falls_back_to_grammar(query):
+    assert _parse_simple_query(query, SearchVisitor(default_config)) is None
+
+
+class ParseSearchQueryCacheTest(SimpleTestCase):
+    def parse_counting_visits(self, *queries, **kwargs):
+        with patch("sentry.api.event_search.SearchVisitor", wraps=SearchVisitor) as visitor:
+            results = [parse_search_query(query, **kwargs) for query in queries]
+        return results, visitor.call_count
+
+    def test_simple_query_skips_grammar(self):
+        with patch("sentry.api.event_search._parse_tree") as parse_tree:
+            parse_search_query("event.type:error transaction:foo")
+        assert not parse_tree.called
+
+    def test_results_are_cached(self):
+        (first, second), visits = self.parse_counting_visits(
+            "count():>1 transaction:foo", "count():>1 transaction:foo"
+        )
+        assert visits == 1
+        assert first == second
+        assert first is not second
+
+    def test_config_is_part_of_key(self):
+        _, visits = self.parse_counting_visits("user.email:foo", "user.email:foo")
+        assert visits == 1
+        _, visits = self.parse_counting_visits(
+            "user.email:foo", config=SearchConfig(allowed_keys={"user.email"})
+        )
+        assert visits == 1
+        with pytest.raises(InvalidSearchQuery):
+            parse_search_query("user.email:foo", config=SearchConfig(blocked_keys={"user.email"}))
+
+    def test_relative_dates_are_not_cached(self):
+        _, visits = self.parse_counting_visits("timestamp:-24h", "timestamp:-24h")
+        assert visits == 2
+
+    def test_params_are_not_cached(self):
+        _, visits = self.parse_counting_visits(
+            "transaction:foo", "transaction:foo", params={"environment": "prod"}
+        )
+        assert visits == 2
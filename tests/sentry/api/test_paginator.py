@@ -14,6 +14,8 @@ from sentry.api.paginator import (
     CombinedQuerysetPaginator,
     DateTimePaginator,
     GenericOffsetPaginator,
+    KeysetCombinedQuerysetPaginator,
+    KeysetPaginator,
     OffsetPaginator,
     Paginator,
     SequencePaginator,
@@ -24,7 +26,7 @@ from sentry.models.rule import Rule
 from sentry.models.user import User
 from sentry.testutils.cases import APITestCase, TestCase
 from sentry.testutils.silo import control_silo_test
-from sentry.utils.cursors import Cursor
+from sentry.utils.cursors import Cursor, StringCursor
 
 
 @control_silo_test(stable=True)
@@ -86,6 +88,69 @@ class PaginatorTest(TestCase):
         assert len(result3) == 0, (result3, list(result3))
 
 
+@control_silo_test(stable=True)
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Pairs of users share a join date, so pages split rows of equal value
+        self.users = [
+            self.create_user(f"user{i}@example.com", date_joined=now - timedelta(days=i // 2))
+            for i in range(7)
+        ]
+
+    def test_pages(self):
+        paginator = KeysetPaginator(User.objects.all(), ["-date_joined"])
+        expected = sorted(self.users, key=lambda u: (u.date_joined, u.id), reverse=True)
+
+        pages = []
+        cursor = None
+        while True:
+            result = paginator.get_result(limit=3, cursor=cursor)
+            pages.append(list(result))
+            if not result.next:
+                break
+            cursor = StringCursor.from_string(str(result.next))
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [user for page in pages for user in page] == expected
+
+        result = paginator.get_result(limit=3, cursor=StringCursor.from_string(str(result.prev)))
+        assert list(result) == pages[1]
+        assert result.prev
+        assert result.next
+
+        result = paginator.get_result(limit=3, cursor=StringCursor.from_string(str(result.prev)))
+        assert list(result) == pages[0]
+        assert not result.prev
+
+    def test_deep_page_query_is_bounded(self):
+        paginator = KeysetPaginator(User.objects.all(), ["date_joined", "id"])
+        first = paginator.get_result(limit=6)
+        result = paginator.get_result(limit=1, cursor=first.next)
+        assert list(result) == [
+            max(self.users, key=lambda u: (u.date_joined, u.id)),
+        ]
+        assert not result.next
+
+        queryset = paginator.build_queryset(paginator.value_from_cursor(first.next), False)
+        assert "OFFSET" not in str(queryset[:2].query)
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(User.objects.all(), ["date_joined"])
+        with pytest.raises(BadPaginationError):
+            paginator.get_result(limit=1, cursor=StringCursor("not-a-cursor", 0, 0))
+
+    def test_estimate_hits(self):
+        paginator = KeysetPaginator(User.objects.all(), ["id"], estimate_hits=True)
+        result = paginator.get_result(limit=1, count_hits=True, max_hits=5)
+        assert 1 <= result.hits <= 5
+        assert result.max_hits == 5
+
+        paginator = KeysetPaginator(User.objects.none(), ["id"], estimate_hits=True)
+        assert paginator.count_hits(1000) == 0
+
+
 @control_silo_test(stable=True)
 class OffsetPaginatorTest(TestCase):
     # offset paginator does not support dynamic limits on is_prev
@@ -809,6 +874,83 @@ class CombinedQuerysetPaginatorTest(APITestCase):
         assert result == page1_results
 
 
+class KeysetCombinedQuerysetPaginatorTest(APITestCase):
+    def test_simple(self):
+        project = self.project
+        Rule.objects.all().delete()
+
+        now = timezone.now()
+        alert_rules = [
+            self.create_alert_rule(name=f"alertrule{i}", date_added=now - timedelta(minutes=i))
+            for i in range(4)
+        ]
+        # Rules created at the same time as alert rules sort by model name on ties
+        rules = [
+            Rule.objects.create(
+                label=f"rule{i}", project=project, date_added=now - timedelta(minutes=i)
+            )
+            for i in range(3)
+        ]
+        expected = [rules[0], alert_rules[0], rules[1], alert_rules[1], rules[2], alert_rules[2]]
+        expected.append(alert_rules[3])
+
+        paginator = KeysetCombinedQuerysetPaginator(
+            intermediaries=[
+                CombinedQuerysetIntermediary(AlertRule.objects.all(), ["date_added"]),
+                CombinedQuerysetIntermediary(Rule.objects.all(), ["date_added"]),
+            ],
+            desc=True,
+        )
+
+        page1 = paginator.get_result(limit=3)
+        assert list(page1) == expected[:3]
+        assert page1.next
+        assert not page1.prev
+
+        page2 = paginator.get_result(limit=3, cursor=page1.next)
+        assert list(page2) == expected[3:6]
+
+        page3 = paginator.get_result(limit=3, cursor=page2.next)
+        assert list(page3) == expected[6:]
+        assert not page3.next
+
+        result = paginator.get_result(limit=3, cursor=page3.prev)
+        assert list(result) == expected[3:6]
+        result = paginator.get_result(limit=3, cursor=result.prev)
+        assert list(result) == expected[:3]
+        assert not result.prev
+
+        paginator = KeysetCombinedQuerysetPaginator(
+            intermediaries=[
+                CombinedQuerysetIntermediary(AlertRule.objects.all(), ["date_added"]),
+                CombinedQuerysetIntermediary(Rule.objects.all(), ["date_added"]),
+            ],
+        )
+        page1 = paginator.get_result(limit=4)
+        assert list(page1) == expected[::-1][:4]
+        page2 = paginator.get_result(limit=4, cursor=page1.next)
+        assert list(page2) == expected[::-1][4:]
+
+    def test_case_insensitive(self):
+        Rule.objects.all().delete()
+        self.create_alert_rule(name="b")
+        self.create_alert_rule(name="D")
+        Rule.objects.create(label="A", project=self.project)
+        Rule.objects.create(label="c", project=self.project)
+
+        paginator = KeysetCombinedQuerysetPaginator(
+            intermediaries=[
+                CombinedQuerysetIntermediary(AlertRule.objects.all(), ["name"]),
+                CombinedQuerysetIntermediary(Rule.objects.all(), ["label"]),
+            ],
+            case_insensitive=True,
+        )
+        page1 = paginator.get_result(limit=2)
+        page2 = paginator.get_result(limit=2, cursor=StringCursor.from_string(str(page1.next)))
+        assert [r.label if isinstance(r, Rule) else r.name for r in page1] == ["A", "b"]
+        assert [r.label if isinstance(r, Rule) else r.name for r in page2] == ["c", "D"]
+
+
 class TestChainPaginator(SimpleTestCase):
     cls = ChainPaginator
 
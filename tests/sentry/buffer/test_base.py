@@ -1,6 +1,8 @@
+import math
 from datetime import timedelta
 from unittest import mock
 
+from django.db.models import F
 from django.utils import timezone
 
 from sentry.buffer.base import Buffer
@@ -11,6 +13,7 @@ from sentry.models.release import Release, ReleaseProject
 from sentry.models.team import Team
 from sentry.receivers import create_default_projects
 from sentry.testutils.cases import TestCase
+from sentry.utils.dates import to_timestamp
 
 
 class BufferTest(TestCase):
@@ -75,3 +78,93 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch_saves_data(self):
+        group = Group.objects.create(project=Project(id=1))
+        other_group = Group.objects.create(project=Project(id=1))
+        release_project = ReleaseProject.objects.create(project=self.project, release=self.release)
+        rows = [
+            ({"times_seen": 1}, {"id": group.id}, None, None),
+            ({"times_seen": 2}, {"id": group.id}, None, None),
+            ({"times_seen": 5}, {"pk": other_group.id}, None, None),
+        ]
+
+        with mock.patch("sentry.buffer.base.Buffer.process") as process:
+            self.buf.process_batch(Group, rows)
+        assert not process.called
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 3
+        assert Group.objects.get(id=other_group.id).times_seen == other_group.times_seen + 5
+
+        self.buf.process_batch(
+            ReleaseProject, [({"new_groups": 2}, {"id": release_project.id}, None, None)]
+        )
+        assert ReleaseProject.objects.get(id=release_project.id).new_groups == 2
+
+    def test_process_batch_saves_extra(self):
+        group = Group.objects.create(project=Project(id=1))
+        first_date = timezone.now() + timedelta(days=4)
+        the_date = timezone.now() + timedelta(days=5)
+        filters = {"id": group.id, "project_id": 1}
+        rows = [
+            ({"times_seen": 1}, filters, {"last_seen": first_date, "data": {"foo": "bar"}}, None),
+            ({"times_seen": 1}, filters, {"last_seen": the_date}, None),
+        ]
+
+        with mock.patch("sentry.buffer.base.Buffer.process") as process, mock.patch(
+            "sentry.buffer.base.post_save"
+        ) as post_save:
+            self.buf.process_batch(Group, rows)
+        assert not process.called
+
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 2
+        assert group_.last_seen == the_date
+        assert group_.data == {"foo": "bar"}
+        assert group_.score == round(
+            math.log(group.times_seen + 2) * 600 + int(to_timestamp(the_date))
+        )
+        post_save.send.assert_called_once_with(sender=Group, instance=group_, created=False)
+
+    def test_process_batch_creates_missing_rows(self):
+        release_project = ReleaseProject.objects.create(project=self.project, release=self.release)
+        other_project = self.create_project()
+        existing = {"project_id": self.project.id, "release_id": self.release.id}
+        missing = {"project_id": other_project.id, "release_id": self.release.id}
+        rows = [
+            ({"new_groups": 1}, existing, None, None),
+            ({"new_groups": 1}, missing, None, None),
+            ({"new_groups": 2}, missing, None, None),
+        ]
+
+        with mock.patch("sentry.buffer.base.buffer_incr_complete") as buffer_incr_complete:
+            self.buf.process_batch(ReleaseProject, rows)
+
+        assert ReleaseProject.objects.get(id=release_project.id).new_groups == 1
+        assert ReleaseProject.objects.get(**missing).new_groups == 3
+        created = {
+            (tuple(c.kwargs["filters"].values()), c.kwargs["columns"]["new_groups"]): c.kwargs[
+                "created"
+            ]
+            for c in buffer_incr_complete.send_robust.call_args_list
+        }
+        assert created == {
+            (tuple(existing.values()), 1): False,
+            (tuple(missing.values()), 1): True,
+            (tuple(missing.values()), 2): False,
+        }
+
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_batch_falls_back_to_process(self, process):
+        group = Group.objects.create(project=Project(id=1))
+        other_group = Group.objects.create(project=Project(id=1))
+        the_date = timezone.now() + timedelta(days=5)
+        rows = [
+            ({"times_seen": 1}, {"id": group.id}, {"last_seen": the_date}, None),
+            ({"times_seen": 1}, {"id": group.id}, None, True),
+            ({"times_seen": 1}, {"id": other_group.id}, {"status": F("status")}, None),
+            ({"times_seen": 1}, {"project__slug": "foo"}, None, None),
+        ]
+        self.buf.process_batch(Group, rows)
+        assert process.call_args_list == [mock.call(Group, *row) for row in rows]
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen
+        assert Group.objects.get(id=other_group.id).times_seen == other_group.times_seen
@@ -1,5 +1,6 @@
 import datetime
 import pickle
+import time
 from unittest import mock
 
 import pytest
@@ -57,6 +58,33 @@ class TestRedisBuffer:
         client = self.buf.get_routing_client()
         assert client.zrange("b:p", 0, -1) == []
 
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_chunked(self, process_incr):
+        self.buf.incr_batch_size = 2
+        self.buf.pending_chunk_size = 2
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3})
+        self.buf.process_pending()
+        assert process_incr.apply_async.mock_calls == [
+            mock.call(kwargs={"batch_keys": ["foo", "bar"]}),
+            mock.call(kwargs={"batch_keys": ["baz"]}),
+        ]
+        client = self.buf.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_chunked_skips_newer_keys(self, process_incr):
+        self.buf.incr_batch_size = 5
+        self.buf.pending_chunk_size = 1
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": time.time() + 60})
+        self.buf.process_pending()
+        assert process_incr.apply_async.mock_calls == [
+            mock.call(kwargs={"batch_keys": ["foo"]}),
+        ]
+        client = self.buf.get_routing_client()
+        assert len(client.zrange("b:p", 0, -1)) == 1
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.base.Buffer.process")
     def test_process_does_bubble_up_json(self, process):
@@ -132,6 +160,117 @@ class TestRedisBuffer:
         self.buf.incr(model, {"times_seen": 5}, filters)
         assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
 
+    def test_incr_coalesced(self):
+        self.buf.incr_coalesce_size = 2
+        self.buf.incr_coalesce_interval = 60
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        columns = ["times_seen"]
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters=filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar"})
+        self.buf.incr(model, {"times_seen": 5}, filters, extra={"foo": "baz"})
+        # nothing has been written yet, but pending increments are still visible
+        assert client.zrange("b:p", 0, -1) == []
+        assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
+
+        # a second distinct key reaches the coalesce size and flushes both
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2}, signal_only=True)
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert self.buf._coalesced == {}
+
+        result = client.hgetall(key)
+        if not self.buf.is_redis_cluster:
+            result = {k.decode(): v for k, v in result.items()}
+        assert int(result["i+times_seen"]) == 6
+        if self.buf.is_redis_cluster:
+            assert self.buf._load_value(json.loads(result["e+foo"])) == "baz"
+        else:
+            assert pickle.loads(result["e+foo"]) == "baz"
+        assert "s" not in result
+        assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
+
+    @mock.patch("sentry.buffer.redis.time")
+    def test_incr_coalesced_interval(self, mock_time):
+        self.buf.incr_coalesce_size = 100
+        self.buf.incr_coalesce_interval = 1
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        mock_time.return_value = 1000.0
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        assert client.zrange("b:p", 0, -1) == []
+
+        mock_time.return_value = 1001.0
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        assert len(client.zrange("b:p", 0, -1)) == 1
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 2}
+
+    def test_incr_coalesced_flushes_on_timer(self):
+        self.buf.incr_coalesce_size = 100
+        self.buf.incr_coalesce_interval = 0.01
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        timer = self.buf._coalesced_timer
+        assert timer is not None
+        # no further `incr` comes along, the timer writes the increment out
+        timer.join(timeout=5)
+        assert self.buf._coalesced == {}
+        assert self.buf._coalesced_timer is None
+        assert len(client.zrange("b:p", 0, -1)) == 1
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 1}
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_flushes_coalesced(self, process_incr):
+        self.buf.incr_coalesce_size = 100
+        self.buf.incr_coalesce_interval = 60
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        self.buf.process_pending()
+        assert self.buf._coalesced == {}
+        process_incr.apply_async.assert_called_once_with(
+            kwargs={"batch_keys": [self.buf._make_key(model, filters)]}
+        )
+
+    def test_flush_coalesced_restores_on_failure(self):
+        self.buf.incr_coalesce_size = 100
+        self.buf.incr_coalesce_interval = 60
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters=filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar"})
+        self.buf.incr(model, {"times_seen": 2}, {"pk": 2})
+        with mock.patch.object(
+            self.buf, "_queue_incr", side_effect=[None, Exception("boom")]
+        ), pytest.raises(Exception):
+            self.buf.flush_coalesced()
+
+        assert client.zrange("b:p", 0, -1) == []
+        assert self.buf._coalesced_timer is not None
+        self.buf.incr(model, {"times_seen": 5}, filters, extra={"foo": "baz"})
+        assert self.buf._coalesced[key].columns == {"times_seen": 6}
+        assert self.buf._coalesced[key].extra == {"foo": "baz"}
+        assert self.buf._coalesced[key].count == 2
+
+        self.buf.flush_coalesced()
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 6}
+        assert self.buf.get(model, ["times_seen"], filters={"pk": 2}) == {"times_seen": 2}
+
     def test_incr_saves_to_redis(self):
         now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
         client = self.buf.get_routing_client()
@@ -241,6 +380,37 @@ class TestRedisBuffer:
         # Make sure we didn't queue up more
         assert len(process_pending.apply_async.mock_calls) == 2
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_keys(self, process_batch):
+        client = self.buf.get_routing_client()
+        client.hmset(
+            "foo",
+            {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"},
+        )
+        client.hmset(
+            "bar",
+            {
+                "e+foo": '["s","bar"]',
+                "f": '{"pk": ["i","2"]}',
+                "i+times_seen": "1",
+                "m": "sentry.models.Group",
+            },
+        )
+        client.zadd("b:p", {"foo": 1, "bar": 2})
+
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+        process_batch.assert_called_once_with(
+            Group,
+            [
+                ({"times_seen": 2}, {"pk": 1}, {}, None),
+                ({"times_seen": 1}, {"pk": 2}, {"foo": "bar"}, None),
+            ],
+        )
+        client = self.buf.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists("foo")
+        assert not client.exists("bar")
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.base.Buffer.process")
     def test_process_uses_signal_only(self, process):
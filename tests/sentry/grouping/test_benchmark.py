@@ -1,6 +1,10 @@
+from contextlib import nullcontext
+
 import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.enhancer import Enhancements
+from sentry.grouping.strategies.base import memoize_grouping_components
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
@@ -37,3 +41,60 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+def _make_custom_rules(count):
+    rules = []
+    for i in range(count):
+        rules.append(f"function:com.example.service{i}.* -group")
+        rules.append(f"module:org.vendor{i}.* -app")
+        rules.append(f"stack.function:vendor_{i}_* ^-group")
+    return "\n".join(rules)
+
+
+def _make_frames(platform, count):
+    if platform == "java":
+        return [
+            {"function": f"handle{i}", "module": f"com.example.service{i % 50}.Handler"}
+            for i in range(count)
+        ]
+    return [
+        {"function": f"vendor_{i % 50}_callback", "package": "/usr/lib/libvendor.so"}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("platform", ["java", "native"])
+def test_benchmark_enhancements(platform, benchmark):
+    enhancements = Enhancements.from_config_string(
+        _make_custom_rules(100), bases=["newstyle:2023-01-11"]
+    )
+    frames = _make_frames(platform, 200)
+
+    def run():
+        enhancements.apply_modifications_to_frame([dict(frame) for frame in frames], platform, {})
+
+    benchmark.extra_info["frames"] = len(frames)
+    benchmark(run)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("memoize", [False, True], ids=["plain", "memoized"])
+def test_benchmark_grouping_config_transition(memoize, benchmark):
+    # Primary and secondary config of the last grouping config upgrade
+    configs = [CONFIGS["newstyle:2023-01-11"], CONFIGS["newstyle:2019-10-29"]]
+    events = []
+    for grouping_input in grouping_inputs:
+        pair = [grouping_input.create_event(dict(config)) for config in configs]
+        for event in pair:
+            event.project = None
+        events.append(pair)
+
+    def run():
+        for pair in events:
+            with memoize_grouping_components() if memoize else nullcontext():
+                for event in pair:
+                    event.get_grouping_variants()
+
+    benchmark(run)
@@ -7,7 +7,7 @@ import pytest
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements
 from sentry.grouping.enhancer.exceptions import InvalidEnhancerConfig
-from sentry.grouping.enhancer.matchers import create_match_frame
+from sentry.grouping.enhancer.matchers import create_match_frame, get_literal_prefix
 
 
 def dump_obj(obj):
@@ -448,3 +448,61 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+def test_get_literal_prefix():
+    assert get_literal_prefix(b"java.lang.*") == b"java.lang."
+    assert get_literal_prefix(b"std::*::fmt") == b"std::"
+    assert get_literal_prefix(b"exact_function") == b"exact_function"
+    assert get_literal_prefix(b"?foo") == b""
+    assert get_literal_prefix(b"foo[ab]") == b"foo"
+
+
+def test_prefilter_matching():
+    enhancement = Enhancements.from_config_string(
+        """
+        function:java.lang.reflect.* -group
+        module:com.example.* function:handle* +app
+        !function:java.* -app
+        category:telemetry -group
+    """
+    )
+    reflect_rule, example_rule, negated_rule, category_rule = enhancement.rules
+    assert reflect_rule._prefilter == ("function", b"java.lang.reflect.")
+    # the longest prefix wins
+    assert example_rule._prefilter == ("module", b"com.example.")
+    assert negated_rule._prefilter is None
+    assert category_rule._prefilter is None
+
+    frames = [
+        {"function": "java.lang.reflect.Method.invoke"},
+        {"function": "handleRequest", "module": "com.example.app"},
+        {"function": "handleRequest", "module": "org.example.app"},
+        {"function": "main"},
+    ]
+    platform = "java"
+    match_frames = [create_match_frame(frame, platform) for frame in frames]
+
+    for cache in (None, {}):
+        assert [
+            idx
+            for idx, _ in reflect_rule.get_matching_frame_actions(
+                match_frames, platform, None, {}, cache
+            )
+        ] == [0]
+        assert [
+            idx
+            for idx, _ in example_rule.get_matching_frame_actions(
+                match_frames, platform, None, {}, cache
+            )
+        ] == [1]
+        assert [
+            idx
+            for idx, _ in negated_rule.get_matching_frame_actions(
+                match_frames, platform, None, {}, cache
+            )
+        ] == [1, 2, 3]
+
+    candidates_cache: dict = {}
+    example_rule.get_matching_frame_actions(match_frames, platform, None, {}, candidates_cache)
+    assert candidates_cache == {("module", b"com.example."): [1]}
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import copy
+
 import pytest
 
+from sentry import eventstore
 from sentry.eventtypes.base import format_title_from_tree_label
 from sentry.grouping.api import detect_synthetic_exception, get_default_grouping_config_dict
 from sentry.grouping.component import GroupingComponent
+from sentry.grouping.strategies.base import memoize_grouping_components
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
 from sentry.utils import json
 from tests.sentry.grouping import with_grouping_input
@@ -78,3 +82,62 @@ def test_event_hash_variant(config_name, grouping_input, insta_snapshot, log):
     assert evt.get_grouping_config() == grouping_config
 
     insta_snapshot(output)
+
+
+def _dump_variants(evt):
+    rv: list[str] = []
+    for (key, value) in sorted(evt.get_grouping_variants().items()):
+        rv.append("%s:" % key)
+        dump_variant(value, rv, 1)
+    return rv
+
+
+@with_grouping_input("grouping_input")
+def test_memoized_event_hash_variant(grouping_input):
+    events = []
+    for config_name in CONFIGURATIONS.keys():
+        evt = grouping_input.create_event(get_default_grouping_config_dict(config_name))
+        evt.project = None
+        events.append(evt)
+
+    expected = [_dump_variants(copy.deepcopy(evt)) for evt in events]
+
+    with memoize_grouping_components():
+        assert [_dump_variants(evt) for evt in events] == expected
+
+
+def test_memoized_frames_shared_between_configs():
+    data = {
+        "platform": "python",
+        "exception": {
+            "values": [
+                {
+                    "type": "ValueError",
+                    "stacktrace": {
+                        "frames": [
+                            {"function": "main", "module": "app.main", "in_app": True},
+                            {"function": "handle", "module": "app.views", "in_app": True},
+                        ]
+                    },
+                }
+            ]
+        },
+    }
+    expected = {}
+    events = {}
+    for config_name in ("newstyle:2019-10-29", "newstyle:2023-01-11"):
+        grouping_config = get_default_grouping_config_dict(config_name)
+        events[config_name] = evt = eventstore.backend.create_event(
+            data={**data, "grouping_config": grouping_config}
+        )
+        expected[config_name] = _dump_variants(copy.deepcopy(evt))
+
+    with memoize_grouping_components() as memo:
+        with memoize_grouping_components() as nested_memo:
+            assert nested_memo is memo
+            for config_name, evt in events.items():
+                assert _dump_variants(evt) == expected[config_name]
+
+    # Frames are computed for the first config and reused by the second one
+    assert memo.misses
+    assert memo.hits == memo.misses
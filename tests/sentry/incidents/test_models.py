@@ -123,6 +123,47 @@ class IncidentClearSubscriptionCacheTest(TestCase):
             AlertRule.objects.get_for_subscription(self.subscription)
 
 
+class AlertRuleGetForSubscriptionsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        other_subscription = other_alert_rule.snuba_query.subscriptions.get()
+        # Seed the cache for one of the subscriptions
+        assert AlertRule.objects.get_for_subscription(subscription) == alert_rule
+
+        assert AlertRule.objects.get_for_subscriptions([subscription, other_subscription]) == {
+            subscription.id: alert_rule,
+            other_subscription.id: other_alert_rule,
+        }
+        assert (
+            cache.get(AlertRule.objects.CACHE_SUBSCRIPTION_KEY % other_subscription.id)
+            == other_alert_rule
+        )
+
+    def test_missing_alert_rule(self):
+        alert_rule = self.create_alert_rule()
+        subscription = alert_rule.snuba_query.subscriptions.get()
+        alert_rule.delete()
+        assert AlertRule.objects.get_for_subscriptions([subscription]) == {}
+
+
+class AlertRuleTriggerGetForAlertRulesTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        trigger = self.create_alert_rule_trigger(alert_rule)
+        other_alert_rule = self.create_alert_rule()
+        AlertRuleTrigger.objects.get_for_alert_rule(alert_rule)
+
+        assert AlertRuleTrigger.objects.get_for_alert_rules([alert_rule, other_alert_rule]) == {
+            alert_rule.id: [trigger],
+            other_alert_rule.id: [],
+        }
+        assert (
+            cache.get(AlertRuleTrigger.objects._build_trigger_cache_key(other_alert_rule.id)) == []
+        )
+
+
 class AlertRuleTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
@@ -240,6 +281,46 @@ class ActiveIncidentClearCacheTest(TestCase):
         )
 
 
+class GetActiveIncidentsTest(TestCase):
+    def test(self):
+        alert_rule = self.create_alert_rule()
+        other_project = self.create_project()
+        self.create_incident(
+            alert_rule=alert_rule,
+            projects=[self.project],
+            status=IncidentStatus.CLOSED.value,
+        )
+        active_incident = self.create_incident(alert_rule=alert_rule, projects=[self.project])
+
+        assert Incident.objects.get_active_incidents(
+            [(alert_rule.id, self.project.id), (alert_rule.id, other_project.id)]
+        ) == {
+            (alert_rule.id, self.project.id): active_incident,
+            (alert_rule.id, other_project.id): None,
+        }
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(alert_rule.id, self.project.id)
+            )
+            == active_incident
+        )
+        assert (
+            cache.get(
+                Incident.objects._build_active_incident_cache_key(alert_rule.id, other_project.id)
+            )
+            is False
+        )
+
+        # Now test fetching from cache, including the negative cache
+        with self.assertNumQueries(0):
+            assert Incident.objects.get_active_incidents(
+                [(alert_rule.id, self.project.id), (alert_rule.id, other_project.id)]
+            ) == {
+                (alert_rule.id, self.project.id): active_incident,
+                (alert_rule.id, other_project.id): None,
+            }
+
+
 class IncidentTriggerClearCacheTest(TestCase):
     def setUp(self):
         self.alert_rule = self.create_alert_rule()
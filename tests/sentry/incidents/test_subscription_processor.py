@@ -34,8 +34,10 @@ from sentry.incidents.subscription_processor import (
     build_alert_rule_trigger_stat_key,
     build_trigger_stat_keys,
     get_alert_rule_stats,
+    get_alert_rule_stats_many,
     get_redis_client,
     partition,
+    process_updates_in_batch,
     update_alert_rule_stats,
 )
 from sentry.models.integrations.integration import Integration
@@ -48,7 +50,7 @@ from sentry.testutils.cases import BaseMetricsTestCase, SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import freeze_time, iso_format
 from sentry.testutils.helpers.features import with_feature
 from sentry.utils import json
-from sentry.utils.dates import to_timestamp
+from sentry.utils.dates import to_datetime, to_timestamp
 
 EMPTY = object()
 
@@ -876,6 +878,113 @@ class ProcessUpdateTest(ProcessUpdateBaseClass):
         self.assert_trigger_exists_with_status(other_incident, self.trigger, TriggerStatus.RESOLVED)
         self.assert_action_handler_called_with_actions(other_incident, [])
 
+    def send_updates_in_batch(self, updates):
+        self.email_action_handler.reset_mock()
+        batch = [
+            (
+                self.build_subscription_update(subscription, value=value, time_delta=time_delta),
+                subscription,
+            )
+            for subscription, value, time_delta in updates
+        ]
+        with self.feature(
+            ["organizations:incidents", "organizations:performance-view"]
+        ), self.capture_on_commit_callbacks(execute=True):
+            process_updates_in_batch(batch)
+
+    def test_batch_multiple_subscriptions_do_not_conflict(self):
+        rule = self.rule
+        rule.update(threshold_period=2)
+        trigger = self.trigger
+
+        # Two consecutive updates over the threshold for the first subscription, but
+        # only one for the other, in a single batch
+        self.send_updates_in_batch(
+            [
+                (self.sub, trigger.alert_threshold + 1, timedelta(minutes=-10)),
+                (self.other_sub, trigger.alert_threshold + 1, timedelta(minutes=-10)),
+                (self.sub, trigger.alert_threshold + 1, timedelta(minutes=-9)),
+            ]
+        )
+        incident = self.assert_active_incident(rule, self.sub)
+        self.assert_trigger_exists_with_status(incident, self.trigger, TriggerStatus.ACTIVE)
+        self.assert_actions_fired_for_incident(
+            incident,
+            [self.action],
+            [(trigger.alert_threshold + 1, IncidentStatus.CRITICAL, mock.ANY)],
+        )
+        self.assert_no_active_incident(rule, self.other_sub)
+        self.assert_trigger_counts(SubscriptionProcessor(self.sub), self.trigger, 0, 0)
+        self.assert_trigger_counts(SubscriptionProcessor(self.other_sub), self.trigger, 1, 0)
+
+        # Resolving uses the incident fetched in bulk for the batch
+        self.send_updates_in_batch(
+            [
+                (self.sub, rule.resolve_threshold - 1, timedelta(minutes=-8)),
+                (self.sub, rule.resolve_threshold - 1, timedelta(minutes=-7)),
+            ]
+        )
+        self.assert_no_active_incident(rule, self.sub)
+        self.assert_trigger_exists_with_status(incident, self.trigger, TriggerStatus.RESOLVED)
+        self.assert_actions_resolved_for_incident(
+            incident, [self.action], [(rule.resolve_threshold - 1, IncidentStatus.CLOSED, mock.ANY)]
+        )
+        self.assert_trigger_counts(SubscriptionProcessor(self.sub), self.trigger, 0, 0)
+
+    def test_batch_skip_already_processed_update(self):
+        self.send_updates_in_batch(
+            [
+                (self.sub, self.trigger.alert_threshold, timedelta(minutes=-1)),
+                (self.sub, self.trigger.alert_threshold, timedelta(minutes=-1)),
+            ]
+        )
+        self.metrics.incr.assert_called_once_with(
+            "incidents.alert_rules.skipping_already_processed_update"
+        )
+
+    def test_batch_writes_stats_of_failed_subscription(self):
+        rule = self.rule
+        rule.update(threshold_period=3)
+        trigger = self.trigger
+        process_update = SubscriptionProcessor.process_update
+
+        def fail_second_update(processor, subscription_update):
+            if fail_second_update.calls == 1:
+                raise Exception("boom")
+            fail_second_update.calls += 1
+            return process_update(processor, subscription_update)
+
+        fail_second_update.calls = 0
+
+        with mock.patch.object(
+            SubscriptionProcessor,
+            "process_update",
+            autospec=True,
+            side_effect=fail_second_update,
+        ):
+            self.send_updates_in_batch(
+                [
+                    (self.sub, trigger.alert_threshold + 1, timedelta(minutes=-10)),
+                    (self.sub, trigger.alert_threshold + 1, timedelta(minutes=-9)),
+                    (self.sub, trigger.alert_threshold + 1, timedelta(minutes=-8)),
+                ]
+            )
+
+        # The count from the first update is kept even though the batch for this
+        # subscription failed afterwards
+        self.assert_trigger_counts(SubscriptionProcessor(self.sub), trigger, 1, 0)
+        self.metrics.incr.assert_called_once_with(
+            "incidents.subscription_processor.batch.skipping_failed_subscription"
+        )
+
+    def test_batch_removed_alert_rule(self):
+        subscription = self.sub
+        self.rule.delete()
+        self.send_updates_in_batch([(subscription, 1, timedelta())])
+        self.metrics.incr.assert_called_once_with(
+            "incidents.alert_rules.no_alert_rule_for_subscription"
+        )
+
     def test_multiple_triggers(self):
         rule = self.rule
         rule.update(threshold_period=1)
@@ -2866,6 +2975,35 @@ class TestGetAlertRuleStats(TestCase):
         assert resolve_counts == {3: 2, 4: 4}
 
 
+class TestGetAlertRuleStatsMany(TestCase):
+    def test(self):
+        triggers = [AlertRuleTrigger(id=3), AlertRuleTrigger(id=4)]
+        client = get_redis_client()
+        pipeline = client.pipeline()
+        timestamp = datetime.now().replace(tzinfo=timezone.utc, microsecond=0)
+        pipeline.set("{alert_rule:1:project:2}:last_update", int(to_timestamp(timestamp)))
+        for key, value in [
+            ("{alert_rule:1:project:2}:trigger:3:alert_triggered", 1),
+            ("{alert_rule:1:project:2}:trigger:4:resolve_triggered", 4),
+            ("{alert_rule:5:project:2}:trigger:6:alert_triggered", 7),
+        ]:
+            pipeline.set(key, value)
+        pipeline.execute()
+
+        assert get_alert_rule_stats_many(
+            [
+                (AlertRule(id=1), QuerySubscription(project_id=2), triggers),
+                (AlertRule(id=5), QuerySubscription(project_id=2), [AlertRuleTrigger(id=6)]),
+            ]
+        ) == [
+            (timestamp, {3: 1, 4: 0}, {3: 0, 4: 4}),
+            (to_datetime(0), {6: 7}, {6: 0}),
+        ]
+
+    def test_empty(self):
+        assert get_alert_rule_stats_many([]) == []
+
+
 class TestUpdateAlertRuleStats(TestCase):
     def test(self):
         alert_rule = AlertRule(id=1)
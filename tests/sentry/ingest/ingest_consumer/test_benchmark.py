@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+from unittest.mock import Mock
+
+import msgpack
+import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.backends.local.backend import LocalBroker, LocalProducer
+from arroyo.backends.local.storages.memory import MemoryMessageStorage
+from arroyo.types import Message, Partition, Topic
+from arroyo.utils.clock import TestingClock as Clock
+
+from sentry.ingest.consumer.factory import IngestStrategyFactory
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.testutils.skips import requires_snuba
+from sentry.utils import json
+
+pytestmark = [requires_snuba]
+
+NUM_MESSAGES = 1000
+NUM_PROJECTS = 10
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.fixture
+def ingest_topic(default_project, factories):
+    """
+    A local broker standing in for Kafka, holding a topic of event messages
+    spread over a few projects.
+    """
+    projects = [default_project] + [
+        factories.create_project(organization=default_project.organization)
+        for _ in range(NUM_PROJECTS - 1)
+    ]
+    topic = Topic("ingest-events")
+    storage: MemoryMessageStorage[KafkaPayload] = MemoryMessageStorage()
+    broker: LocalBroker[KafkaPayload] = LocalBroker(storage, Clock())
+    broker.create_topic(topic, partitions=1)
+    producer = LocalProducer(broker)
+
+    start_time = time.time()
+    for i in range(NUM_MESSAGES):
+        event_id = f"{i:032x}"
+        project = projects[i % NUM_PROJECTS]
+        message = {
+            "type": "event",
+            "payload": json.dumps({"event_id": event_id, "message": f"hello world {i}"}),
+            "start_time": start_time,
+            "event_id": event_id,
+            "project_id": project.id,
+            "remote_addr": "127.0.0.1",
+        }
+        producer.produce(topic, KafkaPayload(None, msgpack.packb(message), [])).result()
+
+    return storage, topic
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("batched", [False, True], ids=["per_message", "batched"])
+def test_benchmark_ingest_consumer(ingest_topic, batched, monkeypatch, benchmark):
+    storage, topic = ingest_topic
+    partition = Partition(topic, 0)
+    monkeypatch.setattr("sentry.ingest.consumer.processors.preprocess_event", Mock())
+    # Deduplication would skip every event after the first round
+    monkeypatch.setattr(
+        "sentry.ingest.consumer.processors.cache",
+        Mock(**{"get.return_value": None, "get_many.return_value": {}}),
+    )
+
+    factory = IngestStrategyFactory(
+        consumer_type="events",
+        num_processes=1,
+        max_batch_size=100,
+        max_batch_time=1,
+        input_block_size=1,
+        output_block_size=1,
+        batched=batched,
+    )
+
+    def consume_topic():
+        commit = Mock()
+        strategy = factory.create_with_partitions(commit, {partition: 0})
+        for offset in range(NUM_MESSAGES):
+            value = storage.consume(partition, offset)
+            strategy.submit(Message(value))
+            strategy.poll()
+        strategy.join()
+        return commit.call_args[0][0]
+
+    assert benchmark(consume_topic) == {partition: NUM_MESSAGES}
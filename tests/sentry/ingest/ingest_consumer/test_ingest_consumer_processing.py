@@ -8,12 +8,18 @@ from io import BytesIO
 from typing import Any
 from unittest.mock import Mock
 
+import msgpack
 import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition, Topic
 
 from sentry.event_manager import EventManager
+from sentry.eventstore.processing import event_processing_store
+from sentry.ingest.consumer.factory import IngestStrategyFactory
 from sentry.ingest.consumer.processors import (
     process_attachment_chunk,
     process_event,
+    process_event_batch,
     process_individual_attachment,
     process_userreport,
 )
@@ -194,6 +200,91 @@ def test_feedbacks_spawn_save_event_feedback(
     assert save_event_feedback.delay.call_args[1]["data"]["type"] == "feedback"
 
 
+def make_event_message(payload, project_id, start_time):
+    return {
+        "type": "event",
+        "payload": json.dumps(payload),
+        "start_time": start_time,
+        "event_id": payload["event_id"],
+        "project_id": project_id,
+        "remote_addr": "127.0.0.1",
+    }
+
+
+@django_db_all
+def test_process_event_batch(default_project, factories, task_runner, preprocess_event):
+    other_project = factories.create_project(organization=default_project.organization)
+    start_time = time.time() - 3600
+    payloads = [
+        get_normalized_event({"message": f"hello world {i}"}, project)
+        for i, project in enumerate([default_project, other_project, default_project])
+    ]
+    messages = [
+        (make_event_message(payloads[0], default_project.id, start_time), default_project),
+        (make_event_message(payloads[1], other_project.id, start_time), other_project),
+        (make_event_message(payloads[2], default_project.id, start_time), default_project),
+    ]
+
+    # The duplicate within the batch is skipped
+    process_event_batch(messages + messages[:1])
+
+    assert [kwargs["event_id"] for kwargs in preprocess_event] == [p["event_id"] for p in payloads]
+    for kwargs, payload, (_, project) in zip(preprocess_event, payloads, messages):
+        assert kwargs == {
+            "cache_key": f"e:{payload['event_id']}:{project.id}",
+            "data": payload,
+            "event_id": payload["event_id"],
+            "project": project,
+            "start_time": start_time,
+            "has_attachments": False,
+        }
+        assert event_processing_store.get(kwargs["cache_key"]) == payload
+
+    # So are events processed by an earlier batch
+    process_event_batch(messages)
+    assert len(preprocess_event) == 3
+
+
+@django_db_all
+def test_batched_strategy_commits_batches(default_project, task_runner, preprocess_event):
+    start_time = time.time() - 3600
+    partition = Partition(Topic("ingest-events"), 0)
+    commit = Mock()
+    factory = IngestStrategyFactory(
+        consumer_type="events",
+        num_processes=1,
+        max_batch_size=2,
+        max_batch_time=10,
+        input_block_size=1,
+        output_block_size=1,
+        batched=True,
+    )
+    strategy = factory.create_with_partitions(commit, {partition: 0})
+
+    for offset in range(3):
+        payload = get_normalized_event({"message": f"hello world {offset}"}, default_project)
+        message = make_event_message(payload, default_project.id, start_time)
+        strategy.submit(
+            Message(
+                BrokerValue(
+                    KafkaPayload(None, msgpack.packb(message), []),
+                    partition,
+                    offset,
+                    datetime.datetime.now(),
+                )
+            )
+        )
+        strategy.poll()
+
+    # The first two messages are a full batch
+    assert len(preprocess_event) == 2
+    assert commit.call_args[0][0] == {partition: 2}
+
+    strategy.join()
+    assert len(preprocess_event) == 3
+    assert commit.call_args[0][0] == {partition: 3}
+
+
 @django_db_all
 @pytest.mark.parametrize("missing_chunks", (True, False))
 def test_with_attachments(default_project, task_runner, missing_chunks, monkeypatch, django_cache):
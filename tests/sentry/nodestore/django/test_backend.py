@@ -1,4 +1,5 @@
 import pickle
+import zlib
 from datetime import timedelta
 from unittest import mock
 
@@ -56,6 +57,39 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    @region_silo_test(stable=True)
+    def test_set_binary(self):
+        self.ns.binary = True
+        self.ns.set("d2502ebbd7df41ceba8d3275595cac33", {"foo": "bar"})
+        node = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33")
+        assert node.data == ""
+        assert zlib.decompress(node.data_bytes) == b'{"foo":"bar"}'
+
+        self.ns.cache.delete(node.id)
+        assert self.ns.get(node.id) == {"foo": "bar"}
+
+        # switching back overwrites the binary payload
+        self.ns.binary = False
+        self.ns.set(node.id, {"foo": "baz"})
+        node = Node.objects.get(id=node.id)
+        assert node.data == compress(b'{"foo":"baz"}')
+        assert node.data_bytes is None
+
+    @region_silo_test(stable=True)
+    @pytest.mark.parametrize("binary", [False, True])
+    def test_set_multi(self, binary):
+        self.ns.binary = binary
+        self.ns.batch_size = 2
+        Node.objects.create(id="a" * 32, data=compress(b'{"foo": "old"}'))
+
+        items = {"a" * 32: {"foo": "a"}, "b" * 32: {"foo": "b"}, "c" * 32: {"foo": "c"}}
+        self.ns.set_multi(items)
+
+        assert Node.objects.count() == 3
+        for node_id in items:
+            self.ns.cache.delete(node_id)
+        assert self.ns.get_multi(list(items)) == items
+
     @region_silo_test(stable=True)
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
@@ -0,0 +1,61 @@
+import itertools
+
+import pytest
+
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.django.models import Node
+from sentry.testutils.pytest.fixtures import django_db_all
+
+NUM_NODES = 500
+
+PAYLOAD = {
+    "message": "hello world",
+    "tags": [[f"key{i}", f"value{i}"] for i in range(50)],
+    "exception": {"values": [{"stacktrace": {"frames": [{"lineno": i} for i in range(100)]}}]},
+}
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("binary", [False, True], ids=["text", "binary"])
+@pytest.mark.parametrize("bulk", [False, True], ids=["set", "set_multi"])
+def test_benchmark_write(benchmark, binary, bulk):
+    ns = DjangoNodeStorage(binary=binary)
+    counter = itertools.count()
+
+    def setup():
+        batch = next(counter)
+        return ({f"{batch:016x}{i:016x}": PAYLOAD for i in range(NUM_NODES)},), {}
+
+    def write(nodes):
+        if bulk:
+            ns.set_multi(nodes)
+        else:
+            for node_id, data in nodes.items():
+                ns.set(node_id, data)
+
+    benchmark.pedantic(write, setup=setup, rounds=5)
+
+    node = Node.objects.first()
+    benchmark.extra_info["bytes_per_node"] = len(node.data) + len(node.data_bytes or b"")
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("binary", [False, True], ids=["text", "binary"])
+def test_benchmark_read(benchmark, binary):
+    ns = DjangoNodeStorage(binary=binary)
+    nodes = {f"{i:032x}": PAYLOAD for i in range(NUM_NODES)}
+    ns.set_multi(nodes)
+
+    results = benchmark(ns._get_bytes_multi, list(nodes))
+    assert len(results) == NUM_NODES
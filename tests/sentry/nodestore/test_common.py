@@ -3,10 +3,13 @@ Testsuite of backend-independent nodestore tests. Add your backend to the
 `ns` fixture to have it tested.
 """
 from contextlib import nullcontext
+from unittest import mock
 
 import pytest
 
+from sentry.nodestore.base import FRAMED_MAGIC
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.silo import region_silo_test
 from tests.sentry.nodestore.bigtable.test_backend import (
     MockedBigtableNodeStorage,
@@ -50,6 +53,16 @@ def test_set(ns):
     assert ns.get(node_id) == data
 
 
+@region_silo_test(stable=True)
+def test_set_multi(ns):
+    nodes = {"a" * 32: {"foo": "a"}, "b" * 32: {"foo": "b"}}
+    ns.set_subkeys("a" * 32, {None: {"foo": "old"}, "other": {"foo": "old"}})
+
+    ns.set_multi(nodes)
+    assert ns.get_multi(list(nodes)) == nodes
+    assert ns.get("a" * 32, subkey="other") is None
+
+
 @region_silo_test(stable=True)
 def test_delete(ns):
     node_id = "d2502ebbd7df41ceba8d3275595cac33"
@@ -97,3 +110,60 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@region_silo_test(stable=True)
+@override_options({"nodestore.local-cache.max-bytes": 1024 * 1024})
+def test_local_cache(ns):
+    node_id = "d2502ebbd7df41ceba8d3275595cac33"
+    ns.set(node_id, {"foo": "bar"})
+
+    with mock.patch.object(ns, "_get_cache_item", return_value=None):
+        # populated from the backend on first read
+        assert ns.get(node_id) == {"foo": "bar"}
+
+        with mock.patch.object(ns, "_get_bytes", side_effect=AssertionError):
+            result = ns.get(node_id)
+            assert result == {"foo": "bar"}
+            # served as a copy
+            result["foo"] = "baz"
+            assert ns.get(node_id) == {"foo": "bar"}
+            assert ns.get_multi([node_id]) == {node_id: {"foo": "bar"}}
+
+        ns.set(node_id, {"foo": "baz"})
+        assert ns.get(node_id) == {"foo": "baz"}
+
+        ns.delete(node_id)
+        assert not ns.get(node_id)
+
+
+@region_silo_test(stable=True)
+@pytest.mark.parametrize("compress_min_bytes", [0, 1])
+def test_set_subkeys_framed(ns, compress_min_bytes):
+    legacy = {None: {"foo": "a"}, "other": {"foo": "b"}}
+    ns.set_subkeys("node_1", dict(legacy))
+
+    with override_options(
+        {
+            "nodestore.framed-format": True,
+            "nodestore.framed-format.compress-min-bytes": compress_min_bytes,
+        }
+    ):
+        ns.set_subkeys("node_2", {None: {"foo": "c"}, "other": {"foo": "d"}})
+
+    assert ns.get_bytes("node_2").startswith(FRAMED_MAGIC)
+
+    # both formats are readable side by side, regardless of the option
+    for node_id in ("node_1", "node_2"):
+        if ns.cache:
+            ns.cache.delete(node_id)
+
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_2") == {"foo": "c"}
+    assert ns.get("node_2", subkey="other") == {"foo": "d"}
+    assert ns.get("node_2", subkey="missing") is None
+    assert ns.get_multi(["node_1", "node_2"], subkey="other") == {
+        "node_1": {"foo": "b"},
+        "node_2": {"foo": "d"},
+    }
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from sentry.nodestore.localcache import LocalNodeCache
+
+
+def test_get_set():
+    cache = LocalNodeCache(max_bytes=100, ttl=60)
+    assert cache.get("a") is None
+
+    value = {"foo": ["bar"]}
+    cache.set("a", value, 10)
+    value["foo"].append("baz")
+
+    result = cache.get("a")
+    assert result == {"foo": ["bar"]}
+    result["foo"].append("baz")
+    assert cache.get("a") == {"foo": ["bar"]}
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_evicts_by_size():
+    cache = LocalNodeCache(max_bytes=100, ttl=60)
+    cache.set("a", 1, 40)
+    cache.set("b", 2, 40)
+    # touch "a" so "b" becomes the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3, 40)
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.size == 80
+
+    # too large to ever fit
+    cache.set("d", 4, 101)
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+
+@mock.patch("sentry.nodestore.localcache.monotonic")
+def test_ttl(monotonic):
+    monotonic.return_value = 100.0
+    cache = LocalNodeCache(max_bytes=100, ttl=60)
+    cache.set("a", 1, 10)
+
+    monotonic.return_value = 159.0
+    assert cache.get("a") == 1
+
+    monotonic.return_value = 160.0
+    assert cache.get("a") is None
+    assert cache.size == 0
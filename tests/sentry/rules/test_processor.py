@@ -15,9 +15,10 @@ from sentry.models.rule import Rule
 from sentry.models.rulefirehistory import RuleFireHistory
 from sentry.notifications.types import ActionTargetType
 from sentry.rules import init_registry
+from sentry.rules.base import PREDICATE_COST_DATABASE, PREDICATE_COST_MEMORY, PREDICATE_COST_SNUBA
 from sentry.rules.conditions import EventCondition
 from sentry.rules.filters.base import EventFilter
-from sentry.rules.processor import RuleProcessor
+from sentry.rules.processor import PredicateStats, RuleProcessor, get_predicate_cost
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers import install_slack
 from sentry.testutils.helpers.features import with_feature
@@ -373,6 +374,49 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    @patch(
+        "sentry.constants._SENTRY_RULES",
+        [
+            "sentry.mail.actions.NotifyEmailAction",
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+        ],
+    )
+    def test_frequency_conditions_share_queries(self):
+        def frequency_condition(interval):
+            return {
+                "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+                "interval": interval,
+                "value": 10,
+            }
+
+        self.rule.update(
+            data={"conditions": [frequency_condition("1h")], "actions": [EMAIL_ACTION_DATA]}
+        )
+        for interval in ("1h", "1h", "1d"):
+            Rule.objects.create(
+                project=self.group_event.project,
+                data={
+                    "conditions": [frequency_condition(interval)],
+                    "actions": [EMAIL_ACTION_DATA],
+                },
+            )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition.query_hook",
+            return_value=20,
+        ) as query_hook:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+        assert len(results) == 1
+        assert len(results[0][1]) == 4
+        # The three rules on the 1h window share a single query
+        assert query_hook.call_count == 2
+
 
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
@@ -458,6 +502,70 @@ class RuleProcessorTestFilters(TestCase):
             results = list(rp.apply())
             assert len(results) == 0
 
+    @patch(
+        "sentry.constants._SENTRY_RULES",
+        MOCK_SENTRY_RULES_WITH_FILTERS
+        + ("sentry.rules.conditions.event_frequency.EventFrequencyCondition",),
+    )
+    def test_failing_filter_skips_slow_condition(self):
+        Rule.objects.filter(project=self.group_event.project).delete()
+        self.rule = Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [
+                    {"id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition"},
+                    {"id": "tests.sentry.rules.test_processor.MockFilterFalse"},
+                ],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.rules.processor.predicate_stats", PredicateStats()
+        ), patch(
+            "sentry.rules.conditions.event_frequency.BaseEventFrequencyCondition.passes"
+        ) as passes:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+        assert len(results) == 0
+        # The filter already rejects the rule, the frequency condition is never queried
+        assert passes.call_count == 0
+
+    @patch("sentry.constants._SENTRY_RULES", MOCK_SENTRY_RULES_WITH_FILTERS)
+    def test_none_match_stops_at_first_passing_filter(self):
+        Rule.objects.filter(project=self.group_event.project).delete()
+        self.rule = Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [
+                    EVERY_EVENT_COND_DATA,
+                    {"id": "tests.sentry.rules.test_processor.MockFilterTrue"},
+                    {"id": "tests.sentry.rules.test_processor.MockFilterFalse"},
+                ],
+                "filter_match": "none",
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.rules.processor.predicate_stats", PredicateStats()
+        ), patch.object(MockFilterFalse, "passes", return_value=False) as false_passes:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+        assert len(results) == 0
+        # MockFilterTrue already decides the "none" group, MockFilterFalse is skipped
+        assert false_passes.call_count == 0
+
     def test_no_filters(self):
         # setup an alert rule with 1 conditions and no filters that passes
         Rule.objects.filter(project=self.group_event.project).delete()
@@ -771,3 +879,28 @@ class RuleProcessorTestFilters(TestCase):
             safe_execute(callback, self.group_event, futures, _with_transaction=False)
         mock_build.assert_called_once()
         assert "notification_uuid" in mock_build.call_args[1]["embeds"][0].url
+
+
+def test_get_predicate_cost():
+    assert get_predicate_cost(EVERY_EVENT_COND_DATA) == PREDICATE_COST_MEMORY
+    assert (
+        get_predicate_cost({"id": "sentry.rules.filters.latest_release.LatestReleaseFilter"})
+        == PREDICATE_COST_DATABASE
+    )
+    assert (
+        get_predicate_cost(
+            {"id": "sentry.rules.conditions.event_frequency.EventUniqueUserFrequencyCondition"}
+        )
+        == PREDICATE_COST_SNUBA
+    )
+    assert get_predicate_cost({"id": "unregistered"}) == PREDICATE_COST_MEMORY
+
+
+def test_predicate_stats():
+    stats = PredicateStats()
+    for i in range(stats.min_samples - 1):
+        stats.record("a", passed=i % 4 == 0)
+    assert stats.pass_rate("a") == 0.5
+    stats.record("a", passed=False)
+    assert stats.pass_rate("a") == 0.25
+    assert stats.pass_rate("b") == 0.5
@@ -7,6 +7,7 @@ the mock indexer actually behaves the same as the postgres indexer.
 """
 
 from typing import Mapping, Set
+from unittest import mock
 
 import pytest
 
@@ -390,6 +391,49 @@ def test_already_cached_plus_read_results(indexer, indexer_cache, use_case_id) -
         )
 
 
+def test_local_cache_in_front_of_shared_cache(indexer, indexer_cache, use_case_id) -> None:
+    """
+    Test that strings seen once are served from the in-process cache
+    without going back to the shared cache or the db.
+    """
+    with override_options(
+        {
+            "sentry-metrics.indexer.read-new-cache-namespace": False,
+            "sentry-metrics.indexer.write-new-cache-namespace": False,
+            "sentry-metrics.indexer.local-cache.enabled": True,
+        }
+    ):
+        org_id = 9
+        indexer_cache.set_many("br", {f"{use_case_id.value}:{org_id}:beep": 10})
+
+        raw_indexer = indexer
+        indexer = CachingIndexer(indexer_cache, indexer, local_cache_size=10)
+
+        results = indexer.bulk_record({use_case_id: {org_id: {"beep", "boop"}}})
+        boop = raw_indexer.resolve(use_case_id, org_id, "boop")
+        assert results[use_case_id][org_id] == {"beep": 10, "boop": boop}
+
+        # both the shared cache hit and the db write are now held locally
+        indexer_cache.cache.clear()
+        with mock.patch.object(indexer_cache, "get_many") as shared_get_many:
+            results = indexer.bulk_record({use_case_id: {org_id: {"beep", "boop"}}})
+        assert not shared_get_many.called
+        assert results[use_case_id][org_id] == {"beep": 10, "boop": boop}
+
+        fetch_meta = results.get_fetch_metadata()
+        assert_fetch_type_for_tag_string_set(
+            fetch_meta[use_case_id][org_id], FetchType.CACHE_HIT, {"beep", "boop"}
+        )
+
+    with override_options({"sentry-metrics.indexer.local-cache.enabled": False}):
+        # without the local tier, the lookup falls through to the db again
+        results = indexer.bulk_record({use_case_id: {org_id: {"boop"}}})
+        fetch_meta = results.get_fetch_metadata()
+        assert_fetch_type_for_tag_string_set(
+            fetch_meta[use_case_id][org_id], FetchType.DB_READ, {"boop"}
+        )
+
+
 def test_read_when_bulk_record(indexer, use_case_id):
     with override_options(
         {
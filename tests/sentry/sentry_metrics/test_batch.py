@@ -13,7 +13,7 @@ from sentry.sentry_metrics.configuration import (
     GENERIC_METRICS_SCHEMA_VALIDATION_RULES_OPTION_NAME,
     RELEASE_HEALTH_SCHEMA_VALIDATION_RULES_OPTION_NAME,
 )
-from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch
+from sentry.sentry_metrics.consumers.indexer.batch import ColumnarIndexerBatch, IndexerBatch
 from sentry.sentry_metrics.consumers.indexer.common import BrokerMeta
 from sentry.sentry_metrics.consumers.indexer.processing import INGEST_CODEC
 from sentry.sentry_metrics.consumers.indexer.schema_validator import MetricsSchemaValidator
@@ -101,6 +101,11 @@ extracted_string_output = {
 }
 
 
+@pytest.fixture(params=[IndexerBatch, ColumnarIndexerBatch], ids=["rows", "columnar"])
+def batch_cls(request):
+    return request.param
+
+
 def _construct_messages(payloads):
     message_batch = []
     for i, (payload, headers) in enumerate(payloads):
@@ -233,7 +238,7 @@ def _get_string_indexer_log_records(caplog):
         ),
     ],
 )
-def test_extract_strings_with_rollout(should_index_tag_values, expected):
+def test_extract_strings_with_rollout(should_index_tag_values, expected, batch_cls):
     """
     Test that the indexer batch extracts the correct strings from the messages
     based on whether tag values should be indexed or not.
@@ -245,7 +250,7 @@ def test_extract_strings_with_rollout(should_index_tag_values, expected):
             (set_payload, set_headers),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         should_index_tag_values,
         False,
@@ -260,7 +265,7 @@ def test_extract_strings_with_rollout(should_index_tag_values, expected):
 
 
 @pytest.mark.django_db
-def test_extract_strings_with_multiple_use_case_ids():
+def test_extract_strings_with_multiple_use_case_ids(batch_cls):
     """
     Verify that the extract string method can handle payloads that has multiple
     (generic) uses cases
@@ -314,7 +319,7 @@ def test_extract_strings_with_multiple_use_case_ids():
             (set_payload, [("namespace", b"escalating_issues")]),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -352,7 +357,7 @@ def test_extract_strings_with_multiple_use_case_ids():
 
 @pytest.mark.django_db
 @override_options({"sentry-metrics.indexer.disabled-namespaces": ["escalating_issues"]})
-def test_extract_strings_with_single_use_case_ids_blocked():
+def test_extract_strings_with_single_use_case_ids_blocked(batch_cls):
     """
     Verify that the extract string method will work normally when a single use case ID is blocked
     """
@@ -405,7 +410,7 @@ def test_extract_strings_with_single_use_case_ids_blocked():
             (set_payload, [("namespace", b"escalating_issues")]),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -430,7 +435,7 @@ def test_extract_strings_with_single_use_case_ids_blocked():
 
 @pytest.mark.django_db
 @override_options({"sentry-metrics.indexer.disabled-namespaces": ["spans", "escalating_issues"]})
-def test_extract_strings_with_multiple_use_case_ids_blocked():
+def test_extract_strings_with_multiple_use_case_ids_blocked(batch_cls):
     """
     Verify that the extract string method will work normally when multiple use case IDs are blocked
     """
@@ -481,7 +486,7 @@ def test_extract_strings_with_multiple_use_case_ids_blocked():
             (custom_uc_set_payload, [("namespace", b"escalating_issues")]),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -505,7 +510,7 @@ def test_extract_strings_with_multiple_use_case_ids_blocked():
 
 
 @pytest.mark.django_db
-def test_extract_strings_with_invalid_mri():
+def test_extract_strings_with_invalid_mri(batch_cls):
     """
     Verify that extract strings will drop payload that has invalid MRI in name field but continue processing the rest
     """
@@ -572,7 +577,7 @@ def test_extract_strings_with_invalid_mri():
             (set_payload, [("namespace", b"escalating_issues")]),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -610,7 +615,7 @@ def test_extract_strings_with_invalid_mri():
 
 
 @pytest.mark.django_db
-def test_extract_strings_with_multiple_use_case_ids_and_org_ids():
+def test_extract_strings_with_multiple_use_case_ids_and_org_ids(batch_cls):
     """
     Verify that the extract string method can handle payloads that has multiple
     (generic) uses cases and from different orgs
@@ -663,7 +668,7 @@ def test_extract_strings_with_multiple_use_case_ids_and_org_ids():
             (custom_uc_set_payload, [("namespace", b"spans")]),
         ]
     )
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -712,7 +717,7 @@ def test_extract_strings_with_multiple_use_case_ids_and_org_ids():
     MOCK_USE_CASE_AGG_OPTION,
 )
 @override_options({"sentry-metrics.10s-granularity": True})
-def test_resolved_with_aggregation_options(caplog, settings):
+def test_resolved_with_aggregation_options(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     counter_metric_id = "c:transactions/alert@none"
     dist_metric_id = "d:transactions/measurements.fcp@millisecond"
@@ -732,7 +737,7 @@ def test_resolved_with_aggregation_options(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         False,
         False,
@@ -861,7 +866,7 @@ def test_resolved_with_aggregation_options(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_all_resolved(caplog, settings):
+def test_all_resolved(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -871,7 +876,7 @@ def test_all_resolved(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1012,7 +1017,7 @@ def test_all_resolved(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_all_resolved_with_routing_information(caplog, settings):
+def test_all_resolved_with_routing_information(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -1022,7 +1027,7 @@ def test_all_resolved_with_routing_information(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         True,
@@ -1168,7 +1173,7 @@ def test_all_resolved_with_routing_information(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_all_resolved_retention_days_honored(caplog, settings):
+def test_all_resolved_retention_days_honored(caplog, settings, batch_cls):
     """
     Tests that the indexer batch honors the incoming retention_days values
     from Relay or falls back to 90.
@@ -1186,7 +1191,7 @@ def test_all_resolved_retention_days_honored(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1326,7 +1331,7 @@ def test_all_resolved_retention_days_honored(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_batch_resolve_with_values_not_indexed(caplog, settings):
+def test_batch_resolve_with_values_not_indexed(caplog, settings, batch_cls):
     """
     Tests that the indexer batch skips resolving tag values for indexing and
     sends the raw tag value to Snuba.
@@ -1345,7 +1350,7 @@ def test_batch_resolve_with_values_not_indexed(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         False,
         False,
@@ -1478,7 +1483,7 @@ def test_batch_resolve_with_values_not_indexed(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_metric_id_rate_limited(caplog, settings):
+def test_metric_id_rate_limited(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -1488,7 +1493,7 @@ def test_metric_id_rate_limited(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1595,7 +1600,7 @@ def test_metric_id_rate_limited(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_tag_key_rate_limited(caplog, settings):
+def test_tag_key_rate_limited(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -1605,7 +1610,7 @@ def test_tag_key_rate_limited(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1689,7 +1694,7 @@ def test_tag_key_rate_limited(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_tag_value_rate_limited(caplog, settings):
+def test_tag_value_rate_limited(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -1699,7 +1704,7 @@ def test_tag_value_rate_limited(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1832,7 +1837,7 @@ def test_tag_value_rate_limited(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_one_org_limited(caplog, settings):
+def test_one_org_limited(caplog, settings, batch_cls):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
         [
@@ -1841,7 +1846,7 @@ def test_one_org_limited(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
@@ -1956,7 +1961,7 @@ def test_one_org_limited(caplog, settings):
 
 
 @pytest.mark.django_db
-def test_cardinality_limiter(caplog, settings):
+def test_cardinality_limiter(caplog, settings, batch_cls):
     """
     Test functionality of the indexer batch related to cardinality-limiting. More concretely, assert that `IndexerBatch.filter_messages`:
 
@@ -1975,7 +1980,7 @@ def test_cardinality_limiter(caplog, settings):
         ]
     )
 
-    batch = IndexerBatch(
+    batch = batch_cls(
         outer_message,
         True,
         False,
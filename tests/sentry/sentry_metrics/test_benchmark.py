@@ -0,0 +1,184 @@
+from datetime import datetime, timezone
+
+import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.backends.local.backend import LocalBroker, LocalProducer
+from arroyo.backends.local.storages.memory import MemoryMessageStorage
+from arroyo.processing.strategies import CommitOffsets
+from arroyo.types import BrokerValue, Message, Partition, Topic, Value
+from arroyo.utils.clock import TestingClock as Clock
+
+from sentry.metrics.middleware import global_tags
+from sentry.sentry_metrics.configuration import RELEASE_HEALTH_SCHEMA_VALIDATION_RULES_OPTION_NAME
+from sentry.sentry_metrics.consumers.indexer.batch import ColumnarIndexerBatch, IndexerBatch
+from sentry.sentry_metrics.consumers.indexer.parallel import MetricsConsumerStrategyFactory
+from sentry.sentry_metrics.consumers.indexer.processing import INGEST_CODEC
+from sentry.sentry_metrics.consumers.indexer.schema_validator import MetricsSchemaValidator
+from sentry.sentry_metrics.consumers.indexer.tags_validator import ReleaseHealthTagsValidator
+from sentry.sentry_metrics.indexer.base import FetchType, Metadata
+from sentry.snuba.metrics.naming_layer.mri import SessionMRI
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.utils import json
+
+NUM_MESSAGES = 10000
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.fixture(autouse=True)
+def reset_global_metrics_state():
+    # running a MetricsConsumerStrategyFactory has a side-effect of mutating
+    # global metrics tags
+    with global_tags(_all_threads=True):
+        yield
+
+
+@pytest.fixture
+def ingest_metrics_topic():
+    """
+    A local broker standing in for Kafka, holding a topic of metric messages.
+    """
+    topic = Topic("ingest-metrics")
+    storage: MemoryMessageStorage[KafkaPayload] = MemoryMessageStorage()
+    broker: LocalBroker[KafkaPayload] = LocalBroker(storage, Clock())
+    broker.create_topic(topic, partitions=1)
+    producer = LocalProducer(broker)
+
+    ts = int(datetime.now(tz=timezone.utc).timestamp())
+    for i in range(NUM_MESSAGES):
+        payload = _metric_payload(i, ts)
+        producer.produce(
+            topic,
+            KafkaPayload(
+                None, json.dumps(payload).encode("utf-8"), [("namespace", b"release-health")]
+            ),
+        ).result()
+
+    return storage, topic
+
+
+def _metric_payload(i, ts):
+    return {
+        "name": SessionMRI.RAW_SESSION.value,
+        "tags": {
+            "environment": "production",
+            "release": f"1.0.{i % 100}",
+            "session.status": "init",
+        },
+        "timestamp": ts,
+        "type": "c",
+        "value": 1.0,
+        "org_id": i % 10,
+        "project_id": 3,
+    }
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("shared_memory_transport", [False, True], ids=["pickled", "shared_memory"])
+def test_benchmark_parallel_indexer(
+    ingest_metrics_topic, shared_memory_transport, settings, monkeypatch, benchmark
+):
+    storage, topic = ingest_metrics_topic
+    partition = Partition(topic, 0)
+    settings.KAFKA_CONSUMER_FORCE_DISABLE_MULTIPROCESSING = False
+    # Measure throughput up to the point where offsets get committed, rather
+    # than producing to a real broker
+    monkeypatch.setattr(
+        "sentry.sentry_metrics.consumers.indexer.parallel.get_metrics_producer_strategy",
+        lambda config, commit, slicing_router: CommitOffsets(commit),
+    )
+
+    factory = MetricsConsumerStrategyFactory(
+        max_msg_batch_size=500,
+        max_msg_batch_time=1000,
+        max_parallel_batch_size=5,
+        max_parallel_batch_time=1000,
+        processes=2,
+        input_block_size=16 * 1024 * 1024,
+        output_block_size=16 * 1024 * 1024,
+        ingest_profile="release-health",
+        indexer_db="mock",
+        shared_memory_transport=shared_memory_transport,
+    )
+
+    def consume_topic():
+        committed = {}
+
+        def commit(offsets, force=False):
+            committed.update(offsets)
+
+        strategy = factory.create_with_partitions(commit, {partition: 0})
+        for offset in range(NUM_MESSAGES):
+            strategy.submit(Message(storage.consume(partition, offset)))
+            strategy.poll()
+        strategy.close()
+        strategy.join()
+        return committed
+
+    assert benchmark.pedantic(consume_topic, rounds=3) == {partition: NUM_MESSAGES}
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize(
+    "batch_cls", [IndexerBatch, ColumnarIndexerBatch], ids=["rows", "columnar"]
+)
+def test_benchmark_indexer_batch(batch_cls, benchmark):
+    ts = int(datetime.now(tz=timezone.utc).timestamp())
+    messages = [
+        Message(
+            BrokerValue(
+                KafkaPayload(
+                    None,
+                    json.dumps(_metric_payload(i, ts)).encode("utf-8"),
+                    [("namespace", b"sessions")],
+                ),
+                Partition(Topic("ingest-metrics"), 0),
+                i,
+                datetime.now(tz=timezone.utc),
+            )
+        )
+        for i in range(NUM_MESSAGES)
+    ]
+    outer_message = Message(Value(messages, messages[-1].committable))
+    schema_validator = MetricsSchemaValidator(
+        INGEST_CODEC, RELEASE_HEALTH_SCHEMA_VALIDATION_RULES_OPTION_NAME
+    ).validate
+
+    def process_batch():
+        batch = batch_cls(
+            outer_message,
+            True,
+            False,
+            tags_validator=ReleaseHealthTagsValidator().is_allowed,
+            schema_validator=schema_validator,
+        )
+        strings = batch.extract_strings()
+        mapping = {
+            use_case_id: {
+                org_id: {string: i for i, string in enumerate(org_strings, 1)}
+                for org_id, org_strings in org_mapping.items()
+            }
+            for use_case_id, org_mapping in strings.items()
+        }
+        meta = {
+            use_case_id: {
+                org_id: {
+                    string: Metadata(id=id, fetch_type=FetchType.CACHE_HIT)
+                    for string, id in org_mapping.items()
+                }
+                for org_id, org_mapping in org_mappings.items()
+            }
+            for use_case_id, org_mappings in mapping.items()
+        }
+        return batch.reconstruct_messages(mapping, meta)
+
+    assert len(benchmark(process_batch).data) == NUM_MESSAGES
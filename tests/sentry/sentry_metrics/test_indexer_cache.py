@@ -1,7 +1,9 @@
+from unittest import mock
+
 import pytest
 from django.conf import settings
 
-from sentry.sentry_metrics.indexer.cache import StringIndexerCache
+from sentry.sentry_metrics.indexer.cache import LocalStringIndexerCache, StringIndexerCache
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.testutils.helpers.options import override_options
 from sentry.utils.cache import cache
@@ -209,3 +211,29 @@ def test_separate_namespacing() -> None:
         indexer_cache.set(namespace, "transactions:3:what", 2)
         assert indexer_cache.get(namespace, "sessions:3:what") == 1
         assert indexer_cache.get(namespace, "transactions:3:what") == 2
+
+
+def test_local_cache_lru() -> None:
+    local_cache = LocalStringIndexerCache(2, indexer_cache)
+    local_cache.set_many({"sessions:1:a": 1, "sessions:1:b": 2})
+    assert local_cache.get_many(["sessions:1:a"]) == {"sessions:1:a": 1}
+
+    # "b" is now the least recently used key and gets evicted
+    local_cache.set_many({"sessions:1:c": 3})
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:b", "sessions:1:c"]) == {
+        "sessions:1:a": 1,
+        "sessions:1:c": 3,
+    }
+
+
+def test_local_cache_ttl() -> None:
+    timer = mock.Mock(return_value=0.0)
+    local_cache = LocalStringIndexerCache(10, indexer_cache, timer=timer)
+    local_cache.set_many({"sessions:1:a": 1, "sessions:1:b": 2})
+
+    # entries expire somewhere between the base ttl and the ttl plus jitter
+    base_ttl = settings.SENTRY_METRICS_INDEXER_CACHE_TTL
+    timer.return_value = base_ttl - 1
+    assert len(local_cache.get_many(["sessions:1:a", "sessions:1:b"])) == 2
+    timer.return_value = base_ttl * 1.25 + 1
+    assert local_cache.get_many(["sessions:1:a", "sessions:1:b"]) == {}
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 from arroyo.backends.kafka import KafkaPayload
@@ -8,8 +8,10 @@ from django.utils import timezone
 
 from sentry.metrics.dummy import DummyMetricsBackend
 from sentry.sentry_metrics.consumers.last_seen_updater import (
+    LastSeenAccumulator,
     LastSeenUpdaterMessageFilter,
     LastSeenUpdaterStrategyFactory,
+    LastSeenUpdateStep,
     _update_stale_last_seen,
     retrieve_db_read_keys,
 )
@@ -243,3 +245,110 @@ class TestCollectMethod(TestCase):
         assert reloaded_fresh_item.last_seen == last_seen_original
         reloaded_stale_item = self.table.objects.get(id=stale_item.id)
         assert reloaded_stale_item.last_seen == update_time
+
+
+class TestLastSeenAccumulator:
+    def test_unknown_ids_are_stale(self):
+        accumulator = LastSeenAccumulator(stale_after=timedelta(hours=12))
+        assert accumulator.stale({1, 2, 3}, now=1000.0) == {1, 2, 3}
+
+    def test_recorded_ids_are_fresh_until_threshold(self):
+        accumulator = LastSeenAccumulator(stale_after=timedelta(seconds=100))
+        accumulator.record({1, 2}, now=1000.0)
+
+        assert accumulator.stale({1, 2, 3}, now=1050.0) == {3}
+        assert accumulator.stale({1, 2, 3}, now=1101.0) == {1, 2, 3}
+
+    def test_prune_drops_stale_entries(self):
+        accumulator = LastSeenAccumulator(stale_after=timedelta(seconds=100))
+        accumulator.record({1}, now=1000.0)
+        accumulator.record({2}, now=1080.0)
+
+        accumulator.prune(now=1150.0)
+        assert len(accumulator) == 1
+        assert accumulator.stale({1, 2}, now=1150.0) == {1}
+
+
+class TestLastSeenUpdateStep:
+    def message(self, ids, offset, partition=0):
+        return Message(
+            BrokerValue(
+                payload=ids,
+                partition=Partition(Topic("fake-topic"), partition),
+                offset=offset,
+                timestamp=datetime.now(),
+            )
+        )
+
+    @patch("sentry.sentry_metrics.consumers.last_seen_updater._update_stale_last_seen")
+    def test_updates_each_id_once_per_threshold(self, update):
+        update.return_value = 0
+        accumulator = LastSeenAccumulator()
+        next_step = Mock()
+
+        for offset in range(2):
+            step = LastSeenUpdateStep(
+                table=StringIndexer,
+                accumulator=accumulator,
+                flush_interval=10.0,
+                metrics=DummyMetricsBackend(),
+                next_step=next_step,
+            )
+            step.submit(self.message({1, 2}, offset))
+            step.submit(self.message({2, 3}, offset + 1))
+            step.close()
+            step.join()
+
+        update.assert_called_once_with(StringIndexer, {1, 2, 3})
+        # Offsets are committed even when there was nothing to update
+        assert next_step.submit.call_count == 2
+        assert next_step.submit.call_args[0][0].committable == {
+            Partition(Topic("fake-topic"), 0): 3
+        }
+
+    @patch("sentry.sentry_metrics.consumers.last_seen_updater._update_stale_last_seen")
+    def test_commits_every_buffered_partition(self, update):
+        update.return_value = 0
+        next_step = Mock()
+        step = LastSeenUpdateStep(
+            table=StringIndexer,
+            accumulator=LastSeenAccumulator(),
+            flush_interval=10.0,
+            metrics=DummyMetricsBackend(),
+            next_step=next_step,
+        )
+
+        step.submit(self.message({1}, 5, partition=1))
+        step.submit(self.message({2}, 3, partition=0))
+        step.submit(self.message({3}, 2, partition=1))
+        step.close()
+        step.join()
+
+        next_step.submit.assert_called_once()
+        assert next_step.submit.call_args[0][0].committable == {
+            Partition(Topic("fake-topic"), 0): 4,
+            Partition(Topic("fake-topic"), 1): 6,
+        }
+
+    @patch("sentry.sentry_metrics.consumers.last_seen_updater._update_stale_last_seen")
+    def test_flushes_after_interval(self, update):
+        update.return_value = 1
+        next_step = Mock()
+        step = LastSeenUpdateStep(
+            table=StringIndexer,
+            accumulator=LastSeenAccumulator(),
+            flush_interval=10.0,
+            metrics=DummyMetricsBackend(),
+            next_step=next_step,
+        )
+
+        with patch("time.time", return_value=1000.0):
+            step.submit(self.message({1}, 0))
+            step.poll()
+        assert not update.called
+        assert not next_step.submit.called
+
+        with patch("time.time", return_value=1010.0):
+            step.poll()
+        update.assert_called_once_with(StringIndexer, {1})
+        assert next_step.submit.call_count == 1
@@ -0,0 +1,82 @@
+import pickle
+from collections import deque
+from datetime import datetime, timezone
+
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition, Topic
+
+from sentry.sentry_metrics.consumers.indexer.common import BrokerMeta, IndexerOutputMessageBatch
+from sentry.sentry_metrics.consumers.indexer.packed import (
+    PackedIndexerOutputMessageBatch,
+    PackedMessages,
+)
+from sentry.sentry_metrics.consumers.indexer.routing_producer import RoutingPayload
+from sentry.sentry_metrics.use_case_id_registry import UseCaseID
+
+partition_0 = Partition(Topic("ingest-metrics"), 0)
+partition_1 = Partition(Topic("ingest-metrics"), 1)
+
+
+def _message(partition, offset, payload, timestamp=datetime(2023, 5, 1, 12, 30, 15, 123456)):
+    return Message(BrokerValue(payload, partition, offset, timestamp))
+
+
+def _roundtrip(value):
+    buffers = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    # arroyo reads every out-of-band buffer back from shared memory as bytes
+    return data, pickle.loads(data, buffers=[buffer.raw().tobytes() for buffer in buffers])
+
+
+def test_pack_and_unpack_messages() -> None:
+    messages = [
+        _message(partition_0, 10, KafkaPayload(None, b'{"name": "a"}', [("namespace", b"a")])),
+        _message(partition_0, 11, KafkaPayload(b"key", b"", [("namespace", b"b")])),
+        _message(
+            partition_1,
+            5,
+            KafkaPayload(None, b'{"name": "c"}', [("namespace", b"a")]),
+            timestamp=datetime(2023, 5, 1, 12, 30, tzinfo=timezone.utc),
+        ),
+    ]
+
+    packed = PackedMessages.pack(messages)
+    assert len(packed) == 3
+    assert list(packed) == messages
+
+    _, unpickled = _roundtrip(packed)
+    assert list(unpickled) == messages
+
+    # plain pickling without out-of-band buffers still works
+    assert list(pickle.loads(pickle.dumps(packed, protocol=4))) == messages
+
+
+def test_payload_values_are_out_of_band() -> None:
+    value = b"x" * 10_000
+    messages = [
+        _message(partition_0, offset, KafkaPayload(None, value, [("namespace", b"a")]))
+        for offset in range(100)
+    ]
+
+    data, unpickled = _roundtrip(PackedMessages.pack(messages))
+    assert len(data) < len(value)
+    assert list(unpickled) == messages
+
+
+def test_pack_and_unpack_output_batch() -> None:
+    payload = KafkaPayload(None, b'{"metric_id": 1}', [("metric_type", "c")])
+    batch = IndexerOutputMessageBatch(
+        data=[
+            _message(partition_0, 1, payload),
+            _message(
+                partition_0,
+                2,
+                RoutingPayload(routing_header={"org_id": 1}, routing_message=payload),
+            ),
+        ],
+        invalid_msg_meta=deque([BrokerMeta(partition_0, 3)]),
+        cogs_data={UseCaseID.TRANSACTIONS: 2},
+    )
+
+    _, unpickled = _roundtrip(PackedIndexerOutputMessageBatch.pack(batch))
+    assert unpickled.unpack() == batch
@@ -34,7 +34,8 @@ def reset_global_metrics_state():
 
 @pytest.mark.django_db
 @pytest.mark.parametrize("force_disable_multiprocessing", [True, False])
-def test_basic(request, settings, force_disable_multiprocessing):
+@pytest.mark.parametrize("shared_memory_transport", [False, True])
+def test_basic(request, settings, force_disable_multiprocessing, shared_memory_transport):
     """
     Integration test to verify that the parallel indexer can spawn subprocesses
     properly. The main purpose is to verify that there are no
@@ -56,6 +57,7 @@ def test_basic(request, settings, force_disable_multiprocessing):
         output_block_size=1024,
         ingest_profile="release-health",
         indexer_db="postgres",
+        shared_memory_transport=shared_memory_transport,
     )
 
     strategy = processing_factory.create_with_partitions(
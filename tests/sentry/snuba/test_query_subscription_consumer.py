@@ -17,6 +17,7 @@ from sentry.snuba.models import SnubaQuery
 from sentry.snuba.query_subscriptions.consumer import (
     InvalidSchemaError,
     parse_message_value,
+    register_batch_subscriber,
     register_subscriber,
     subscriber_registry,
 )
@@ -129,6 +130,75 @@ class HandleMessageTest(BaseQuerySubscriptionTest, TestCase):
         )
         mock_callback.assert_called_once_with(data["payload"], sub)
 
+    def test_arroyo_consumer_batched(self):
+        registration_key = "registered_test_batched"
+        batch_registration_key = "registered_test_batched_with_batch_handler"
+        mock_callback = mock.Mock()
+        mock_batch_callback = mock.Mock()
+        register_subscriber(registration_key)(mock_callback)
+        register_subscriber(batch_registration_key)(mock.Mock())
+        register_batch_subscriber(batch_registration_key)(mock_batch_callback)
+        with self.tasks():
+            snuba_query = create_snuba_query(
+                SnubaQuery.Type.ERROR,
+                Dataset.Events,
+                "hello",
+                "count()",
+                timedelta(minutes=10),
+                timedelta(minutes=1),
+                None,
+            )
+            sub = create_snuba_subscription(self.project, registration_key, snuba_query)
+            batch_sub = create_snuba_subscription(self.project, batch_registration_key, snuba_query)
+        sub.refresh_from_db()
+        batch_sub.refresh_from_db()
+
+        commit = mock.Mock()
+        partition = Partition(Topic("test"), 0)
+        strategy = QuerySubscriptionStrategyFactory(
+            self.topic,
+            10,
+            1,
+            1,
+            DEFAULT_BLOCK_SIZE,
+            DEFAULT_BLOCK_SIZE,
+            multi_proc=False,
+            batched=True,
+        ).create_with_partitions(commit, {partition: 0})
+
+        payloads = []
+        for offset, subscription in enumerate([sub, batch_sub, batch_sub, sub]):
+            data = deepcopy(self.valid_wrapper)
+            data["payload"]["subscription_id"] = subscription.subscription_id
+            data["payload"]["timestamp"] = f"2020-01-01T01:23:{offset:02}.1234"
+            strategy.submit(
+                Message(
+                    BrokerValue(
+                        KafkaPayload(b"key", json.dumps(data).encode("utf-8"), []),
+                        partition,
+                        offset,
+                        datetime.now(),
+                    )
+                )
+            )
+
+            payload = data["payload"]
+            payload["values"] = payload.pop("result")
+            payload.pop("request")
+            payload["timestamp"] = parse_date(payload["timestamp"]).replace(tzinfo=timezone.utc)
+            payloads.append(payload)
+
+        strategy.join()
+
+        assert mock_callback.call_args_list == [
+            mock.call(payloads[0], sub),
+            mock.call(payloads[3], sub),
+        ]
+        mock_batch_callback.assert_called_once_with(
+            [(payloads[1], batch_sub), (payloads[2], batch_sub)]
+        )
+        commit.assert_any_call({partition: 4})
+
 
 class ParseMessageValueTest(BaseQuerySubscriptionTest, unittest.TestCase):
     def run_test(self, message):
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, BaseTSDB, TSDBModel
+from sentry.tsdb.redis import COUNTER_STORAGE_HASH, COUNTER_STORAGE_PACKED, RedisTSDB
+
+NUM_KEYS = 100
+NUM_DAYS = 90
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def used_memory(db):
+    with db.cluster.all() as client:
+        results = client.info("memory")
+    return sum(info["used_memory"] for info in results.value.values())
+
+
+@pytest.fixture(params=[COUNTER_STORAGE_HASH, COUNTER_STORAGE_PACKED])
+def tsdb(request):
+    db = RedisTSDB(
+        rollups=((ONE_HOUR, 24), (ONE_DAY, NUM_DAYS)),
+        vnodes=64,
+        counter_storage=request.param,
+    )
+    with db.cluster.all() as client:
+        client.flushdb()
+    yield db
+    with db.cluster.all() as client:
+        client.flushdb()
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_get_range(tsdb, benchmark):
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=NUM_DAYS - 1)
+    keys = list(range(NUM_KEYS))
+
+    baseline = used_memory(tsdb)
+    for day in range(NUM_DAYS):
+        tsdb.incr_multi(
+            [(TSDBModel.group, key) for key in keys], timestamp=start + timedelta(days=day)
+        )
+    benchmark.extra_info["memory_per_series"] = (used_memory(tsdb) - baseline) / NUM_KEYS
+
+    results = benchmark(tsdb.get_range, TSDBModel.group, keys, start, end, rollup=ONE_DAY)
+    assert sum(count for _, count in results[0]) == NUM_DAYS
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_rollup(benchmark):
+    # 1,000 keys of 90 days of hourly buckets, rolled up to days
+    tsdb = BaseTSDB(rollups=((ONE_HOUR, 24 * NUM_DAYS), (ONE_DAY, NUM_DAYS)))
+    end = datetime.now(timezone.utc)
+    _, series = tsdb.get_optimal_rollup_series(end - timedelta(hours=2159), end, ONE_HOUR)
+    values = {key: [(ts, 1) for ts in series] for key in range(1000)}
+
+    results = benchmark(tsdb.rollup, values, ONE_DAY)
+    assert sum(count for _, count in results[0]) == len(series) == 2160
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_make_series(benchmark):
+    tsdb = BaseTSDB(rollups=((ONE_HOUR, 24 * NUM_DAYS), (ONE_DAY, NUM_DAYS)))
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(hours=2159)
+
+    def make_series():
+        return {key: tsdb.make_series(0, start, end, ONE_HOUR) for key in range(1000)}
+
+    results = benchmark(make_series)
+    assert len(results[0]) == 2160
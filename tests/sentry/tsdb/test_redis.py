@@ -6,7 +6,15 @@ from django.test import override_settings
 
 from sentry.testutils.cases import TestCase
 from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, TSDBModel
-from sentry.tsdb.redis import CountMinScript, RedisTSDB, SuppressionWrapper
+from sentry.tsdb.redis import (
+    COUNTER_STORAGE_DUAL,
+    COUNTER_STORAGE_PACKED,
+    PACKED_SLOT,
+    CountMinScript,
+    RedisTSDB,
+    SuppressionWrapper,
+    unpack_counter_slots,
+)
 from sentry.utils.dates import to_datetime, to_timestamp
 
 
@@ -187,6 +195,65 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_simple_packed(self):
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        self.test_simple()
+
+    def test_packed_migration(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        self.db.incr(TSDBModel.project, 1, dts[0], count=2)
+
+        self.db.counter_storage = COUNTER_STORAGE_DUAL
+        self.db.incr(TSDBModel.project, 1, dts[1], count=3)
+        assert self.db.get_sums(TSDBModel.project, [1], dts[0], dts[-1]) == {1: 5}
+
+        # only what has been written since the dual write started is packed
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        assert self.db.get_sums(TSDBModel.project, [1], dts[0], dts[-1]) == {1: 3}
+
+    def test_packed_wraps_around(self):
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+
+        # 30 samples of the 10 second rollup, so both land in the same slot
+        self.db.incr(TSDBModel.project, 1, now - timedelta(seconds=300), count=5)
+        self.db.incr(TSDBModel.project, 1, now, count=1)
+
+        results = self.db.get_range(
+            TSDBModel.project, [1], now - timedelta(seconds=300), now, rollup=10
+        )
+        assert [count for _, count in results[1]] == [0] * 30 + [1]
+
+    def test_delete_packed_does_not_create_keys(self):
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+        self.db.incr(TSDBModel.project, 1, now, count=2)
+
+        self.db.delete([TSDBModel.project], [1, 2], now - timedelta(minutes=1), now)
+
+        assert self.db.get_sums(TSDBModel.project, [1], now - timedelta(minutes=1), now) == {1: 0}
+        for rollup in self.db.rollups:
+            key = self.db.make_packed_counter_key(TSDBModel.project, rollup, 2, None)
+            with self.db.cluster.map() as client:
+                exists = client.exists(key)
+            assert not exists.value
+
+    def test_count_distinct_packed(self):
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        self.test_count_distinct()
+
+    def test_frequency_tables_packed(self):
+        self.db.counter_storage = COUNTER_STORAGE_PACKED
+        self.test_frequency_tables()
+
+    def test_unpack_counter_slots(self):
+        data = PACKED_SLOT.pack(100, 3) + PACKED_SLOT.pack(0, 0) + PACKED_SLOT.pack(102, 7)
+        assert unpack_counter_slots(data) == {100: 3, 102: 7}
+        assert unpack_counter_slots(data[:-1]) == {100: 3}
+        assert unpack_counter_slots(b"") == {}
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
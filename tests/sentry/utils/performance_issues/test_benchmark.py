@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from sentry.testutils.performance_issues.event_generators import create_event
+from sentry.testutils.pytest.fixtures import django_db_all
+from sentry.utils.performance_issues.performance_detection import (
+    DETECTOR_CLASSES,
+    get_detection_settings,
+    run_detectors_on_data,
+)
+
+NUM_SPANS = 5000
+
+SPAN_TEMPLATES = [
+    ("db", "SELECT * FROM books WHERE id = %s"),
+    ("db.sql.query", "SELECT * FROM authors"),
+    ("http.client", "GET /api/books/1"),
+    ("resource.script", "https://example.com/static/main.js"),
+    ("file.read", "config.json"),
+    ("ui.render", "BookList"),
+]
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+def make_transaction(num_spans):
+    rng = random.Random(42)
+    spans = []
+    start = 0.0
+    for i in range(num_spans):
+        template = rng.randrange(len(SPAN_TEMPLATES))
+        op, description = SPAN_TEMPLATES[template]
+        duration = rng.uniform(0.001, 0.2)
+        spans.append(
+            {
+                "span_id": "%016x" % (i + 1),
+                "parent_span_id": "%016x" % (i // 10 + 1) if i else None,
+                "op": op,
+                "description": description,
+                "hash": "%016x" % template,
+                "start_timestamp": start,
+                "timestamp": start + duration,
+                "data": {"http.response_content_length": rng.randint(0, 2_000_000)},
+            }
+        )
+        start += rng.uniform(0, duration)
+    event = create_event(spans)
+    event["start_timestamp"] = 0.0
+    event["timestamp"] = start
+    return event
+
+
+@django_db_all
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("single_pass", [False, True], ids=["per_detector", "single_pass"])
+def test_benchmark_detectors(single_pass, benchmark):
+    settings = get_detection_settings()
+    event = make_transaction(NUM_SPANS)
+
+    def run():
+        detectors = [detector_class(settings, event) for detector_class in DETECTOR_CLASSES]
+        if single_pass:
+            run_detectors_on_data(detectors, event)
+        else:
+            # How detectors were run before, walking the spans once per detector
+            for detector in detectors:
+                if detector.is_event_eligible(event):
+                    for span in event["spans"]:
+                        detector.visit_span(span)
+                    detector.on_complete()
+
+    benchmark.extra_info["spans"] = NUM_SPANS
+    benchmark(run)
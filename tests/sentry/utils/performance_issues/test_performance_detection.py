@@ -14,7 +14,8 @@ from sentry.issues.grouptype import (
 )
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers import override_options
-from sentry.testutils.performance_issues.event_generators import get_event
+from sentry.testutils.performance_issues.event_generators import EVENTS, get_event
+from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.testutils.silo import no_silo_test, region_silo_test
 from sentry.utils.performance_issues.base import (
     DETECTOR_TYPE_TO_GROUP_TYPE,
@@ -25,10 +26,13 @@ from sentry.utils.performance_issues.detectors.n_plus_one_db_span_detector impor
     NPlusOneDBSpanDetector,
 )
 from sentry.utils.performance_issues.performance_detection import (
+    DETECTOR_CLASSES,
     EventPerformanceProblem,
     _detect_performance_problems,
     detect_performance_problems,
     get_detection_settings,
+    run_detector_on_data,
+    run_detectors_on_data,
 )
 from sentry.utils.performance_issues.performance_problem import PerformanceProblem
 
@@ -719,3 +723,21 @@ class EventPerformanceProblemTest(TestCase):
 )
 def test_total_span_time(spans, duration):
     assert total_span_time(spans) == pytest.approx(duration, 0.01)
+
+
+@django_db_all
+@pytest.mark.parametrize("event_name", sorted(EVENTS))
+def test_run_detectors_on_data_matches_separate_runs(event_name):
+    settings = get_detection_settings()
+    event = get_event(event_name)
+
+    expected = []
+    for detector_class in DETECTOR_CLASSES:
+        detector = detector_class(settings, event)
+        run_detector_on_data(detector, event)
+        expected.append(detector.stored_problems)
+
+    detectors = [detector_class(settings, event) for detector_class in DETECTOR_CLASSES]
+    run_detectors_on_data(detectors, event)
+    assert [detector.stored_problems for detector in detectors] == expected
+    assert all(detector.span_index is None for detector in detectors)
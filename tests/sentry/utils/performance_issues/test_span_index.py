@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from sentry.utils.performance_issues.base import get_span_duration
+from sentry.utils.performance_issues.span_index import SpanIndex
+
+
+def make_spans():
+    return [
+        {
+            "span_id": "a",
+            "op": "http.server",
+            "description": " GET /books ",
+            "start_timestamp": 1.0,
+            "timestamp": 3.5,
+        },
+        {
+            "span_id": "b",
+            "parent_span_id": "a",
+            "op": "db.sql.query",
+            "description": "SELECT 1",
+            "start_timestamp": 2.0,
+            "timestamp": 2.25,
+        },
+        {
+            "span_id": "c",
+            "parent_span_id": "a",
+            "op": None,
+            "start_timestamp": 1.5,
+            "timestamp": 1.75,
+        },
+        {"span_id": "d", "parent_span_id": "missing"},
+    ]
+
+
+def test_derived_data():
+    spans = make_spans()
+    index = SpanIndex(spans)
+
+    assert len(index) == 4
+    assert index.ops == ["http.server", "db.sql.query", "", ""]
+    assert index.durations == [get_span_duration(span) for span in spans]
+    assert index.duration(spans[0]) == timedelta(seconds=2.5)
+    # Spans from outside the index are computed on the fly
+    assert index.duration({"start_timestamp": 1, "timestamp": 2}) == timedelta(seconds=1)
+
+
+def test_position():
+    spans = make_spans()
+    index = SpanIndex(spans)
+
+    assert index.position(spans[2]) == 2
+    # Positions are looked up by identity, equal copies are not in the index
+    assert index.position(dict(spans[2])) is None
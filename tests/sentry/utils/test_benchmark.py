@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from unittest import mock
+
+import pytest
+
+from sentry.net.http import connection_from_url
+from sentry.utils import json
+from sentry.utils.snuba import (
+    RESULT_FORMAT_COLUMNAR,
+    RESULT_FORMAT_LAZY_ROWS,
+    RESULT_FORMAT_ROWS,
+    _decode_snuba_response,
+)
+from sentry.utils.snuba_async import AsyncSnubaClient
+from tests.sentry.utils.test_snuba_async import fake_snuba, make_request
+
+NUM_ROWS = 100_000
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.fixture(scope="module")
+def snuba_response():
+    rows = [
+        {
+            "project_id": i % 10,
+            "issue": i,
+            "timestamp": "2023-06-01T12:00:00+00:00",
+            "transaction": f"/api/{i % 100}/",
+            "count": i * 3,
+        }
+        for i in range(NUM_ROWS)
+    ]
+    meta = [{"name": name} for name in rows[0]]
+    return mock.Mock(data=json.dumps({"meta": meta, "data": rows}).encode("utf-8"), status=200)
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize(
+    "result_format", [RESULT_FORMAT_ROWS, RESULT_FORMAT_LAZY_ROWS, RESULT_FORMAT_COLUMNAR]
+)
+@pytest.mark.parametrize("use_rapid_json", [False, True])
+def test_benchmark_decode_snuba_response(snuba_response, result_format, use_rapid_json, benchmark):
+    def reverse(row):
+        row["transaction"] = row["transaction"].rstrip("/")
+        return row
+
+    columns = ["issue", "count"] if result_format == RESULT_FORMAT_COLUMNAR else None
+
+    def decode_and_consume():
+        body = _decode_snuba_response(
+            snuba_response, reverse, {}, result_format, columns, use_rapid_json
+        )
+        if result_format == RESULT_FORMAT_COLUMNAR:
+            return len(body["data"]["count"])
+        return sum(1 for _ in body["data"])
+
+    assert benchmark(decode_and_consume) == NUM_ROWS
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("transport", ["thread_pool", "asyncio"])
+def test_benchmark_concurrent_snuba_queries(transport, benchmark):
+    # 50 queries taking 50ms each, as a multi-query endpoint would send
+    requests = [make_request("events", str(i)) for i in range(50)]
+
+    with fake_snuba(delay=0.05) as url, ExitStack() as stack:
+        if transport == "asyncio":
+            client = stack.enter_context(AsyncSnubaClient(url))
+
+            def run_queries():
+                return client.query(requests, headers={})
+
+        else:
+            pool = connection_from_url(url, maxsize=10)
+            stack.callback(pool.close)
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=10))
+
+            def run_query(request):
+                return pool.urlopen(
+                    "POST", f"/{request.dataset}/snql", body=request.serialize(), headers={}
+                )
+
+            def run_queries():
+                return list(executor.map(run_query, requests))
+
+        assert len(benchmark(run_queries)) == 50
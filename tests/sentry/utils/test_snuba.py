@@ -1,8 +1,12 @@
+import time
 import unittest
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta, timezone
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
 from django.utils import timezone as django_timezone
 
 from sentry.models.grouprelease import GroupRelease
@@ -10,10 +14,21 @@ from sentry.models.project import Project
 from sentry.models.release import Release
 from sentry.snuba.dataset import Dataset
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers.options import override_options
+from sentry.utils import json
 from sentry.utils.snuba import (
+    RESULT_FORMAT_COLUMNAR,
+    RESULT_FORMAT_LAZY_ROWS,
+    RESULT_FORMAT_ROWS,
     SnubaQueryParams,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
+    _decode_snuba_response,
+    _inflight_queries,
+    _poll_cache,
     _prepare_query_params,
+    get_cache_key,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
@@ -375,3 +390,154 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class DecodeSnubaResponseTest(unittest.TestCase):
+    def make_response(self, data, status=200):
+        return mock.Mock(
+            data=json.dumps(
+                {
+                    "meta": [{"name": "project_id"}, {"name": "count"}],
+                    "data": data,
+                }
+            ).encode("utf-8"),
+            status=status,
+        )
+
+    def reverse(self, row):
+        return {**row, "project_id": f"p{row['project_id']}"}
+
+    def test_formats(self):
+        rows = [{"project_id": 1, "count": 3}, {"project_id": 2, "count": 5}]
+        expected = [{"project_id": "p1", "count": 3}, {"project_id": "p2", "count": 5}]
+
+        body = _decode_snuba_response(
+            self.make_response(rows), self.reverse, {}, RESULT_FORMAT_ROWS
+        )
+        assert body["data"] == expected
+
+        body = _decode_snuba_response(
+            self.make_response(rows), self.reverse, {}, RESULT_FORMAT_LAZY_ROWS
+        )
+        assert not isinstance(body["data"], list)
+        assert list(body["data"]) == expected
+        assert list(body["data"]) == []
+
+        body = _decode_snuba_response(
+            self.make_response(rows), self.reverse, {}, RESULT_FORMAT_COLUMNAR
+        )
+        assert body["data"] == {"project_id": ["p1", "p2"], "count": [3, 5]}
+        assert body["meta"] == [{"name": "project_id"}, {"name": "count"}]
+
+        body = _decode_snuba_response(
+            self.make_response(rows), self.reverse, {}, RESULT_FORMAT_COLUMNAR, columns=["count"]
+        )
+        assert body["data"] == {"count": [3, 5]}
+
+    def test_rapid_json_is_opt_in(self):
+        rows = [{"project_id": 1, "count": 3}]
+        with mock.patch("sentry.utils.snuba.json.loads", wraps=json.loads) as loads:
+            for result_format in (RESULT_FORMAT_ROWS, RESULT_FORMAT_LAZY_ROWS):
+                body = _decode_snuba_response(
+                    self.make_response(rows), self.reverse, {}, result_format
+                )
+                assert list(body["data"]) == [{"project_id": "p1", "count": 3}]
+            _decode_snuba_response(
+                self.make_response(rows), self.reverse, {}, RESULT_FORMAT_ROWS, use_rapid_json=True
+            )
+        assert [c.kwargs["use_rapid_json"] for c in loads.call_args_list] == [False, False, True]
+
+    def test_invalid_json(self):
+        for result_format in (RESULT_FORMAT_ROWS, RESULT_FORMAT_LAZY_ROWS):
+            with pytest.raises(UnexpectedResponseError):
+                _decode_snuba_response(
+                    mock.Mock(data=b"{", status=200), self.reverse, {}, result_format
+                )
+
+
+class QueryCacheTest(TestCase):
+    query = {"dataset": "events", "conditions": [["project_id", "=", 1]]}
+
+    def setUp(self):
+        self.cache_key = get_cache_key(self.query)
+        cache.delete_many([self.cache_key, f"{self.cache_key}:fresh"])
+
+    def run_query(self):
+        return _apply_cache_and_build_results(
+            [(self.query, lambda x: x, lambda x: x)], use_cache=True
+        )[0]
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_stale_while_revalidate(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [{"count": 2}]}]
+        cache.set(self.cache_key, json.dumps({"data": [{"count": 1}]}), 60)
+
+        with override_options({"snuba.query-cache.stale-ttl": 60}), mock.patch(
+            "sentry.utils.snuba._cache_refresh_pool.submit", side_effect=lambda fn, *a: fn(*a)
+        ):
+            # Without a fresh marker the entry is stale, it is served while being refreshed
+            assert self.run_query() == {"data": [{"count": 1}]}
+            assert bulk_snuba_query.call_count == 1
+            assert self.run_query() == {"data": [{"count": 2}]}
+            assert bulk_snuba_query.call_count == 1
+
+        assert not _inflight_queries
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_coalesces_inflight_query(self, bulk_snuba_query):
+        inflight = Future()
+        inflight.set_result(json.dumps({"data": [{"count": 3}]}))
+        _inflight_queries[self.cache_key] = inflight
+        try:
+            with override_options({"snuba.query-cache.coalesce": True}):
+                assert self.run_query() == {"data": [{"count": 3}]}
+        finally:
+            del _inflight_queries[self.cache_key]
+        assert bulk_snuba_query.call_count == 0
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_coalesce_runs_query_once(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [{"count": 4}]}]
+        with override_options({"snuba.query-cache.coalesce": True}):
+            assert self.run_query() == {"data": [{"count": 4}]}
+            assert self.run_query() == {"data": [{"count": 4}]}
+        assert bulk_snuba_query.call_count == 1
+        assert not _inflight_queries
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_coalesce_wait_shares_deadline(self, bulk_snuba_query):
+        other_query = {"dataset": "events", "conditions": [["project_id", "=", 2]]}
+        other_cache_key = get_cache_key(other_query)
+        cache.delete(other_cache_key)
+        bulk_snuba_query.return_value = [{"data": [{"count": 1}]}, {"data": [{"count": 2}]}]
+        futures = {self.cache_key: mock.Mock(), other_cache_key: mock.Mock()}
+        for future in futures.values():
+            future.result.side_effect = FutureTimeoutError
+        _inflight_queries.update(futures)
+        try:
+            with override_options(
+                {"snuba.query-cache.coalesce": True, "snuba.query-cache.coalesce-wait-ms": 1000}
+            ), mock.patch("sentry.utils.snuba.time", wraps=time) as mock_time:
+                mock_time.monotonic.side_effect = [100.0, 100.6, 101.2]
+                results = _apply_cache_and_build_results(
+                    [
+                        (self.query, lambda x: x, lambda x: x),
+                        (other_query, lambda x: x, lambda x: x),
+                    ],
+                    use_cache=True,
+                )
+        finally:
+            for cache_key in futures:
+                del _inflight_queries[cache_key]
+
+        # The second wait only gets what is left of the first one's budget
+        assert futures[self.cache_key].result.call_args == mock.call(timeout=pytest.approx(0.4))
+        assert futures[other_cache_key].result.call_args == mock.call(timeout=0.0)
+        assert results == [{"data": [{"count": 1}]}, {"data": [{"count": 2}]}]
+        assert bulk_snuba_query.call_count == 1
+
+    def test_poll_cache_many_keys(self):
+        other_key = f"{self.cache_key}:other"
+        cache.set(self.cache_key, "1", 60)
+        cache.delete(other_key)
+        assert _poll_cache([self.cache_key, other_key], time.monotonic()) == {self.cache_key: "1"}
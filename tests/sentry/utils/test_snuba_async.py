@@ -0,0 +1,130 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from sentry.utils import json
+from sentry.utils.snuba import SnubaError
+from sentry.utils.snuba_async import AsyncSnubaClient, QueryTimeout
+
+
+@contextmanager
+def fake_snuba(delay=0.0, status=200):
+    """
+    Serves snql queries on a local port, answering every query with its own body
+    after `delay` seconds.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(delay)
+            data = json.dumps({"data": [{"path": self.path, "body": body.decode()}]}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_request(dataset, body):
+    return mock.Mock(dataset=dataset, serialize=mock.Mock(return_value=body))
+
+
+def test_query_returns_responses_in_order():
+    with fake_snuba() as url, AsyncSnubaClient(url) as client:
+        responses = client.query(
+            [make_request("events", "first"), make_request("transactions", "second")],
+            headers={"referer": "test"},
+        )
+    assert [r.status for r in responses] == [200, 200]
+    assert [json.loads(r.data)["data"][0] for r in responses] == [
+        {"path": "/events/snql", "body": "first"},
+        {"path": "/transactions/snql", "body": "second"},
+    ]
+
+
+def test_queries_run_concurrently():
+    with fake_snuba(delay=0.2) as url, AsyncSnubaClient(url) as client:
+        start = time.monotonic()
+        responses = client.query([make_request("events", str(i)) for i in range(20)], headers={})
+        elapsed = time.monotonic() - start
+    assert len(responses) == 20
+    assert elapsed < 2
+
+
+def test_error_status_is_returned():
+    with fake_snuba(status=500) as url, AsyncSnubaClient(url) as client:
+        [response] = client.query([make_request("events", "")], headers={})
+    assert response.status == 500
+
+
+def test_query_timeout():
+    with fake_snuba(delay=1) as url, AsyncSnubaClient(url) as client:
+        with pytest.raises(QueryTimeout):
+            client.query([make_request("events", "")], headers={}, timeout=0.1)
+
+
+def test_connection_error():
+    with fake_snuba() as url:
+        pass
+    with AsyncSnubaClient(url) as client, mock.patch(
+        "sentry.utils.snuba_async.MAX_ATTEMPTS", 2
+    ), pytest.raises(SnubaError):
+        client.query([make_request("events", "")], headers={})
+
+
+def test_close_stops_loop():
+    with fake_snuba() as url:
+        client = AsyncSnubaClient(url)
+        client.query([make_request("events", "")], headers={})
+        loop, thread, session = client._loop, client._thread, client._session
+        client.close()
+
+        assert not thread.is_alive()
+        assert loop.is_closed()
+        assert session.closed
+        assert client._loop is None
+
+        # A closed client starts over when it is used again
+        [response] = client.query([make_request("events", "")], headers={})
+        client.close()
+    assert response.status == 200
+
+
+def test_query_instrumentation():
+    parent_span = mock.Mock()
+    with fake_snuba() as url, AsyncSnubaClient(url) as client, mock.patch(
+        "sentry.utils.snuba_async.sentry_sdk"
+    ) as sdk, mock.patch("sentry.utils.snuba.metrics.timing") as timing:
+        sdk.Hub.current.scope.span = parent_span
+        client.query(
+            [make_request("events", "first"), make_request("events", "second")],
+            headers={"referer": "test"},
+        )
+
+    assert [c.kwargs["op"] for c in sdk.start_span.call_args_list] == [
+        "snuba_snql.validation",
+        "snuba_snql.validation",
+    ]
+    run_spans = [
+        c for c in parent_span.start_child.call_args_list if c.kwargs["op"] == "snuba_snql.run"
+    ]
+    assert len(run_spans) == 2
+    assert parent_span.start_child.return_value.finish.call_count == 2
+    assert [c.args[0] for c in timing.call_args_list].count("snuba.client.snql_query") == 2
@@ -4,7 +4,9 @@ from unittest.mock import Mock, call, patch
 from uuid import uuid4
 
 from dateutil.parser import parse as parse_datetime
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -905,6 +907,38 @@ class GroupListTest(APITestCase, SnubaTestCase):
         response = self.get_response(limit=10, query="assigned:[me, none]")
         assert len(response.data) == 4
 
+    def test_query_count_independent_of_group_count(self):
+        self.login_as(user=self.user)
+
+        def create_assigned_groups(start, count):
+            for i in range(start, start + count):
+                group = self.store_event(
+                    data={
+                        "timestamp": iso_format(before_now(minutes=10 + i)),
+                        "fingerprint": [f"group-{i}"],
+                    },
+                    project_id=self.project.id,
+                ).group
+                GroupAssignee.objects.assign(group, self.user if i % 2 else self.team)
+
+        def get_groups_and_query_count():
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+                response = self.get_response(sort_by="date", limit=25)
+            assert response.status_code == 200
+            return len(response.data), len(queries)
+
+        create_assigned_groups(0, 2)
+        # Warm up the caches shared by all requests
+        self.get_response(sort_by="date", limit=25)
+        num_groups, few_groups_queries = get_groups_and_query_count()
+        assert num_groups == 2
+
+        create_assigned_groups(2, 8)
+        num_groups, many_groups_queries = get_groups_and_query_count()
+        assert num_groups == 10
+        # Related objects of all groups are fetched together, not once per group
+        assert many_groups_queries == few_groups_queries
+
     def test_seen_stats(self):
         self.store_event(
             data={"timestamp": iso_format(before_now(seconds=500)), "fingerprint": ["group-1"]},